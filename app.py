@@ -3,7 +3,6 @@ import io
 import contextlib
 import builtins
 import re
-import json
 import networkx as nx
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
@@ -12,6 +11,13 @@ import numpy as np
 import os
 from datetime import datetime
 from run_pipeline import run_pipeline
+from src.pipeline import serialization
+from src.pipeline import function_bodies
+from src.pipeline import layout
+from src.pipeline import cycles
+from src.pipeline import aggregation
+from src.pipeline import graph_figures
+from src.pipeline import search_index
 
 st.set_page_config(page_title="GitHub Repository Analyzer", page_icon=None, layout="wide")
 
@@ -233,17 +239,278 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
+def function_expander(label, key):
+    """
+    An expander that reruns when toggled, so its .open tells whether to load
+    a lazily stored function body. Older Streamlit versions don't track
+    expander state; .open is then missing and a checkbox is used instead.
+    """
+    try:
+        return st.expander(label, expanded=False, key=key, on_change="rerun")
+    except TypeError:
+        return st.expander(label, expanded=False)
+
+# Streamlit reruns the whole script on every widget interaction. Everything
+# derived from the analysis is cached by its content hash; the underscored
+# arguments are not hashed, so the records themselves are never rehashed.
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def overview_stats(analysis_hash, _analysis_data):
+    language_counts = {}
+    all_external = set()
+    file_stats = []
+    for file in _analysis_data:
+        lang = file.get('language', 'Unknown')
+        language_counts[lang] = language_counts.get(lang, 0) + 1
+        all_external.update(file.get('external_libraries', []))
+        file_stats.append({
+            'File': file.get('file_path', 'Unknown'),
+            'Language': lang,
+            'Functions': len(file.get('functions', [])),
+            'Dependencies': len(file.get('dependencies', [])),
+            'External Libs': len(file.get('external_libraries', []))
+        })
+    return {
+        'total_functions': sum(stats['Functions'] for stats in file_stats),
+        'total_deps': sum(stats['Dependencies'] for stats in file_stats),
+        'external_libraries': sorted(all_external),
+        'language_counts': language_counts,
+        'file_stats': file_stats,
+    }
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def analysis_records(analysis_hash, analysis_path):
+    """
+    The analysis's records, opened once per process and shared by every
+    session. A .records analysis is memory-mapped, so records are decoded
+    only when read and the file's pages are shared with other processes.
+    Must not be modified.
+    """
+    return serialization.open_analysis(analysis_path)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def function_search_index(analysis_hash, _analysis_data, _analysis_path):
+    """
+    The analysis's search index (path -> record lookup and function search),
+    as saved by the pipeline or built here for analyses saved without one.
+    Shared between sessions, so it must not be modified.
+    """
+    index = search_index.load_search_index(_analysis_path) if _analysis_path else None
+    if index is None or len(index.paths) != len(_analysis_data):
+        index = search_index.SearchIndex.from_records(_analysis_data)
+    return index
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def search_result_rows(analysis_hash, query, _analysis_data, _index):
+    # Only the records of matching functions are decoded
+    rows = []
+    for record_index, func_index, func_name in _index.search(query, limit=search_index.DEFAULT_SEARCH_LIMIT):
+        record = _analysis_data[record_index]
+        rows.append({
+            'Function': func_name,
+            'File': _index.paths[record_index],
+            'Lines': _function_lines(record['functions'][func_index]),
+        })
+    return rows
+
+def open_search_result(file_path, func_name):
+    # Runs before the file selector is drawn, so its state can still be set
+    st.session_state.file_selector = file_path
+    st.session_state.func_search = func_name
+
+def _function_lines(func):
+    if func.get('start_line') and func.get('end_line'):
+        return func['end_line'] - func['start_line'] + 1
+    return len(func.get('code', '').splitlines())
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def dependency_graph(analysis_hash, _analysis_data):
+    """
+    The file dependency graph and per-file node info. Shared between
+    sessions, so neither may be modified.
+    """
+    G = nx.DiGraph()
+    node_info = {}
+    for file in _analysis_data:
+        file_path = file.get("file_path", "")
+        deps = file.get("dependencies", [])
+        node_info[file_path] = {
+            'lines_of_code': sum(_function_lines(f) for f in file.get('functions', [])),
+            'dependencies': len(deps),
+            'file_type': file_path.split('.')[-1] if '.' in file_path else 'unknown'
+        }
+        for dep in deps:
+            G.add_edge(file_path, dep)
+    return G, node_info
+
+@st.cache_data(max_entries=4, show_spinner="Computing layout...")
+def graph_layout(analysis_hash, _G):
+    # Precomputed layouts (run_pipeline.py --layout) are read from the on-disk layout cache
+    return layout.cached_layout(analysis_hash, list(_G.nodes()), list(_G.edges()), layout.LayoutCache())
+
+@st.cache_data(max_entries=4, show_spinner="Computing graph metrics...")
+def graph_metrics(analysis_hash, _G):
+    node_count = _G.number_of_nodes()
+    metrics = {
+        'nodes': node_count,
+        'edges': _G.number_of_edges(),
+        'density': nx.density(_G),
+        'avg_in_degree': sum(d for n, d in _G.in_degree()) / node_count,
+        'avg_out_degree': sum(d for n, d in _G.out_degree()) / node_count,
+    }
+    try:
+        metrics['weak_components'] = nx.number_weakly_connected_components(_G)
+    except Exception:
+        metrics['weak_components'] = None
+    degree_centrality = nx.degree_centrality(_G)
+    metrics['top_files'] = [
+        (file, _G.in_degree(file), _G.out_degree(file), centrality)
+        for file, centrality in sorted(degree_centrality.items(), key=lambda x: x[1], reverse=True)[:5]
+    ]
+    return metrics
+
+@st.cache_data(max_entries=4, show_spinner="Finding circular dependencies...")
+def cycle_report(analysis_hash, _G, _stored_report):
+    # Analyses saved by the pipeline carry their report; older ones are analysed here
+    return _stored_report or cycles.analyze_cycles(_G)
+
+@st.cache_resource(max_entries=2, show_spinner="Drawing graph...")
+def file_graph_figure(analysis_hash, _G, _node_info, _pos):
+    """The WebGL file-level figure; shared between sessions, so it must not be modified."""
+    return graph_figures.dependency_figure(_G, _node_info, _pos)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cluster_view(analysis_hash, level, expanded, _analysis_data, _stored_hierarchy):
+    """The graph at a level of detail (see aggregation.view_graph); expanded is a sorted tuple."""
+    if not expanded and _stored_hierarchy:
+        return aggregation.bound_view(_stored_hierarchy[level])
+    file_paths = [file.get('file_path', '') for file in _analysis_data]
+    return aggregation.view_graph(file_paths, layout.dependency_edges(_analysis_data), level, expanded)
+
+@st.cache_data(max_entries=16, show_spinner="Computing layout...")
+def cluster_layout(analysis_hash, level, expanded, _view):
+    return layout.compute_layout(list(_view['nodes']), [(source, target) for source, target, _ in _view['edges']])
+
+def _cluster_label(node):
+    if node == aggregation.OTHER_NODE:
+        return node
+    suffix = '/**' if node.endswith('/**') else '/' if node.endswith('/') else ''
+    return node[:len(node) - len(suffix)].split('/')[-1] + suffix
+
+def cluster_figure(view, pos):
+    """Plotly figure of an aggregated view: node size grows with file count, edge width with edge count."""
+    nodes = list(view['nodes'])
+    max_files = max(max(view['nodes'].values()), 1)
+    max_weight = max((weight for _, _, weight in view['edges']), default=1)
+    in_weight, out_weight = {}, {}
+    # One trace per width band, since a line trace has a single width
+    bands = {}
+    for source, target, weight in view['edges']:
+        out_weight[source] = out_weight.get(source, 0) + weight
+        in_weight[target] = in_weight.get(target, 0) + weight
+        band = min(3, int(4 * np.log1p(weight) / np.log1p(max_weight)))
+        edge_x, edge_y = bands.setdefault(band, ([], []))
+        edge_x.extend([pos[source][0], pos[target][0], None])
+        edge_y.extend([pos[source][1], pos[target][1], None])
+
+    fig = go.Figure()
+    for band, (edge_x, edge_y) in sorted(bands.items()):
+        fig.add_trace(go.Scatter(
+            x=edge_x, y=edge_y,
+            line=dict(width=1 + 2 * band, color='#999999'),
+            hoverinfo='none',
+            mode='lines'
+        ))
+
+    kind_colors = {'package': '#1a1a1a', 'directory': '#666666', 'file': '#b3b3b3'}
+    def kind(node):
+        if node.endswith('/**') or node == aggregation.OTHER_NODE:
+            return 'package'
+        return 'directory' if node.endswith('/') else 'file'
+
+    fig.add_trace(go.Scatter(
+        x=[pos[node][0] for node in nodes], y=[pos[node][1] for node in nodes],
+        mode='markers+text',
+        marker=dict(
+            size=[12 + 38 * np.sqrt(view['nodes'][node] / max_files) for node in nodes],
+            color=[kind_colors[kind(node)] for node in nodes],
+            line=dict(width=1, color='#000000'),
+            opacity=0.9
+        ),
+        text=[_cluster_label(node) for node in nodes],
+        textposition="top center",
+        textfont=dict(size=9, color="#1a1a1a", family="Inter, sans-serif"),
+        hovertext=[
+            f"<b>{node}</b><br>"
+            f"Files: {view['nodes'][node]}<br>"
+            f"Internal dependencies: {view['internal_edges'].get(node, 0)}<br>"
+            f"Outgoing dependencies: {out_weight.get(node, 0)}<br>"
+            f"Incoming dependencies: {in_weight.get(node, 0)}"
+            for node in nodes
+        ],
+        hoverinfo='text'
+    ))
+    fig.update_layout(
+        title=dict(
+            text=f"Dependency Graph - {len(nodes)} clusters, {len(view['edges'])} cluster dependencies",
+            x=0.5,
+            font=dict(size=16, family="Inter, sans-serif", color='#000000')
+        ),
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=20,l=5,r=5,t=40),
+        annotations=[dict(
+            text="Node size represents file count | Edge width represents file-level dependencies | "
+                 "dark: package (dir/**), grey: files directly in dir/, light: file",
+            showarrow=False,
+            xref="paper", yref="paper",
+            x=0.005, y=-0.002,
+            xanchor='left', yanchor='bottom',
+            font=dict(color="#666666", size=11, family="Inter, sans-serif")
+        )],
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        paper_bgcolor='#ffffff',
+        plot_bgcolor='#ffffff',
+        height=600
+    )
+    return fig
+
+def prepare_download(analysis_hash, analysis_data):
+    # Only built when asked for: it decodes every record into one string
+    payload = io.StringIO()
+    serialization.write_json_array(analysis_data, payload)
+    st.session_state.download_payload = (analysis_hash, payload.getvalue())
+
 # Initialize session state to store analysis results
 if 'analysis_data' not in st.session_state:
     st.session_state.analysis_data = None
 if 'analysis_complete' not in st.session_state:
     st.session_state.analysis_complete = False
+if 'analysis_hash' not in st.session_state:
+    st.session_state.analysis_hash = None
+if 'analysis_path' not in st.session_state:
+    st.session_state.analysis_path = None
+if 'analysis_cycles' not in st.session_state:
+    st.session_state.analysis_cycles = None
+if 'analysis_hierarchy' not in st.session_state:
+    st.session_state.analysis_hierarchy = None
+if 'download_payload' not in st.session_state:
+    st.session_state.download_payload = None
+if 'function_body_reader' not in st.session_state:
+    # Bodies of --lazy-code analyses are fetched from the blob store on demand
+    st.session_state.function_body_reader = function_bodies.FunctionBodyReader(
+        blob_store=function_bodies.BlobStore()
+    )
 
 # Sidebar for configuration
 with st.sidebar:
     st.header("Configuration")
     save_repo = st.checkbox("Save repository locally", value=False)
     show_full_json = st.checkbox("Show full JSON output", value=False)
+    lazy_code = st.checkbox("Load function code on demand", value=False,
+                            help="Keep function bodies in output/blob_store and only read one "
+                                 "when its function is opened; saves memory on large repositories")
     st.markdown("---")
     st.subheader("About")
     st.markdown("""
@@ -259,6 +526,11 @@ with st.sidebar:
     if st.session_state.analysis_complete:
         if st.button("Clear Analysis", use_container_width=True):
             st.session_state.analysis_data = None
+            st.session_state.analysis_hash = None
+            st.session_state.analysis_path = None
+            st.session_state.analysis_cycles = None
+            st.session_state.analysis_hierarchy = None
+            st.session_state.download_payload = None
             st.session_state.analysis_complete = False
             st.rerun()
     
@@ -277,32 +549,25 @@ if st.button("Run Analysis", type="primary", use_container_width=True):
 
         with st.spinner("Cloning repository and analyzing..."):
             try:
-                # Check for analysis results directory
-                output_dir = "analysis_results"
+                # Run the pipeline (it saves a memory-mapped record store and returns its path)
+                analysis_path = run_pipeline(output_format="records", lazy_code=lazy_code)
                 
-                # Run the pipeline (it now saves to JSON file)
-                run_pipeline()
-                
-                # Find the most recent analysis file
-                if os.path.exists(output_dir):
-                    json_files = [f for f in os.listdir(output_dir) if f.endswith('.json')]
-                    if json_files:
-                        # Get the most recent file
-                        latest_file = max([os.path.join(output_dir, f) for f in json_files], 
-                                        key=os.path.getctime)
-                        
-                        with open(latest_file, 'r', encoding='utf-8') as f:
-                            analysis_data = json.load(f)
-                        
-                        # Store in session state
-                        st.session_state.analysis_data = analysis_data
-                        st.session_state.analysis_complete = True
-                        
-                        st.success(f"Analysis complete! Found {len(analysis_data)} files.")
-                    else:
-                        st.error("No analysis files found. The pipeline may not have completed successfully.")
+                if analysis_path:
+                    analysis_hash = serialization.analysis_content_hash(analysis_path)
+                    analysis_data = analysis_records(analysis_hash, analysis_path)
+                    
+                    # Store in session state (a reference to the shared records, not a copy)
+                    st.session_state.analysis_data = analysis_data
+                    st.session_state.analysis_hash = analysis_hash
+                    st.session_state.analysis_path = analysis_path
+                    st.session_state.analysis_cycles = serialization.load_sidecar(analysis_path, 'cycles')
+                    st.session_state.analysis_hierarchy = serialization.load_sidecar(analysis_path, 'hierarchy')
+                    st.session_state.download_payload = None
+                    st.session_state.analysis_complete = True
+                    
+                    st.success(f"Analysis complete! Found {len(analysis_data)} files.")
                 else:
-                    st.error("Analysis results directory not found.")
+                    st.error("No analysis was saved. The pipeline may not have completed successfully.")
 
             except Exception as e:
                 st.error(f"An error occurred during pipeline execution: {e}")
@@ -313,6 +578,7 @@ if st.button("Run Analysis", type="primary", use_container_width=True):
 # Display analysis results if available
 if st.session_state.analysis_complete and st.session_state.analysis_data:
     analysis_data = st.session_state.analysis_data
+    analysis_hash = st.session_state.analysis_hash
     
     # Create tabs for different views
     tab1, tab2, tab3, tab4 = st.tabs([
@@ -328,29 +594,22 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
         
         col1, col2, col3, col4 = st.columns(4)
         
-        total_functions = sum(len(file.get('functions', [])) for file in analysis_data)
-        total_deps = sum(len(file.get('dependencies', [])) for file in analysis_data)
+        overview = overview_stats(analysis_hash, analysis_data)
         
         with col1:
             st.metric("Total Files", len(analysis_data))
         with col2:
-            st.metric("Total Functions", total_functions)
+            st.metric("Total Functions", overview['total_functions'])
         with col3:
-            st.metric("Dependencies", total_deps)
+            st.metric("Dependencies", overview['total_deps'])
         with col4:
-            all_external = set()
-            for file in analysis_data:
-                all_external.update(file.get('external_libraries', []))
-            st.metric("External Libraries", len(all_external))
+            st.metric("External Libraries", len(overview['external_libraries']))
         
         st.markdown("<br>", unsafe_allow_html=True)
         
         # Language distribution
         st.subheader("Programming Languages")
-        language_counts = {}
-        for file in analysis_data:
-            lang = file.get('language', 'Unknown')
-            language_counts[lang] = language_counts.get(lang, 0) + 1
+        language_counts = overview['language_counts']
         
         # Grayscale color palette
         gray_colors = ['#333333', '#666666', '#999999', '#cccccc', '#e0e0e0']
@@ -372,39 +631,48 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
         st.plotly_chart(fig_lang, use_container_width=True)
         
         # External libraries list
-        if all_external:
+        if overview['external_libraries']:
             st.subheader("External Libraries Used")
             cols = st.columns(3)
-            sorted_libs = sorted(list(all_external))
+            sorted_libs = overview['external_libraries']
             for idx, lib in enumerate(sorted_libs):
                 with cols[idx % 3]:
                     st.code(lib, language=None)
         
         # File statistics
         st.subheader("File Statistics")
-        file_stats = []
-        for file in analysis_data:
-            file_stats.append({
-                'File': file.get('file_path', 'Unknown'),
-                'Language': file.get('language', 'Unknown'),
-                'Functions': len(file.get('functions', [])),
-                'Dependencies': len(file.get('dependencies', [])),
-                'External Libs': len(file.get('external_libraries', []))
-            })
-        
-        st.dataframe(file_stats, use_container_width=True, height=400)
+        st.dataframe(overview['file_stats'], use_container_width=True, height=400)
     
     # TAB 2: Function Explorer
     with tab2:
         st.subheader("Function Explorer")
         st.markdown("Browse all functions and view their source code")
         
+        file_index = function_search_index(analysis_hash, analysis_data, st.session_state.analysis_path)
+        
+        # Repository-wide search, answered from the inverted index
+        repo_query = st.text_input("Search all functions in the repository", "", key="repo_func_search",
+                                   placeholder="e.g. parse config, getUser")
+        if repo_query.strip():
+            result_rows = search_result_rows(analysis_hash, repo_query, analysis_data, file_index)
+            if result_rows:
+                st.caption(f"{len(result_rows)} matching functions" if len(result_rows) < search_index.DEFAULT_SEARCH_LIMIT
+                           else f"Top {len(result_rows)} matching functions")
+                st.dataframe(result_rows, use_container_width=True, height=250)
+                picked = st.selectbox("Open a result", range(len(result_rows)), key="repo_func_result",
+                                      format_func=lambda i: f"{result_rows[i]['Function']}  ({result_rows[i]['File']})")
+                st.button("Show in file", key="repo_func_open", on_click=open_search_result,
+                          args=(result_rows[picked]['File'], result_rows[picked]['Function']))
+            else:
+                st.info("No functions match your search.")
+            st.markdown("---")
+        
         # File selector
-        file_paths = [file.get('file_path', 'Unknown') for file in analysis_data]
-        selected_file = st.selectbox("Select a file", file_paths, key="file_selector")
+        selected_file = st.selectbox("Select a file", file_index.paths, key="file_selector")
         
         if selected_file:
-            file_data = next((f for f in analysis_data if f.get('file_path') == selected_file), None)
+            record_index = file_index.record_index(selected_file)
+            file_data = analysis_data[record_index] if record_index is not None else None
             
             if file_data:
                 col1, col2 = st.columns([1, 1])
@@ -435,16 +703,36 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
                     
                     filtered_functions = [
                         f for f in functions 
-                        if search_term.lower() in f.get('name', '').lower()
+                        if search_term.lower() in f.get('qualified_name', f.get('name', '')).lower()
                     ]
                     
                     if filtered_functions:
                         # Create expandable sections for each function
-                        for func in filtered_functions:
-                            func_name = func.get('name', 'Unknown')
-                            func_code = func.get('code', 'No code available')
+                        for func_index, func in enumerate(filtered_functions):
+                            func_name = func.get('qualified_name', func.get('name', 'Unknown'))
+                            func_code = func.get('code')
+                            is_lazy = func_code is None and 'code_ref' in func
                             
-                            with st.expander(f"Function: {func_name}", expanded=False):
+                            if is_lazy:
+                                expander = function_expander(f"Function: {func_name}",
+                                                             key=f"func_{selected_file}_{func_index}")
+                            else:
+                                expander = st.expander(f"Function: {func_name}", expanded=False)
+                            with expander:
+                                # A lazy body is only read, and drawn, once its expander is opened
+                                show_code = True
+                                if is_lazy:
+                                    is_open = getattr(expander, 'open', None)
+                                    if is_open is None:
+                                        is_open = st.checkbox("Load code", key=f"load_{selected_file}_{func_index}")
+                                    if is_open:
+                                        func_code = function_bodies.function_code(
+                                            func, st.session_state.function_body_reader
+                                        )
+                                    show_code = bool(is_open)
+                                if func_code is None:
+                                    func_code = 'No code available'
+                                
                                 # Detect language for syntax highlighting
                                 lang = file_data.get('language', 'python')
                                 if lang == 'javascript xml':
@@ -452,9 +740,16 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
                                 elif lang == 'typescript xml':
                                     lang = 'tsx'
                                 
-                                st.code(func_code, language=lang)
+                                if show_code:
+                                    st.code(func_code, language=lang)
                                 
-                                st.caption(f"Lines of code: {len(func_code.splitlines())}")
+                                if func.get('decorators'):
+                                    st.caption("Decorators: " + ", ".join(f"@{d}" for d in func['decorators']))
+                                if func.get('start_line'):
+                                    st.caption(f"Lines {func['start_line']}-{func['end_line']} | "
+                                               f"Lines of code: {func['end_line'] - func['start_line'] + 1}")
+                                else:
+                                    st.caption(f"Lines of code: {len(func_code.splitlines())}")
                     else:
                         st.info("No functions match your search.")
                 else:
@@ -464,27 +759,8 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
     with tab3:
         st.subheader("Dependency Graph Visualization")
         
-        # Create network graph
-        G = nx.DiGraph()
-        node_info = {}
-
-        for file in analysis_data:
-            file_path = file.get("file_path", "")
-            deps = file.get("dependencies", [])
-            
-            # Calculate lines of code from functions
-            total_lines = sum(len(f.get('code', '').splitlines()) for f in file.get('functions', []))
-            
-            # Add node info
-            node_info[file_path] = {
-                'lines_of_code': total_lines,
-                'dependencies': len(deps),
-                'file_type': file_path.split('.')[-1] if '.' in file_path else 'unknown'
-            }
-            
-            # Add edges
-            for dep in deps:
-                G.add_edge(file_path, dep)
+        # Network graph, built once per analysis
+        G, node_info = dependency_graph(analysis_hash, analysis_data)
 
         if G.number_of_nodes() > 0:
             # Create tabs for different graph views
@@ -497,103 +773,33 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
             with graph_tab1:
                 st.markdown("**Interactive Dependency Network** - Hover over nodes for details")
                 
+                # Large graphs start at the package level and clusters are expanded on demand,
+                # so the browser never draws more than aggregation.MAX_VIEW_NODES nodes
+                level_names = {"Packages": "package", "Directories": "directory", "Files": "file"}
+                detail = st.radio("Level of detail", list(level_names), horizontal=True, key="graph_level",
+                                  index=2 if G.number_of_nodes() <= aggregation.MAX_VIEW_NODES else 0)
+                level = level_names[detail]
+                
+                if G.number_of_edges() > 0 and level != 'file':
+                    expand_key = f"expanded_{level}"
+                    expanded = tuple(sorted(st.session_state.get(expand_key, [])))
+                    view = cluster_view(analysis_hash, level, expanded, analysis_data,
+                                        st.session_state.analysis_hierarchy)
+                    expandable = {node for node in view['nodes']
+                                  if aggregation.is_cluster(node) and node != aggregation.OTHER_NODE}
+                    st.multiselect("Expand clusters", sorted(expandable | set(expanded)), key=expand_key,
+                                   help="dir/** splits a package into its sub-packages; dir/ shows the files directly in it")
+                    st.plotly_chart(cluster_figure(view, cluster_layout(analysis_hash, level, expanded, view)),
+                                    use_container_width=True)
+                    if aggregation.OTHER_NODE in view['nodes']:
+                        st.caption(f"The smallest clusters are combined into {aggregation.OTHER_NODE}.")
+                
                 # Create interactive plotly graph
-                if G.number_of_edges() > 0:
-                    # Use different layout algorithms based on graph size
-                    if len(G.nodes()) < 20:
-                        pos = nx.spring_layout(G, k=3, iterations=50)
-                    elif len(G.nodes()) < 50:
-                        pos = nx.kamada_kawai_layout(G)
-                    else:
-                        pos = nx.spring_layout(G, k=1, iterations=20)
-                    
-                    # Extract positions
-                    node_x = [pos[node][0] for node in G.nodes()]
-                    node_y = [pos[node][1] for node in G.nodes()]
-                    
-                    # Create edge traces
-                    edge_x = []
-                    edge_y = []
-                    for edge in G.edges():
-                        x0, y0 = pos[edge[0]]
-                        x1, y1 = pos[edge[1]]
-                        edge_x.extend([x0, x1, None])
-                        edge_y.extend([y0, y1, None])
-                    
-                    # Grayscale colors for nodes
-                    file_types = list(set(node_info[node]['file_type'] for node in G.nodes()))
-                    gray_shades = ['#1a1a1a', '#404040', '#666666', '#8c8c8c', '#b3b3b3', '#d9d9d9']
-                    type_to_color = dict(zip(file_types, gray_shades[:len(file_types)]))
-                    
-                    node_colors = [type_to_color[node_info[node]['file_type']] for node in G.nodes()]
-                    node_sizes = [max(10, min(50, node_info[node]['lines_of_code'] / 10)) for node in G.nodes()]
-                    
-                    # Create hover text
-                    hover_text = []
-                    for node in G.nodes():
-                        info = node_info[node]
-                        hover_text.append(
-                            f"<b>{node}</b><br>"
-                            f"File Type: {info['file_type']}<br>"
-                            f"Lines of Code: {info['lines_of_code']}<br>"
-                            f"Dependencies: {info['dependencies']}<br>"
-                            f"In-degree: {G.in_degree(node)}<br>"
-                            f"Out-degree: {G.out_degree(node)}"
-                        )
-                    
-                    # Create the plot
-                    fig = go.Figure()
-                    
-                    # Add edges
-                    fig.add_trace(go.Scatter(
-                        x=edge_x, y=edge_y,
-                        line=dict(width=1, color='#999999'),
-                        hoverinfo='none',
-                        mode='lines',
-                        name='Dependencies'
-                    ))
-                    
-                    # Add nodes
-                    fig.add_trace(go.Scatter(
-                        x=node_x, y=node_y,
-                        mode='markers+text',
-                        marker=dict(
-                            size=node_sizes,
-                            color=node_colors,
-                            line=dict(width=1, color='#000000'),
-                            opacity=0.9
-                        ),
-                        text=[node.split('/')[-1] for node in G.nodes()],
-                        textposition="middle center",
-                        textfont=dict(size=8, color="white", family="Inter, sans-serif"),
-                        hovertext=hover_text,
-                        hoverinfo='text',
-                        name='Files'
-                    ))
-                    
-                    fig.update_layout(
-                        title=dict(
-                            text=f"Dependency Graph - {len(G.nodes())} files, {len(G.edges())} dependencies",
-                            x=0.5,
-                            font=dict(size=16, family="Inter, sans-serif", color='#000000')
-                        ),
-                        showlegend=False,
-                        hovermode='closest',
-                        margin=dict(b=20,l=5,r=5,t=40),
-                        annotations=[dict(
-                            text="Node size represents lines of code | Color represents file type",
-                            showarrow=False,
-                            xref="paper", yref="paper",
-                            x=0.005, y=-0.002,
-                            xanchor='left', yanchor='bottom',
-                            font=dict(color="#666666", size=11, family="Inter, sans-serif")
-                        )],
-                        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                        paper_bgcolor='#ffffff',
-                        plot_bgcolor='#ffffff',
-                        height=600
-                    )
+                elif G.number_of_edges() > 0:
+                    # The layout algorithm is chosen by graph size (see layout.choose_algorithm)
+                    pos = graph_layout(analysis_hash, G)
+                    fig, type_to_color = file_graph_figure(analysis_hash, G, node_info, pos)
+                    file_types = list(type_to_color)
                     
                     st.plotly_chart(fig, use_container_width=True)
                     
@@ -610,14 +816,45 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
             with graph_tab2:
                 st.markdown("**Static Network Graph** - Traditional matplotlib visualization")
                 
-                if G.number_of_edges() > 0:
+                if G.number_of_edges() > 0 and level != 'file':
+                    # Same level of detail as the interactive graph
+                    cluster_graph = nx.DiGraph()
+                    cluster_graph.add_nodes_from(view['nodes'])
+                    cluster_graph.add_weighted_edges_from(view['edges'])
+                    cluster_pos = cluster_layout(analysis_hash, level, expanded, view)
+                    max_files = max(max(view['nodes'].values()), 1)
+                    max_weight = max((weight for _, _, weight in view['edges']), default=1)
+                    
+                    fig_static, ax = plt.subplots(figsize=(12, 8), facecolor='white')
+                    nx.draw_networkx_edges(cluster_graph, cluster_pos,
+                                           edge_color='#666666',
+                                           arrows=True,
+                                           arrowsize=15,
+                                           arrowstyle='->',
+                                           alpha=0.5,
+                                           width=[1 + 3 * np.log1p(w) / np.log1p(max_weight)
+                                                  for _, _, w in cluster_graph.edges(data='weight')])
+                    nx.draw_networkx_nodes(cluster_graph, cluster_pos,
+                                           node_color='#8c8c8c',
+                                           node_size=[300 + 1700 * np.sqrt(view['nodes'][node] / max_files)
+                                                      for node in cluster_graph.nodes()],
+                                           alpha=0.85,
+                                           edgecolors='#000000',
+                                           linewidths=1.5)
+                    nx.draw_networkx_labels(cluster_graph, cluster_pos,
+                                            {node: _cluster_label(node) for node in cluster_graph.nodes()},
+                                            font_size=8, font_weight='normal', font_family='sans-serif')
+                    plt.title(f"Dependency Network by {detail.lower()}\n{len(view['nodes'])} clusters, "
+                              f"{len(view['edges'])} cluster dependencies",
+                              fontsize=14, fontweight='normal', pad=20)
+                    plt.axis('off')
+                    plt.tight_layout()
+                    st.pyplot(fig_static)
+                
+                elif G.number_of_edges() > 0:
                     fig_static, ax = plt.subplots(figsize=(12, 8), facecolor='white')
                     
-                    # Choose layout based on graph size
-                    if len(G.nodes()) < 15:
-                        pos = nx.spring_layout(G, k=2, iterations=50)
-                    else:
-                        pos = nx.kamada_kawai_layout(G)
+                    pos = graph_layout(analysis_hash, G)
                     
                     # Draw edges first
                     nx.draw_networkx_edges(G, pos, 
@@ -669,51 +906,56 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
                 st.markdown("**Graph Analysis Metrics**")
                 
                 if G.number_of_nodes() > 0:
+                    metrics = graph_metrics(analysis_hash, G)
+                    cycle_info = cycle_report(analysis_hash, G, st.session_state.analysis_cycles)
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
-                        st.metric("Nodes (Files)", len(G.nodes()))
-                        st.metric("Edges (Dependencies)", len(G.edges()))
-                        st.metric("Density", f"{nx.density(G):.3f}")
+                        st.metric("Nodes (Files)", metrics['nodes'])
+                        st.metric("Edges (Dependencies)", metrics['edges'])
+                        st.metric("Density", f"{metrics['density']:.3f}")
                     
                     with col2:
-                        if len(G.edges()) > 0:
-                            st.metric("Avg In-degree", f"{sum(d for n, d in G.in_degree()) / len(G.nodes()):.2f}")
-                            st.metric("Avg Out-degree", f"{sum(d for n, d in G.out_degree()) / len(G.nodes()):.2f}")
+                        if metrics['edges'] > 0:
+                            st.metric("Avg In-degree", f"{metrics['avg_in_degree']:.2f}")
+                            st.metric("Avg Out-degree", f"{metrics['avg_out_degree']:.2f}")
                         else:
                             st.metric("Avg In-degree", "0")
                             st.metric("Avg Out-degree", "0")
                     
                     with col3:
-                        try:
-                            if nx.is_weakly_connected(G):
-                                st.metric("Connected Components", "1 (fully connected)")
-                            else:
-                                components = nx.number_weakly_connected_components(G)
-                                st.metric("Weakly Connected Components", components)
-                        except:
+                        if metrics['weak_components'] is None:
                             st.metric("Connected Components", "N/A")
+                        elif metrics['weak_components'] == 1:
+                            st.metric("Connected Components", "1 (fully connected)")
+                        else:
+                            st.metric("Weakly Connected Components", metrics['weak_components'])
                         
-                        # Check for cycles
-                        try:
-                            cycles = list(nx.simple_cycles(G))
-                            st.metric("Circular Dependencies", len(cycles))
-                        except:
-                            st.metric("Circular Dependencies", "N/A")
+                        # Groups of files that depend on each other (strongly connected components)
+                        st.metric("Circular Dependencies", cycle_info['cyclic_component_count'])
                     
                     # Most connected files
-                    if len(G.edges()) > 0:
+                    if metrics['edges'] > 0:
                         st.subheader("Most Connected Files")
                         
-                        degree_centrality = nx.degree_centrality(G)
-                        top_files = sorted(degree_centrality.items(), key=lambda x: x[1], reverse=True)[:5]
-                        
-                        for i, (file, centrality) in enumerate(top_files, 1):
-                            in_deg = G.in_degree(file)
-                            out_deg = G.out_degree(file)
+                        for i, (file, in_deg, out_deg, centrality) in enumerate(metrics['top_files'], 1):
                             st.markdown(f"**{i}. {file.split('/')[-1]}** - "
                                    f"In: {in_deg}, Out: {out_deg}, "
                                    f"Centrality: {centrality:.3f}")
+                    
+                    if cycle_info['components']:
+                        st.subheader("Circular Dependencies")
+                        st.caption(f"{cycle_info['files_in_cycles']} files in "
+                                   f"{cycle_info['cyclic_component_count']} groups of mutually dependent files, "
+                                   f"with their shortest cycles")
+                        for component in cycle_info['components'][:10]:
+                            with st.expander(f"{component['size']} files"):
+                                for cycle in component['cycles']:
+                                    st.code(" -> ".join(node.split('/')[-1] for node in cycle), language=None)
+                                if not component['cycles']:
+                                    st.caption("Cycle search stopped at its time budget.")
+                        if len(cycle_info['components']) > 10:
+                            st.caption(f"... and {len(cycle_info['components']) - 10} more groups")
                 else:
                     st.info("No graph data available for analysis.")
         else:
@@ -724,18 +966,23 @@ if st.session_state.analysis_complete and st.session_state.analysis_data:
         st.subheader("Raw JSON Data")
         
         if show_full_json:
-            st.json(analysis_data)
+            st.json(list(analysis_data))
         else:
             st.info("Full JSON output is hidden. Enable it in the sidebar to view.")
         
-        # Download button
-        st.download_button(
-            label="Download Analysis JSON",
-            data=json.dumps(analysis_data, indent=2),
-            file_name=f"repo_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json",
-            use_container_width=True
-        )
+        # The JSON is only built once it's asked for, not whenever an analysis is opened
+        download_payload = st.session_state.download_payload
+        if download_payload is None or download_payload[0] != analysis_hash:
+            st.button("Prepare Analysis JSON for download", on_click=prepare_download,
+                      args=(analysis_hash, analysis_data), use_container_width=True)
+        else:
+            st.download_button(
+                label="Download Analysis JSON",
+                data=download_payload[1],
+                file_name=f"repo_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                use_container_width=True
+            )
 
 elif not st.session_state.analysis_complete:
     st.info("Enter a GitHub repository URL and click 'Run Analysis' to begin.")
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Cost of computing used_functions_from_dependencies_hints for a hub file that
+imports dozens of large modules: the old `func_name in content` loop versus
+one tokenising pass with set lookups.
+
+    python -m benchmarks.bench_dependency_hints [--modules 60] [--functions 300] [--repeat 3]
+"""
+import argparse
+import time
+
+from src.pipeline.file_processing import _used_dependency_functions
+
+
+def build_hub(module_count, function_count):
+    dependency_functions = [
+        (f"/repo/pkg/module_{m}.py", [f"get_{m}_{f}" if f % 3 else f"get_{m}" for f in range(function_count)])
+        for m in range(module_count)
+    ]
+    lines = [f"from pkg import module_{m}" for m in range(module_count)]
+    for m in range(module_count):
+        for f in range(0, function_count, 7):
+            lines += [
+                f"def call_{m}_{f}(value):",
+                f"    result = module_{m}.get_{m}_{f}(value)",
+                "    return [item for item in result if item is not None]",
+                "",
+            ]
+    return "\n".join(lines), dependency_functions
+
+
+def substring_hints(content, dependency_functions):
+    # What the hint pass did before: a substring search per name
+    return [
+        f"{dep_path.rsplit('/', 1)[-1]}:{func_name}"
+        for dep_path, func_names in dependency_functions
+        for func_name in func_names
+        if func_name in content
+    ]
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', type=int, default=60)
+    parser.add_argument('--functions', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    content, dependency_functions = build_hub(args.modules, args.functions)
+    name_count = sum(len(names) for _, names in dependency_functions)
+
+    substring_seconds = _best_of(args.repeat, lambda: substring_hints(content, dependency_functions))
+    token_seconds = _best_of(args.repeat, lambda: _used_dependency_functions(content, dependency_functions))
+
+    print(f"hub file: {len(content) / 1e6:.1f} MB, {args.modules} dependencies, {name_count} candidate names")
+    print(f"substring search: {substring_seconds * 1000:8.1f} ms, "
+          f"{len(substring_hints(content, dependency_functions))} hints (includes prefix matches)")
+    print(f"token lookup:     {token_seconds * 1000:8.1f} ms, "
+          f"{len(_used_dependency_functions(content, dependency_functions))} hints")
+    print(f"speedup: {substring_seconds / token_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
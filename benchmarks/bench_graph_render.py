@@ -0,0 +1,110 @@
+"""
+Server-side time to first paint of the interactive dependency graph: building
+the Plotly figure and serialising it to the JSON Streamlit sends to the
+browser. Compares the old path (Python lists appended per edge, a hover
+string per node, SVG go.Scatter) with graph_figures.dependency_figure
+(NumPy edge arrays, customdata hover templates, WebGL go.Scattergl). Browser
+rendering isn't included; WebGL is what keeps that part interactive.
+
+    python -m benchmarks.bench_graph_render [--files 8000] [--edges-per-file 3] [--repeat 3]
+"""
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from src.pipeline import graph_figures
+
+
+def build_graph(file_count, edges_per_file, seed=0):
+    undirected = nx.powerlaw_cluster_graph(file_count, edges_per_file, 0.3, seed=seed)
+    G = nx.DiGraph()
+    G.add_edges_from((f"src/pkg{a % 40}/module_{a}.py", f"src/pkg{b % 40}/module_{b}.py")
+                     for a, b in undirected.edges())
+    rng = np.random.default_rng(seed)
+    node_info = {
+        node: {
+            'lines_of_code': int(rng.integers(0, 800)),
+            'dependencies': G.out_degree(node),
+            'file_type': ['py', 'js', 'ts', 'tsx'][position % 4],
+        }
+        for position, node in enumerate(G.nodes())
+    }
+    positions = {node: rng.random(2) * 2 - 1 for node in G.nodes()}
+    return G, node_info, positions
+
+
+def list_based_figure(G, node_info, pos):
+    # What app.py did before: per-edge list appends and a hover string per node
+    node_x = [pos[node][0] for node in G.nodes()]
+    node_y = [pos[node][1] for node in G.nodes()]
+    edge_x = []
+    edge_y = []
+    for edge in G.edges():
+        x0, y0 = pos[edge[0]]
+        x1, y1 = pos[edge[1]]
+        edge_x.extend([x0, x1, None])
+        edge_y.extend([y0, y1, None])
+    file_types = list(set(node_info[node]['file_type'] for node in G.nodes()))
+    type_to_color = dict(zip(file_types, graph_figures.GRAY_SHADES))
+    hover_text = []
+    for node in G.nodes():
+        info = node_info[node]
+        hover_text.append(
+            f"<b>{node}</b><br>"
+            f"File Type: {info['file_type']}<br>"
+            f"Lines of Code: {info['lines_of_code']}<br>"
+            f"Dependencies: {info['dependencies']}<br>"
+            f"In-degree: {G.in_degree(node)}<br>"
+            f"Out-degree: {G.out_degree(node)}"
+        )
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=edge_x, y=edge_y, line=dict(width=1, color='#999999'), hoverinfo='none', mode='lines'))
+    fig.add_trace(go.Scatter(
+        x=node_x, y=node_y, mode='markers+text',
+        marker=dict(size=[max(10, min(50, node_info[node]['lines_of_code'] / 10)) for node in G.nodes()],
+                    color=[type_to_color[node_info[node]['file_type']] for node in G.nodes()]),
+        text=[node.split('/')[-1] for node in G.nodes()],
+        hovertext=hover_text, hoverinfo='text'
+    ))
+    return fig
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=8000)
+    parser.add_argument('--edges-per-file', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    G, node_info, positions = build_graph(args.files, args.edges_per_file)
+    print(f"graph: {G.number_of_nodes()} files, {G.number_of_edges()} dependencies")
+    paths = [
+        ("lists + go.Scatter", lambda: list_based_figure(G, node_info, positions)),
+        ("numpy + go.Scattergl", lambda: graph_figures.dependency_figure(G, node_info, positions)[0]),
+    ]
+    for label, build in paths:
+        build_seconds = _best_of(args.repeat, build)
+        fig = build()
+        serialize_seconds = _best_of(args.repeat, lambda: pio.to_json(fig, validate=False))
+        payload = len(pio.to_json(fig, validate=False))
+        print(f"{label:22s} build {build_seconds * 1000:7.1f} ms, serialize {serialize_seconds * 1000:7.1f} ms, "
+              f"first paint (server) {(build_seconds + serialize_seconds) * 1000:7.1f} ms, "
+              f"payload {payload / 1e6:5.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Throughput of the JS/TS function extractor on a large bundled file: the
+lexing pass on its own, and the full extraction.
+
+    python -m benchmarks.bench_js_extractor [--modules 2000] [--repeat 3] [--file bundle.js]
+"""
+import argparse
+import time
+
+from src.pipeline.js_extractor import extract_js_functions, lex
+
+
+def build_bundle(module_count):
+    # Shaped like a webpack/rollup bundle: many small modules, classes,
+    # arrows and braces hidden inside strings, templates, regexes and comments
+    parts = ["/* bundle { generated } */", "(function (modules) {"]
+    for m in range(module_count):
+        parts.append(f"""
+/***/ "./src/module{m}.js": /* {{ not code }} */
+/***/ (function (module, exports, require) {{
+  const helper{m} = (value) => value + "{{}}";
+  const format{m} = async (value, options = {{ pad: 2 }}) => {{
+    const text = `${{value}} }} ${{options.pad}}`;
+    return text.replace(/[{{}}]+/g, '');
+  }};
+  function update{m}(state, action) {{
+    switch (action.type) {{
+      case "open {{": return {{ ...state, open: true }};
+      default: return state;
+    }}
+  }}
+  class Store{m} extends Base {{
+    static create() {{ return new Store{m}(); }}
+    get size() {{ return this.items.length; }}
+    handle = (event) => {{ this.items.push(event); }};
+    render() {{
+      // a comment with an unbalanced brace {{
+      return helper{m}(this.items.map((item) => ({{ id: item.id }})));
+    }}
+  }}
+  module.exports = {{ helper{m}, format{m}, update{m}, Store{m} }};
+/***/ }}),""")
+    parts.append("});")
+    return "\n".join(parts)
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--file', help="benchmark a real bundle instead of the synthetic one")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            content = f.read()
+    else:
+        content = build_bundle(args.modules)
+    megabytes = len(content.encode('utf-8')) / 1e6
+
+    lex_seconds = _best_of(args.repeat, lambda: lex(content))
+    extract_seconds = _best_of(args.repeat, lambda: extract_js_functions(content))
+
+    print(f"bundle: {megabytes:.1f} MB, {content.count(chr(10)) + 1} lines")
+    print(f"lexer:     {megabytes / lex_seconds:6.1f} MB/s")
+    print(f"extractor: {megabytes / extract_seconds:6.1f} MB/s, {len(extract_js_functions(content))} functions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Dependency graph layout time by graph size: networkx's spring layout (what
+the dashboard used above 50 files) versus layout.multilevel_layout, on
+scale-free graphs shaped like large import graphs. The edge length ratio is
+the mean edge length over the mean distance between random node pairs;
+lower means connected files are drawn closer together.
+
+    python -m benchmarks.bench_layout [--sizes 1000 5000 20000] [--spring-max 2000]
+"""
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+
+from src.pipeline import layout
+
+
+def build_graph(node_count, seed=0):
+    G = nx.powerlaw_cluster_graph(node_count, 2, 0.3, seed=seed)
+    nodes = [f"src/module_{node}.py" for node in G.nodes()]
+    return nodes, [(nodes[a], nodes[b]) for a, b in G.edges()]
+
+
+def edge_length_ratio(positions, nodes, edges):
+    xy = np.array([positions[node] for node in nodes])
+    index = {node: i for i, node in enumerate(nodes)}
+    ends = np.array([[index[a], index[b]] for a, b in edges])
+    edge_length = np.linalg.norm(xy[ends[:, 0]] - xy[ends[:, 1]], axis=1).mean()
+    pairs = np.random.default_rng(0).integers(0, len(nodes), (20000, 2))
+    return edge_length / np.linalg.norm(xy[pairs[:, 0]] - xy[pairs[:, 1]], axis=1).mean()
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--spring-max', type=int, default=2000,
+                        help="Largest graph to also lay out with networkx's spring layout")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        nodes, edges = build_graph(size)
+        positions, seconds = _timed(lambda: layout.compute_layout(nodes, edges, "multilevel"))
+        line = (f"{size:6d} nodes {len(edges):6d} edges | multilevel {seconds:7.2f} s, "
+                f"ratio {edge_length_ratio(positions, nodes, edges):.3f}")
+        if size <= args.spring_max:
+            positions, seconds = _timed(lambda: layout.compute_layout(nodes, edges, "spring"))
+            line += f" | nx spring {seconds:7.2f} s, ratio {edge_length_ratio(positions, nodes, edges):.3f}"
+        print(line, flush=True)
+
+
+if __name__ == '__main__':
+    main()
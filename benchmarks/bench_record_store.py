@@ -0,0 +1,101 @@
+"""
+Opening an analysis in the dashboard: load_analysis on a JSON array (parse
+every record into one private list) against opening a .records store
+(memory-map it and read the offset table) and decoding one record, the way
+the Function Explorer shows a file. Memory is the growth of the process's
+anonymous (private) resident memory, from /proc/self/status on Linux;
+mapped file pages are shared through the page cache and not counted.
+
+    python -m benchmarks.bench_record_store [--files 20000] [--functions-per-file 10] [--repeat 3]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from src.pipeline import serialization
+
+
+def synthetic_records(file_count, functions_per_file):
+    body = "    total = 0\n    for item in items:\n        total += item.value\n    return total\n" * 4
+    for i in range(file_count):
+        yield {
+            "file_path": f"src/pkg{i % 50}/module_{i}.py",
+            "metadata": {"file_name": f"module_{i}.py", "file_type": "py", "file_size": 4096},
+            "language": "python",
+            "functions": [
+                {"name": f"func_{j}", "qualified_name": f"Handler{i}.func_{j}",
+                 "code": f"def func_{j}(items):\n{body}", "start_line": j * 20 + 1, "end_line": j * 20 + 18,
+                 "decorators": []}
+                for j in range(functions_per_file)
+            ],
+            "dependencies": [f"src/pkg{(i + 1) % 50}/module_{(i + 1) % file_count}.py"],
+            "used_functions_from_dependencies_hints": [],
+            "external_libraries": ["numpy"],
+        }
+
+
+def anonymous_memory():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _measure(label, open_records, repeat):
+    def open_and_show():
+        records = open_records()
+        return records, records[len(records) // 2]
+
+    seconds = _best_of(repeat, open_and_show)
+    gc.collect()
+    before = anonymous_memory()
+    records, _ = open_and_show()
+    after = anonymous_memory()
+    memory = f"{(after - before) / 1e6:8.1f} MB" if before is not None else "     n/a"
+    print(f"{label:28s} open + show one file {seconds * 1000:9.1f} ms, private memory {memory}")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--functions-per-file', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {}
+        for output_format in ('json', 'records'):
+            paths[output_format] = os.path.join(directory, "analysis" + serialization.output_extension(output_format))
+            start = time.perf_counter()
+            serialization.write_analysis(synthetic_records(args.files, args.functions_per_file),
+                                         paths[output_format], output_format)
+            print(f"write {output_format:8s} {time.perf_counter() - start:6.2f} s, "
+                  f"{os.path.getsize(paths[output_format]) / 1e6:7.1f} MB")
+
+        loaded = _measure("json: load_analysis", lambda: serialization.load_analysis(paths['json']), args.repeat)
+        del loaded
+        store = _measure("records: open_analysis", lambda: serialization.open_analysis(paths['records']), args.repeat)
+        iterate_seconds = _best_of(1, lambda: sum(1 for _ in store))
+        print(f"records: decode every record {iterate_seconds * 1000:9.1f} ms (once per process, for cached views)")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
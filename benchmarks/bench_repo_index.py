@@ -0,0 +1,103 @@
+"""
+Import resolution on a synthetic 50k-file tree: per-call path set (the old
+resolver behaviour) versus a RepoIndex built once per analysis.
+
+    python -m benchmarks.bench_repo_index [--files 50000] [--imports 2000]
+"""
+import argparse
+import os
+import random
+import time
+
+from src.pipeline.file_processing import _resolve_js_ts_jsx_tsx_path, _resolve_python_import_path
+from src.pipeline.repo_index import RepoIndex
+
+REPO_ROOT = os.path.abspath(os.sep + os.path.join('synthetic', 'repo'))
+
+
+def build_synthetic_paths(file_count, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(file_count):
+        depth = rng.randint(1, 4)
+        dirs = [f"pkg{rng.randint(0, 30)}" for _ in range(depth)]
+        extension = '.py' if i % 2 == 0 else rng.choice(['.js', '.ts', '.tsx'])
+        paths.append(os.path.join(REPO_ROOT, *dirs, f"mod{i}{extension}"))
+    return paths
+
+
+def build_imports(paths, import_count, seed=1):
+    rng = random.Random(seed)
+    imports = []
+    for _ in range(import_count):
+        source = rng.choice(paths)
+        target = rng.choice(paths)
+        stem, extension = os.path.splitext(os.path.relpath(target, REPO_ROOT))
+        if extension == '.py':
+            imports.append(('python', REPO_ROOT, stem.replace(os.sep, '.')))
+        else:
+            relative = os.path.relpath(os.path.join(REPO_ROOT, stem), os.path.dirname(source))
+            if not relative.startswith('.'):
+                relative = './' + relative
+            imports.append(('js', os.path.dirname(source), relative))
+    return imports
+
+
+def _legacy_resolve(kind, base_path, module, all_repo_files):
+    # Mirrors the previous resolvers, which rebuilt the path set on every call
+    all_repo_files_set = set(all_repo_files)
+    if kind == 'python':
+        module_path = module.replace('.', os.sep)
+        current_base = base_path
+        while current_base and current_base != os.path.dirname(current_base):
+            for path in [os.path.join(current_base, module_path + '.py'),
+                         os.path.join(current_base, module_path, '__init__.py')]:
+                if os.path.normpath(path) in all_repo_files_set:
+                    return os.path.normpath(path)
+            current_base = os.path.dirname(current_base)
+        return None
+    base_candidate = os.path.join(base_path, module)
+    for ext in ['', '.js', '.ts', '.tsx', '.jsx', '/index.js', '/index.ts', '/index.jsx', '/index.tsx']:
+        candidate = os.path.normpath(base_candidate + ext)
+        if candidate in all_repo_files_set:
+            return candidate
+    return None
+
+
+def _indexed_resolve(kind, base_path, module, repo_index):
+    if kind == 'python':
+        return _resolve_python_import_path(base_path, module, repo_index)
+    return _resolve_js_ts_jsx_tsx_path(base_path, module, repo_index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--imports', type=int, default=2000)
+    args = parser.parse_args()
+
+    paths = build_synthetic_paths(args.files)
+    imports = build_imports(paths, args.imports)
+
+    start = time.perf_counter()
+    legacy_results = [_legacy_resolve(kind, base, module, paths) for kind, base, module in imports]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    repo_index = RepoIndex(paths, REPO_ROOT)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed_results = [_indexed_resolve(kind, base, module, repo_index) for kind, base, module in imports]
+    indexed_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy_results, indexed_results) if a != b)
+    print(f"files: {args.files}, imports resolved: {len(imports)}, mismatches: {mismatches}")
+    print(f"legacy (set per call): {legacy_seconds:.3f}s")
+    print(f"RepoIndex build:       {build_seconds:.3f}s")
+    print(f"RepoIndex lookups:     {indexed_seconds:.4f}s")
+    print(f"speedup (incl. build): {legacy_seconds / (build_seconds + indexed_seconds):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-file cost of the separate import, external-import and function scans
+versus one combined scan_source pass.
+
+    python -m benchmarks.bench_scanner [--files 300] [--functions 40]
+"""
+import argparse
+import random
+import time
+
+from src.pipeline.file_processing import (
+    _resolve_dependency_specs, _resolve_external_import_specs,
+    extract_function_definitions_with_code, find_dependencies, find_external_imports
+)
+from src.pipeline.repo_index import RepoIndex
+from src.pipeline.scanner import scan_source
+
+
+def build_python_file(function_count, rng):
+    lines = ["import os, sys", "from .models import User", "from pkg.util import helper  # local", ""]
+    for i in range(function_count):
+        lines += [f"def func_{i}(a, b):", f"    # step {i}", "    total = a + b",
+                  "    for x in range(total):", "        total += helper(x)", "    return total", ""]
+        if rng.random() < 0.2:
+            lines += ["import json", ""]
+    return "\n".join(lines)
+
+
+def build_js_file(function_count, rng):
+    lines = ["import React from 'react';", "import { helper } from './util';", "const fs = require('fs');", ""]
+    for i in range(function_count):
+        lines += [f"export function func{i}(a, b) {{", "  let total = a + b;",
+                  "  for (let x = 0; x < total; x++) { total += helper(x); }", "  return total;", "}", ""]
+        if rng.random() < 0.2:
+            lines += [f"const arrow{i} = (x) => x * {i};", ""]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=300)
+    parser.add_argument('--functions', type=int, default=40)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    samples = []
+    for i in range(args.files):
+        if i % 2 == 0:
+            samples.append((f"/repo/pkg/mod{i}.py", "python", build_python_file(args.functions, rng)))
+        else:
+            samples.append((f"/repo/web/mod{i}.js", "javascript", build_js_file(args.functions, rng)))
+    repo_index = RepoIndex([path for path, _, _ in samples], "/repo")
+
+    start = time.perf_counter()
+    for path, language, content in samples:
+        extract_function_definitions_with_code(content, language)
+        find_dependencies(content, path, repo_index)
+        find_external_imports(content, path, repo_index)
+    separate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for path, language, content in samples:
+        scan = scan_source(content, language)
+        _resolve_dependency_specs(scan["dependency_specs"], path, repo_index)
+        _resolve_external_import_specs(scan["external_specs"], path, repo_index)
+    combined_seconds = time.perf_counter() - start
+
+    total_bytes = sum(len(content) for _, _, content in samples)
+    print(f"files: {len(samples)}, {total_bytes / 1e6:.1f} MB")
+    print(f"three scans:   {separate_seconds * 1e3 / len(samples):.3f} ms/file")
+    print(f"combined scan: {combined_seconds * 1e3 / len(samples):.3f} ms/file")
+    print(f"reduction:     {(1 - combined_seconds / separate_seconds) * 100:.0f}%")
+
+
+if __name__ == '__main__':
+    main()
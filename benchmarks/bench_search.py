@@ -0,0 +1,103 @@
+"""
+Repository-wide function search in the Function Explorer: search_index's
+token-prefix lookup against a linear substring scan over every function
+(what filtering each file's functions does when applied to the whole
+repository). Also reports building, saving and loading the index.
+
+    python -m benchmarks.bench_search [--functions 500000] [--functions-per-file 20] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.pipeline import search_index
+
+VERBS = ["get", "set", "parse", "load", "save", "build", "update", "handle", "render", "validate",
+         "fetch", "create", "delete", "compute", "resolve", "format", "read", "write", "init", "check"]
+NOUNS = ["user", "config", "request", "response", "token", "session", "file", "node", "graph", "cache",
+         "item", "order", "payment", "message", "event", "layout", "index", "record", "query", "result",
+         "account", "profile", "http", "json", "schema", "report", "batch", "widget", "stream", "buffer"]
+QUERIES = ["get", "parse config", "handleHttpRequest", "user", "val sch", "zzz_missing"]
+
+
+def synthetic_names(function_count, functions_per_file, seed=0):
+    rng = np.random.default_rng(seed)
+    verbs = rng.integers(0, len(VERBS), function_count)
+    first = rng.integers(0, len(NOUNS), function_count)
+    second = rng.integers(0, len(NOUNS), function_count)
+    styles = rng.integers(0, 3, function_count)
+    file_count = -(-function_count // functions_per_file)
+    file_paths = [f"src/pkg{i % 50}/module_{i}.py" for i in range(file_count)]
+    function_names = [[] for _ in range(file_count)]
+    for i in range(function_count):
+        verb, a, b = VERBS[verbs[i]], NOUNS[first[i]], NOUNS[second[i]]
+        if styles[i] == 0:
+            name = f"{verb}_{a}_{b}_{i}"
+        elif styles[i] == 1:
+            name = f"{verb}{a.capitalize()}{b.capitalize()}{i}"
+        else:
+            name = f"{a.capitalize()}Service.{verb}{b.capitalize()}"
+        function_names[i // functions_per_file].append(name)
+    return file_paths, function_names
+
+
+def linear_search(function_names, query, limit):
+    # Substring match of every function name, the way the per-file filter works
+    query = query.lower()
+    matches = []
+    for record_index, names in enumerate(function_names):
+        for position, name in enumerate(names):
+            if query in name.lower():
+                matches.append((record_index, position, name))
+    return matches[:limit]
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--functions', type=int, default=500000)
+    parser.add_argument('--functions-per-file', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    file_paths, function_names = synthetic_names(args.functions, args.functions_per_file)
+    print(f"repository: {len(file_paths)} files, {args.functions} functions")
+
+    start = time.perf_counter()
+    arrays = search_index.build_search_index(file_paths, function_names)
+    print(f"build index {time.perf_counter() - start:7.2f} s ({len(arrays['posting_offsets']) - 1} tokens, "
+          f"{len(arrays['postings'])} postings)")
+    with tempfile.TemporaryDirectory() as directory:
+        analysis_path = os.path.join(directory, "analysis.json")
+        start = time.perf_counter()
+        index_path = search_index.write_search_index(analysis_path, file_paths, function_names)
+        print(f"write index {time.perf_counter() - start:7.2f} s ({os.path.getsize(index_path) / 1e6:.1f} MB)")
+        start = time.perf_counter()
+        index = search_index.load_search_index(analysis_path)
+        print(f"load index  {time.perf_counter() - start:7.2f} s")
+
+    lookup_path = file_paths[len(file_paths) // 2]
+    lookup_seconds = _best_of(args.repeat, lambda: index.record_index(lookup_path))
+    print(f"file lookup {lookup_seconds * 1e6:7.2f} us")
+
+    for query in QUERIES:
+        index_seconds = _best_of(args.repeat, lambda: index.search(query))
+        linear_seconds = _best_of(1, lambda: linear_search(function_names, query, search_index.DEFAULT_SEARCH_LIMIT))
+        print(f"{query!r:22s} index {index_seconds * 1000:7.2f} ms, linear scan {linear_seconds * 1000:8.1f} ms, "
+              f"{len(index.search(query))} results shown")
+
+
+if __name__ == '__main__':
+    main()
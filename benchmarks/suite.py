@@ -0,0 +1,215 @@
+"""
+Benchmark suite: times each pipeline stage on a synthetic repository (see
+synthetic_repo) and compares the results with a stored baseline, flagging
+cases that got slower than the threshold allows.
+
+Cases: discover (discover_and_filter_files), extract_python
+(python_extractor.parse_python_source on every .py file), extract_js
+(js_extractor.extract_js_functions on every JS/TS file), find_dependencies,
+hints (the used-function hint pass) and end_to_end
+(process_repository_for_json, no result cache). Each is the best of
+--repeat runs.
+
+Timings are machine-specific, so no baseline is committed: record one
+locally before changing code, then compare against it. The baseline
+(benchmarks/baseline.json by default, ignored by git) records the host and
+the repository spec and digest with the timings; it is only compared
+against runs on the same host and repository.
+
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite [--baseline benchmarks/baseline.json] [--threshold 0.25] [--case discover ...]
+        [--output results.json] [--repeat 5] [--files 400] [--js-fraction 0.4] [--imports-per-file 4] ...
+
+Exits with status 1 if any case regressed.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic_repo
+from src.pipeline import file_processing
+from src.pipeline.js_extractor import extract_js_functions
+from src.pipeline.python_extractor import parse_python_source
+from src.pipeline.repo_index import RepoIndex
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+SUITE_VERSION = 1
+
+
+def prepare(root):
+    """Inputs shared by the cases: the discovered files, their contents and each file's dependency functions."""
+    files = sorted(file_processing.discover_and_filter_files(root))
+    contents = {path: file_processing.read_file_content(path) for path in files}
+    repo_index = RepoIndex(files, root)
+    functions = {}
+    dependencies = {}
+    for path in files:
+        language = file_processing.detect_programming_language(contents[path], os.path.splitext(path)[1])
+        functions[path] = [func["name"] for func in
+                           file_processing.extract_function_definitions_with_code(contents[path], language)]
+        dependencies[path] = file_processing.find_dependencies(contents[path], path, repo_index)
+    dependency_functions = {
+        path: [(dep, functions[dep]) for dep in dependencies[path] if functions.get(dep)] for path in files
+    }
+    return {
+        "root": root,
+        "files": files,
+        "contents": contents,
+        "repo_index": repo_index,
+        "dependency_functions": dependency_functions,
+    }
+
+
+def _python_files(context):
+    return [path for path in context["files"] if path.endswith(".py")]
+
+
+def _js_files(context):
+    return [path for path in context["files"] if not path.endswith(".py")]
+
+
+def case_discover(context):
+    file_processing.discover_and_filter_files(context["root"])
+
+
+def case_extract_python(context):
+    for path in _python_files(context):
+        parse_python_source(context["contents"][path])
+
+
+def case_extract_js(context):
+    for path in _js_files(context):
+        extract_js_functions(context["contents"][path])
+
+
+def case_find_dependencies(context):
+    for path in context["files"]:
+        file_processing.find_dependencies(context["contents"][path], path, context["repo_index"])
+
+
+def case_hints(context):
+    for path in context["files"]:
+        if context["dependency_functions"][path]:
+            file_processing._used_dependency_functions(context["contents"][path], context["dependency_functions"][path])
+
+
+def case_end_to_end(context):
+    file_processing.process_repository_for_json(context["root"])
+
+
+CASES = {
+    "discover": case_discover,
+    "extract_python": case_extract_python,
+    "extract_js": case_extract_js,
+    "find_dependencies": case_find_dependencies,
+    "hints": case_hints,
+    "end_to_end": case_end_to_end,
+}
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_suite(spec, case_names, repeat):
+    with tempfile.TemporaryDirectory() as root:
+        spec = synthetic_repo.generate_repository(root, **spec)
+        digest = synthetic_repo.repository_digest(root)
+        context = prepare(root)
+        cases = {}
+        for name in case_names:
+            cases[name] = {"seconds": round(_best_of(repeat, lambda: CASES[name](context)), 6)}
+            print(f"{name:18s} {cases[name]['seconds'] * 1000:9.1f} ms")
+    return {
+        "version": SUITE_VERSION,
+        "spec": spec,
+        "digest": digest,
+        "files": len(context["files"]),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    [(case, baseline seconds, seconds, ratio, regressed)] for the cases in
+    both runs; a case regressed if it is more than threshold slower.
+    """
+    rows = []
+    for name, case in results["cases"].items():
+        if name not in baseline["cases"]:
+            continue
+        before = baseline["cases"][name]["seconds"]
+        ratio = case["seconds"] / before if before else float("inf")
+        rows.append((name, before, case["seconds"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    synthetic_repo.add_spec_arguments(parser)
+    parser.add_argument('--case', action='append', choices=list(CASES),
+                        help="Run only this case (repeatable); default all")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown before a case is flagged, as a fraction (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Record this run as this machine's baseline (not committed)")
+    parser.add_argument('--output', help="Also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    results = run_suite(synthetic_repo.spec_from_args(args), args.case or list(CASES), args.repeat)
+    print(f"repository: {results['files']} files, digest {results['digest']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        print(f"No baseline at {args.baseline}; record one with --save-baseline")
+        return
+    if baseline.get("version") != SUITE_VERSION or baseline.get("digest") != results["digest"]:
+        print("The baseline was recorded on a different synthetic repository (spec, seed or generator); "
+              "re-record it with --save-baseline")
+        return
+    if baseline.get("host") != results["host"]:
+        print(f"The baseline was recorded on another machine ({baseline.get('host')}); "
+              "re-record it here with --save-baseline")
+        return
+
+    print(f"\nAgainst {args.baseline} (Python {baseline['python']}, threshold +{args.threshold:.0%}):")
+    regressions = 0
+    for name, before, after, ratio, regressed in compare(results, baseline, args.threshold):
+        flag = "REGRESSION" if regressed else ("faster" if ratio < 1 - args.threshold else "ok")
+        print(f"  {name:18s} {before * 1000:9.1f} ms -> {after * 1000:9.1f} ms  x{ratio:5.2f}  {flag}")
+        regressions += regressed
+    if regressions:
+        print(f"{regressions} case(s) regressed")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Deterministic synthetic repositories for the benchmark suite. The same
+options and seed always produce byte-identical files, so timings from
+different runs (and the stored baseline) measure the same input.
+
+Python modules live in packages pkg<N>/ and JS/TS modules in web/comp<N>/.
+Each file imports imports_per_file earlier files of its language (plus an
+external library or two) and calls some of their functions, so dependency
+resolution and the hint pass have real work. A node_modules tree and a
+.gitignore'd directory give discovery something to prune.
+
+    python -m benchmarks.synthetic_repo OUTPUT_DIR [--files 400] [--js-fraction 0.4] [--imports-per-file 4]
+        [--functions-per-file 12] [--lines-per-function 8] [--seed 0]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+
+DEFAULT_SPEC = {
+    "files": 400,
+    "js_fraction": 0.4,
+    "imports_per_file": 4,
+    "functions_per_file": 12,
+    "lines_per_function": 8,
+    "packages": 8,
+    "seed": 0,
+}
+PYTHON_EXTERNALS = ["os", "json", "numpy", "requests"]
+JS_EXTERNALS = ["react", "lodash", "axios"]
+
+
+def _python_module(index, imports, spec, rng):
+    lines = [f"import {rng.choice(PYTHON_EXTERNALS)}"]
+    called = []
+    for target, target_index in imports:
+        function = f"func_{target_index}_{rng.randrange(spec['functions_per_file'])}"
+        lines.append(f"from {target[:-3].replace('/', '.')} import {function}")
+        called.append(function)
+    lines.append("")
+    # Every third function is a method, so the extractor sees classes as well
+    lines += [f"class Service{index}:", f'    """Service {index}."""', ""]
+    for f in range(0, spec["functions_per_file"], 3):
+        lines.append(f"    def func_{index}_{f}(self, value):")
+        lines += _python_body("    ", f, called, spec)
+    for f in range(spec["functions_per_file"]):
+        if f % 3:
+            lines += ["", f"def func_{index}_{f}(value):"]
+            lines += _python_body("", f, called, spec)
+    return "\n".join(lines)
+
+
+def _python_body(indent, f, called, spec):
+    lines = []
+    for line in range(spec["lines_per_function"] - 2):
+        if called and line % 3 == 0:
+            lines.append(f"{indent}    value = {called[(f + line) % len(called)]}(value)")
+        else:
+            lines.append(f"{indent}    value = [item * {line} for item in range(value or {f + 1})]")
+    return lines + [f"{indent}    return value", ""]
+
+
+def _js_module(index, path, imports, spec, rng):
+    directory = os.path.dirname(path)
+    external = rng.choice(JS_EXTERNALS)
+    lines = [f"import {external.capitalize()} from '{external}';"]
+    called = []
+    for target, target_index in imports:
+        function = f"func{target_index}x{rng.randrange(spec['functions_per_file'])}"
+        relative = os.path.relpath(os.path.splitext(target)[0], directory).replace(os.sep, "/")
+        if not relative.startswith("."):
+            relative = "./" + relative
+        lines.append(f"import {{ {function} }} from '{relative}';")
+        called.append(function)
+    lines.append("")
+    lines.append(f"export class Component{index} {{")
+    for f in range(0, spec["functions_per_file"], 3):
+        lines.append(f"  func{index}x{f}(value) {{")
+        lines += [f"    value = value + {line};" for line in range(spec["lines_per_function"] - 2)]
+        lines += ["    return value;", "  }"]
+    lines += ["}", ""]
+    for f in range(spec["functions_per_file"]):
+        if f % 3 == 0:
+            continue
+        if f % 3 == 1:
+            lines.append(f"export function func{index}x{f}(value) {{")
+        else:
+            lines.append(f"export const func{index}x{f} = (value) => {{")
+        for line in range(spec["lines_per_function"] - 2):
+            if called and line % 3 == 0:
+                lines.append(f"  value = {called[(f + line) % len(called)]}(value);")
+            else:
+                lines.append(f"  value = [value, {line}].length;")
+        lines += ["  return value;", "}" if f % 3 == 1 else "};", ""]
+    return "\n".join(lines)
+
+
+def generate_repository(root, **options):
+    """
+    Writes a synthetic repository under root. options override DEFAULT_SPEC
+    (files, js_fraction, imports_per_file, functions_per_file,
+    lines_per_function, packages, seed). Returns the spec used.
+    """
+    spec = dict(DEFAULT_SPEC, **options)
+    rng = random.Random(spec["seed"])
+    modules = {"python": [], "js": []}
+
+    for index in range(spec["files"]):
+        package = index % spec["packages"]
+        language = "js" if rng.random() < spec["js_fraction"] else "python"
+        if language == "python":
+            path = f"pkg{package}/module_{index}.py"
+        else:
+            path = f"web/comp{package}/comp_{index}{'.ts' if index % 4 == 0 else '.js'}"
+        earlier = modules[language]
+        imports = rng.sample(earlier, min(spec["imports_per_file"], len(earlier)))
+        if language == "python":
+            content = _python_module(index, imports, spec, rng)
+        else:
+            content = _js_module(index, path, imports, spec, rng)
+        _write(root, path, content)
+        earlier.append((path, index))
+
+    for package in range(spec["packages"]):
+        _write(root, f"pkg{package}/__init__.py", "")
+    # Discovery should prune these without reading them
+    for index in range(max(1, spec["files"] // 20)):
+        _write(root, f"node_modules/lib{index}/index.js", f"module.exports = function lib{index}() {{}};\n")
+        _write(root, f"generated/gen_{index}.py", f"def generated_{index}():\n    return {index}\n")
+    _write(root, ".gitignore", "generated/\n")
+    return spec
+
+
+def _write(root, path, content):
+    full_path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(content)
+
+
+def repository_digest(root):
+    """Digest of every file path and content under root, to check two generated repositories are identical."""
+    digest = hashlib.blake2b(digest_size=16)
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        for file_name in sorted(files):
+            full_path = os.path.join(directory, file_name)
+            digest.update(os.path.relpath(full_path, root).replace(os.sep, "/").encode("utf-8") + b"\0")
+            with open(full_path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def add_spec_arguments(parser):
+    parser.add_argument('--files', type=int, default=DEFAULT_SPEC["files"])
+    parser.add_argument('--js-fraction', type=float, default=DEFAULT_SPEC["js_fraction"])
+    parser.add_argument('--imports-per-file', type=int, default=DEFAULT_SPEC["imports_per_file"])
+    parser.add_argument('--functions-per-file', type=int, default=DEFAULT_SPEC["functions_per_file"])
+    parser.add_argument('--lines-per-function', type=int, default=DEFAULT_SPEC["lines_per_function"])
+    parser.add_argument('--seed', type=int, default=DEFAULT_SPEC["seed"])
+
+
+def spec_from_args(args):
+    return {key: getattr(args, key) for key in DEFAULT_SPEC if hasattr(args, key)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output_dir')
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    spec = generate_repository(args.output_dir, **spec_from_args(args))
+    print(json.dumps(spec))
+    print(f"digest: {repository_digest(args.output_dir)}")
+
+
+if __name__ == '__main__':
+    main()
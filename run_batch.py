@@ -0,0 +1,65 @@
+import os
+import argparse
+from src.pipeline import batch
+from src.pipeline import result_cache
+from src.pipeline import serialization
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Analyze many repositories without prompting. Each target is a repository URL, "
+                    "a local checkout or bare repository, or a text file listing targets one per line."
+    )
+    parser.add_argument("targets", nargs="+", help="Repository URLs, local paths or files of targets")
+    parser.add_argument("--output-dir", default=batch.BATCH_OUTPUT_DIR,
+                        help="Where the per-repository outputs and run_manifest.json are written")
+    parser.add_argument("--format", choices=serialization.OUTPUT_FORMATS, default="json",
+                        help="Output format of each repository's analysis")
+    parser.add_argument("--clone-workers", type=int, default=4,
+                        help="Concurrent clones")
+    parser.add_argument("--analysis-workers", type=int, default=0,
+                        help="Concurrent analysis processes (0 = one per CPU core)")
+    parser.add_argument("--max-in-flight", type=int, default=0,
+                        help="Repositories cloned or being analyzed at once (0 = clone + analysis workers)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Retries per stage before a repository is marked failed")
+    parser.add_argument("--cache-path", default=result_cache.DEFAULT_CACHE_PATH,
+                        help="SQLite cache of per-file results, shared by all analyses")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-analyze every file instead of reusing cached results")
+    parser.add_argument("--no-clone-cache", action="store_true",
+                        help="Clone into a scratch directory that is deleted after analysis")
+    parser.add_argument("--no-checkout", action="store_true",
+                        help="Bare-clone and analyze straight from the git object database")
+    parser.add_argument("--lazy-code", action="store_true",
+                        help="Store function bodies in output/blob_store and only references in the outputs")
+    parser.add_argument("--layout", action="store_true",
+                        help="Precompute each dependency graph layout for the dashboard")
+    parser.add_argument("--profile", action="store_true",
+                        help="Save cProfile stats of each pipeline stage next to each analysis")
+    args = parser.parse_args()
+
+    targets = []
+    for target in args.targets:
+        if os.path.isfile(target):
+            targets.extend(batch.read_targets(target))
+        else:
+            targets.append(target)
+
+    manifest = batch.run_batch(
+        targets,
+        output_dir=args.output_dir,
+        output_format=args.format,
+        clone_workers=args.clone_workers,
+        analysis_workers=args.analysis_workers or None,
+        max_in_flight=args.max_in_flight or None,
+        retries=args.retries,
+        cache_path=None if args.no_cache else args.cache_path,
+        use_clone_cache=not args.no_clone_cache,
+        checkout=not args.no_checkout,
+        lazy_code=args.lazy_code,
+        precompute_layout=args.layout,
+        profile=args.profile,
+    )
+    print(f"\n--- Batch finished: {manifest['succeeded']} succeeded, {manifest['failed']} failed "
+          f"in {manifest['wall_seconds']}s ---")
+    print(f"Manifest: {os.path.join(args.output_dir, batch.MANIFEST_NAME)}")
@@ -1,20 +1,54 @@
 # main_pipeline.py
 import os
-import json
+import sys
+import argparse
 from src.pipeline import cloner         
 from src.pipeline import file_processing 
+from src.pipeline import serialization
+from src.pipeline import result_cache
+from src.pipeline import git_objects
+from src.pipeline import function_bodies
+from src.pipeline import layout
+from src.pipeline import cycles
+from src.pipeline import aggregation
+from src.pipeline import search_index
+from src.pipeline import metrics
 import shutil
+from contextlib import ExitStack
 from datetime import datetime
 
-def run_pipeline():
+def run_pipeline(workers=1, output_format="json", cache_path=result_cache.DEFAULT_CACHE_PATH, use_clone_cache=True,
+                 checkout=True, discovery_options=None, lazy_code=False, precompute_layout=False, profile=False):
     """
     Orchestrates the entire process:
     1. Prompts the user for a GitHub repository URL.
     2. Clones the repository.
     3. Analyzes the cloned repository.
-    4. Saves the analysis results as JSON file.
+    4. Saves the analysis results as JSON file, with a report of circular
+       dependencies (<analysis name>.cycles.json) and package/directory-level
+       dependency graphs (<analysis name>.hierarchy.json) next to it.
     5. Prints the analysis results.
     6. Cleans up the cloned repository (based on user preference).
+
+    Returns the path of the saved analysis, or None if the run failed.
+
+    workers > 1 runs the per-file analysis stage on a process pool.
+    output_format is "json" (array), "jsonl" (one record per line), "npz"
+    (columnar tables, see columnar.write_columnar) or "records" (a
+    memory-mappable record store, see record_store.write_record_store).
+    cache_path is the SQLite per-file result cache; None disables it.
+    use_clone_cache reuses and refreshes clones kept in output/clone_cache.
+    checkout=False makes a bare clone and reads files from the git object database.
+    discovery_options are passed to file_processing.discover_and_filter_files.
+    lazy_code stores function bodies in output/blob_store and only references
+    to them in the output (see function_bodies).
+    precompute_layout lays out the dependency graph into output/layout_cache,
+    where the dashboard reads it instead of computing it.
+    Stage timings, the slowest files, counters and the process's peak RSS are
+    saved next to the analysis as <analysis name>.metrics.json (see
+    metrics.PipelineMetrics).
+    profile also runs each stage under cProfile and saves its stats as
+    <analysis name>.profile.<stage>.prof.
     """
     github_url = input("Enter the GitHub repository URL (e.g., https://github.com/username/repo): ").strip()
     
@@ -22,56 +56,99 @@ def run_pipeline():
     save = not (save_input in ['n', 'no', 'false', '0'])
     
     cloned_repo_path = None
+    analysis_path = None
+    pipeline_metrics = metrics.PipelineMetrics(profile=profile)
+    # Keeps a cached clone locked against refresh and eviction until the analysis is done
+    held_clone = ExitStack()
     try:
         # Step 1 & 2: Clone the repository
         print(f"\n--- Attempting to clone repository: {github_url} ---")
-        cloned_repo_path = cloner.process_repo_clone(github_url)
+        with pipeline_metrics.stage('clone'):
+            cloned_repo_path = held_clone.enter_context(
+                cloner.process_repo_clone(github_url, use_cache=use_clone_cache, checkout=checkout)
+            )
 
         if cloned_repo_path:
             print(f"\n--- Successfully cloned to: {cloned_repo_path} ---")
             
-            # Step 3: Analyze the cloned repository
+            # Step 3 & 4: Analyze the cloned repository, streaming records to the output file
             print("\n--- Starting repository analysis ---")
-            analysis_json = file_processing.process_repository_for_json(cloned_repo_path)
-            
-            # Step 4: Save analysis results to JSON file
             repo_name = os.path.basename(github_url.rstrip('/').replace('.git', ''))
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"{repo_name}_analysis_{timestamp}.json"
+            output_filename = f"{repo_name}_analysis_{timestamp}{serialization.output_extension(output_format)}"
             
             # Create output directory if it doesn't exist
             output_dir = "analysis_results"
             os.makedirs(output_dir, exist_ok=True)
             output_path = os.path.join(output_dir, output_filename)
             
-            # Write JSON to file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(analysis_json)
+            cache = result_cache.ResultCache(cache_path) if cache_path else None
+            blob_store = function_bodies.BlobStore() if lazy_code else None
+            try:
+                if checkout:
+                    source = file_processing.WorkingTreeSource(cloned_repo_path, **(discovery_options or {}))
+                    file_records = file_processing.iter_repository_records(
+                        cloned_repo_path, workers=workers, result_cache=cache, source=source,
+                        lazy_code=lazy_code, blob_store=blob_store, metrics=pipeline_metrics
+                    )
+                else:
+                    file_records = git_objects.iter_git_tree_records(
+                        cloned_repo_path, workers=workers, result_cache=cache,
+                        lazy_code=lazy_code, blob_store=blob_store, metrics=pipeline_metrics,
+                        max_file_size=(discovery_options or {}).get("max_file_size",
+                                                                     file_processing.DEFAULT_MAX_FILE_SIZE)
+                    )
+                # Time not claimed by an inner stage is spent writing the output
+                with pipeline_metrics.stage('serialize'):
+                    summary = serialization.write_analysis(file_records, output_path, output_format)
+            finally:
+                if cache is not None:
+                    cache.close()
             
+            with pipeline_metrics.stage('cycles'):
+                cycle_report = cycles.analyze_dependency_cycles(summary.dependency_edges)
+                serialization.write_sidecar(output_path, 'cycles', cycle_report)
+            with pipeline_metrics.stage('hierarchy'):
+                serialization.write_sidecar(output_path, 'hierarchy', aggregation.hierarchy_report(
+                    summary.file_paths, summary.dependency_edges
+                ))
+            with pipeline_metrics.stage('search_index'):
+                search_index.write_search_index(output_path, summary.file_paths, summary.function_names)
             print(f"\n--- Analysis saved to: {output_path} ---")
+            analysis_path = output_path
+            
+            if precompute_layout:
+                with pipeline_metrics.stage('layout'):
+                    positions = layout.precompute_layout(output_path)
+                print(f"--- Dependency graph layout ({len(positions)} files) saved to: {layout.LAYOUT_CACHE_DIR} ---")
+            
+            metrics_report = pipeline_metrics.write(output_path)
+            print(f"--- Metrics saved to: {serialization.sidecar_path(output_path, 'metrics')} ---")
+            if profile:
+                for profile_path in pipeline_metrics.dump_profiles(output_path):
+                    print(f"--- Profile saved to: {profile_path} (python -m pstats {profile_path}) ---")
             
             # Step 5: Print summary statistics
             print("\n--- Analysis Summary ---")
-            analysis_data = json.loads(analysis_json)
-            print(f"Total files analyzed: {len(analysis_data)}")
-            
-            total_functions = sum(len(file_data.get('functions', [])) for file_data in analysis_data)
-            print(f"Total functions found: {total_functions}")
+            print(f"Total files analyzed: {summary.total_files}")
+            print(f"Total functions found: {summary.total_functions}")
+            print(f"Time by stage: {metrics.format_stage_times(metrics_report)}")
+            if cycle_report["cyclic_component_count"]:
+                print(f"Circular dependency groups: {cycle_report['cyclic_component_count']} "
+                      f"({cycle_report['files_in_cycles']} files, largest {cycle_report['component_sizes'][0]})")
             
-            # Count files by language
-            language_counts = {}
-            for file_data in analysis_data:
-                lang = file_data.get('language', 'Unknown')
-                language_counts[lang] = language_counts.get(lang, 0) + 1
+            if checkout and any(source.discovery_stats.values()):
+                print("\nSkipped during discovery:")
+                for reason, count in source.discovery_stats.items():
+                    if count:
+                        print(f"  {reason.replace('_', ' ')}: {count}")
             
             print("\nFiles by language:")
-            for lang, count in sorted(language_counts.items()):
+            for lang, count in sorted(summary.language_counts.items()):
                 print(f"  {lang}: {count}")
             
             # Print external libraries summary
-            all_external_libs = set()
-            for file_data in analysis_data:
-                all_external_libs.update(file_data.get('external_libraries', []))
+            all_external_libs = summary.external_libraries
             
             if all_external_libs:
                 print(f"\nExternal libraries used: {len(all_external_libs)}")
@@ -83,7 +160,12 @@ def run_pipeline():
             show_full = input("\nDo you want to see the full JSON output in console? [y/N]: ").strip().lower()
             if show_full in ['y', 'yes']:
                 print("\n--- Full Analysis Results (JSON Output) ---")
-                print(analysis_json)
+                if output_format in ('npz', 'records'):
+                    serialization.write_json_array(serialization.iter_analysis(output_path), sys.stdout)
+                else:
+                    with open(output_path, 'r', encoding='utf-8') as f:
+                        shutil.copyfileobj(f, sys.stdout)
+                print()
             else:
                 print(f"\nFull analysis is available in: {output_path}")
                 
@@ -95,8 +177,11 @@ def run_pipeline():
         import traceback
         traceback.print_exc()
     finally:
+        held_clone.close()
         # Step 6: Clean up the cloned repository (based on user choice)
-        if cloned_repo_path and os.path.exists(cloned_repo_path):
+        if cloned_repo_path and cloner.is_cached_clone(cloned_repo_path):
+            print(f"\n--- Repository kept in clone cache at: {cloned_repo_path} ---")
+        elif cloned_repo_path and os.path.exists(cloned_repo_path):
             print(f"\n--- Cleaning up cloned repository at: {cloned_repo_path} ---")
             cloner.cleanup_repo(cloned_repo_path, save)
             if not save:
@@ -105,6 +190,49 @@ def run_pipeline():
                 print(f"\n--- Repository Saved Locally at path --- {cloned_repo_path}")
         elif cloned_repo_path:
             print(f"\n--- No repository found at {cloned_repo_path} to clean up (might have failed cloning early). ---")
+    return analysis_path
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Clone and analyze a GitHub repository.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes for per-file analysis (0 = one per CPU core)")
+    parser.add_argument("--format", choices=serialization.OUTPUT_FORMATS, default="json",
+                        help="Output format: a JSON array, JSON Lines, columnar NumPy tables (.npz) "
+                             "or a memory-mapped record store (.records)")
+    parser.add_argument("--cache-path", default=result_cache.DEFAULT_CACHE_PATH,
+                        help="SQLite cache of per-file results, keyed by git blob SHA")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-analyze every file instead of reusing cached results")
+    parser.add_argument("--no-clone-cache", action="store_true",
+                        help="Always make a fresh clone instead of refreshing a cached one")
+    parser.add_argument("--no-checkout", action="store_true",
+                        help="Bare-clone and analyze straight from the git object database")
+    parser.add_argument("--max-file-size", type=int, default=file_processing.DEFAULT_MAX_FILE_SIZE,
+                        help="Skip files larger than this many bytes (0 = no limit)")
+    parser.add_argument("--exclude-dir", action="append", default=[],
+                        help="Directory name to prune in addition to the built-in deny-list (repeatable)")
+    parser.add_argument("--no-gitignore", action="store_true",
+                        help="Analyze files even if .gitignore excludes them")
+    parser.add_argument("--lazy-code", action="store_true",
+                        help="Store function bodies in output/blob_store and only references in the output")
+    parser.add_argument("--layout", action="store_true",
+                        help="Precompute the dependency graph layout for the dashboard")
+    parser.add_argument("--profile", action="store_true",
+                        help="Save cProfile stats of each pipeline stage next to the analysis "
+                             "(main process only; use --workers 1 to profile extraction)")
+    args = parser.parse_args()
+    run_pipeline(
+        workers=args.workers or os.cpu_count() or 1,
+        output_format=args.format,
+        cache_path=None if args.no_cache else args.cache_path,
+        use_clone_cache=not args.no_clone_cache,
+        checkout=not args.no_checkout,
+        discovery_options={
+            "deny_dirs": file_processing.DEFAULT_DENY_DIRS | set(args.exclude_dir),
+            "use_gitignore": not args.no_gitignore,
+            "max_file_size": args.max_file_size or None,
+        },
+        lazy_code=args.lazy_code,
+        precompute_layout=args.layout,
+        profile=args.profile
+    )
\ No newline at end of file
@@ -0,0 +1,129 @@
+import posixpath
+from collections import Counter
+
+AGGREGATION_LEVELS = ['package', 'directory']
+# Views larger than this fold their smallest clusters into OTHER_NODE
+MAX_VIEW_NODES = 300
+OTHER_NODE = "(other)"
+
+
+def common_root(file_paths):
+    """Deepest directory containing every file, e.g. "src" for a src-layout repository ("" if none)."""
+    directories = {posixpath.dirname(path) for path in file_paths}
+    if not directories:
+        return ""
+    return posixpath.commonpath(list(directories))
+
+
+def package_node(directory):
+    """A package cluster stands for every file at or below directory."""
+    return f"{directory}/**"
+
+
+def directory_node(directory):
+    """A directory cluster stands for the files directly in directory."""
+    return f"{directory or '.'}/"
+
+
+def is_cluster(node):
+    return node.endswith("/") or node.endswith("/**") or node == OTHER_NODE
+
+
+def view_node(file_path, root, level='package', expanded=()):
+    """
+    The node file_path is drawn as. At the package level a file belongs to
+    the top-level package (directory) below root that contains it; expanding
+    a package splits it into its sub-packages plus a directory cluster for
+    the files directly in it, and expanding a directory cluster shows its
+    files. The directory level starts with every package expanded.
+    """
+    directory = posixpath.dirname(file_path)
+    # Dependencies outside the analysed files can fall outside root
+    under_root = not root or directory == root or directory.startswith(root + "/")
+    if level == 'package' and under_root:
+        relative = directory[len(root):].lstrip("/") if root else directory
+        current = root
+        for part in relative.split("/") if relative else []:
+            current = posixpath.join(current, part)
+            if package_node(current) not in expanded:
+                return package_node(current)
+    node = directory_node(directory)
+    return file_path if node in expanded else node
+
+
+def _aggregate(file_paths, edges, node_of):
+    sizes = Counter(node_of(path) for path in file_paths)
+    weights = Counter()
+    internal = Counter()
+    for source, target in edges:
+        source_node, target_node = node_of(source), node_of(target)
+        # Files that are only dependencies still get a (zero-size) node
+        sizes[source_node] += 0
+        sizes[target_node] += 0
+        if source_node == target_node:
+            internal[source_node] += 1
+        else:
+            weights[(source_node, target_node)] += 1
+    return sizes, weights, internal
+
+
+def bound_view(view, max_nodes=MAX_VIEW_NODES):
+    """
+    The view with at most max_nodes nodes: the largest clusters are kept and
+    the rest are folded into OTHER_NODE, summing their edges.
+    """
+    if max_nodes is None or len(view["nodes"]) <= max_nodes:
+        return view
+    kept = set(sorted(view["nodes"], key=lambda node: (-view["nodes"][node], node))[:max_nodes - 1])
+    fold = {node: (node if node in kept else OTHER_NODE) for node in view["nodes"]}
+    nodes = Counter()
+    for node, size in view["nodes"].items():
+        nodes[fold[node]] += size
+    internal = Counter()
+    for node, count in view["internal_edges"].items():
+        internal[fold.get(node, OTHER_NODE)] += count
+    weights = Counter()
+    for source, target, weight in view["edges"]:
+        source, target = fold.get(source, OTHER_NODE), fold.get(target, OTHER_NODE)
+        if source == target:
+            internal[source] += weight
+        else:
+            weights[(source, target)] += weight
+    return {
+        "nodes": dict(nodes),
+        "edges": [[source, target, weight] for (source, target), weight in weights.items()],
+        "internal_edges": dict(internal),
+    }
+
+
+def view_graph(file_paths, edges, level='package', expanded=(), max_nodes=MAX_VIEW_NODES, root=None):
+    """
+    The dependency graph at a level of detail: {"nodes": {node: file count},
+    "edges": [[source, target, file-level edge count]], "internal_edges":
+    {node: edges between its own files}}. See view_node for the nodes.
+    """
+    root = common_root(file_paths) if root is None else root
+    expanded = set(expanded)
+    cache = {}
+
+    def node_of(path):
+        if path not in cache:
+            cache[path] = view_node(path, root, level, expanded)
+        return cache[path]
+
+    sizes, weights, internal = _aggregate(file_paths, edges, node_of)
+    view = {
+        "nodes": dict(sizes),
+        "edges": [[source, target, weight] for (source, target), weight in weights.items()],
+        "internal_edges": dict(internal),
+    }
+    return bound_view(view, max_nodes)
+
+
+def hierarchy_report(file_paths, edges):
+    """Package- and directory-level graphs of an analysis, complete (no node bound), for the pipeline to store."""
+    root = common_root(file_paths)
+    report = {"root": root}
+    for level in AGGREGATION_LEVELS:
+        report[level] = view_graph(file_paths, edges, level, max_nodes=None, root=root)
+    return report
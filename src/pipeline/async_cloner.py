@@ -0,0 +1,106 @@
+import asyncio
+import os
+import shutil
+import signal
+import subprocess
+from contextlib import nullcontext
+
+from src.pipeline.cloner import _clone_cache_key
+
+DEFAULT_CLONE_TIMEOUT = 600
+DEFAULT_MAX_CONCURRENT_CLONES = 8
+
+
+def _kill_process_group(process):
+    # git clone runs helpers (remote-https, index-pack) in the same session
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _run_git(args, cwd=None, timeout=DEFAULT_CLONE_TIMEOUT):
+    """
+    Runs git without blocking the event loop. On timeout or cancellation the
+    whole process group is killed before the exception propagates. Raises
+    subprocess.CalledProcessError on a non-zero exit, like cloner's check=True.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "git", *args, cwd=cwd,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        start_new_session=True
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:
+        # TimeoutError, CancelledError or KeyboardInterrupt: don't leave git running
+        _kill_process_group(process)
+        await asyncio.shield(process.wait())
+        raise
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(
+            process.returncode, ["git"] + list(args), stderr=stderr.decode("utf-8", "replace")
+        )
+
+
+async def clone_repository(url, output_dir, semaphore=None, timeout=DEFAULT_CLONE_TIMEOUT, bare=False,
+                           blobless=False):
+    """
+    Shallow-clones url into output_dir/<repo name>-<URL hash> (with a .git
+    suffix when bare), named like the clone cache's entries so different
+    URLs never share a directory, and returns the path. semaphore bounds how
+    many clones run at once. A clone that fails, times out
+    (asyncio.TimeoutError) or is cancelled leaves nothing behind.
+    """
+    repo_name = _clone_cache_key(url)
+    repo_path = os.path.join(output_dir, repo_name + ".git" if bare else repo_name)
+    args = ["clone", "--depth=1"]
+    if bare:
+        args.append("--bare")
+    if blobless:
+        args.append("--filter=blob:none")
+
+    async with semaphore or nullcontext():
+        os.makedirs(output_dir, exist_ok=True)
+        if os.path.exists(repo_path):
+            shutil.rmtree(repo_path)
+        try:
+            await _run_git(args + [url, repo_path], timeout=timeout)
+        except BaseException:
+            shutil.rmtree(repo_path, ignore_errors=True)
+            raise
+    return repo_path
+
+
+async def fetch_repository(repo_path, semaphore=None, timeout=DEFAULT_CLONE_TIMEOUT):
+    """
+    Refreshes an existing shallow clone to the remote's current HEAD, as
+    cloner's clone cache does, without blocking the event loop.
+    """
+    async with semaphore or nullcontext():
+        await _run_git(["fetch", "--depth=1", "origin", "HEAD"], cwd=repo_path, timeout=timeout)
+        if os.path.isdir(os.path.join(repo_path, ".git")):
+            await _run_git(["reset", "--hard", "FETCH_HEAD"], cwd=repo_path, timeout=timeout)
+            await _run_git(["clean", "-ffdx"], cwd=repo_path, timeout=timeout)
+        else:
+            await _run_git(["update-ref", "HEAD", "FETCH_HEAD"], cwd=repo_path, timeout=timeout)
+    return repo_path
+
+
+async def clone_many(urls, output_dir, max_concurrent=DEFAULT_MAX_CONCURRENT_CLONES, timeout=DEFAULT_CLONE_TIMEOUT,
+                     bare=False):
+    """
+    Clones every url with at most max_concurrent clones running at once.
+    Returns a list with, for each url in order, its repo_path or the
+    exception its clone raised. A URL listed twice is cloned once and gets
+    the same result both times. One failed clone doesn't cancel the others,
+    but cancelling clone_many cancels all.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    unique_urls = list(dict.fromkeys(urls))
+    results = await asyncio.gather(
+        *(clone_repository(url, output_dir, semaphore, timeout, bare) for url in unique_urls),
+        return_exceptions=True
+    )
+    results_by_url = dict(zip(unique_urls, results))
+    return [results_by_url[url] for url in urls]
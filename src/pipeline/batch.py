@@ -0,0 +1,307 @@
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+
+from src.pipeline import aggregation
+from src.pipeline import cloner
+from src.pipeline import cycles
+from src.pipeline import file_processing
+from src.pipeline import function_bodies
+from src.pipeline import git_objects
+from src.pipeline import layout
+from src.pipeline import metrics
+from src.pipeline import result_cache
+from src.pipeline import search_index
+from src.pipeline import serialization
+
+BATCH_OUTPUT_DIR = "analysis_results/batch"
+BATCH_CLONE_DIR = "output/batch_clones"
+MANIFEST_NAME = "run_manifest.json"
+
+
+def read_targets(list_path):
+    """Repository URLs or local paths, one per line; blank lines and # comments are skipped."""
+    targets = []
+    with open(list_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                targets.append(line)
+    return targets
+
+
+def _is_bare_repository(path):
+    return os.path.isfile(os.path.join(path, "HEAD")) and os.path.isdir(os.path.join(path, "objects"))
+
+
+def _target_name(target):
+    name = os.path.basename(target.rstrip('/').rstrip(os.sep))
+    if name.endswith('.git'):
+        name = name[:-4]
+    return name or "repo"
+
+
+def analyze_repository(repo_path, output_path, output_format='json', cache_path=result_cache.DEFAULT_CACHE_PATH,
+                       bare=False, lazy_code=False, discovery_options=None, precompute_layout=False, profile=False):
+    """
+    Non-interactive analysis of one local checkout (or bare clone, with
+    bare=True) to output_path. The output only appears once it is complete.
+    Its metrics (and, with profile, per-stage cProfile stats) are saved next
+    to it, as by run_pipeline. Returns the counts and timings recorded in the
+    batch manifest.
+    """
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    partial_path = output_path + ".partial"
+    cache = result_cache.ResultCache(cache_path) if cache_path else None
+    blob_store = function_bodies.BlobStore() if lazy_code else None
+    pipeline_metrics = metrics.PipelineMetrics(profile=profile)
+    try:
+        if bare:
+            file_records = git_objects.iter_git_tree_records(
+                repo_path, result_cache=cache, lazy_code=lazy_code, blob_store=blob_store, metrics=pipeline_metrics,
+                max_file_size=(discovery_options or {}).get("max_file_size", file_processing.DEFAULT_MAX_FILE_SIZE)
+            )
+        else:
+            source = file_processing.WorkingTreeSource(repo_path, **(discovery_options or {}))
+            file_records = file_processing.iter_repository_records(
+                repo_path, result_cache=cache, source=source, lazy_code=lazy_code, blob_store=blob_store,
+                metrics=pipeline_metrics
+            )
+        with pipeline_metrics.stage('serialize'):
+            summary = serialization.write_analysis(file_records, partial_path, output_format)
+        os.replace(partial_path, output_path)
+        with pipeline_metrics.stage('cycles'):
+            cycle_report = cycles.analyze_dependency_cycles(summary.dependency_edges)
+            serialization.write_sidecar(output_path, 'cycles', cycle_report)
+        with pipeline_metrics.stage('hierarchy'):
+            serialization.write_sidecar(output_path, 'hierarchy', aggregation.hierarchy_report(
+                summary.file_paths, summary.dependency_edges
+            ))
+        with pipeline_metrics.stage('search_index'):
+            search_index.write_search_index(output_path, summary.file_paths, summary.function_names)
+        if precompute_layout:
+            with pipeline_metrics.stage('layout'):
+                layout.precompute_layout(output_path)
+        metrics_report = pipeline_metrics.write(output_path)
+        if profile:
+            pipeline_metrics.dump_profiles(output_path)
+    finally:
+        if cache is not None:
+            cache.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    return {
+        "total_files": summary.total_files,
+        "total_functions": summary.total_functions,
+        "total_dependencies": summary.total_dependencies,
+        "cyclic_components": cycle_report["cyclic_component_count"],
+        "analysis_seconds": round(time.perf_counter() - start_wall, 3),
+        "analysis_cpu_seconds": round(time.process_time() - start_cpu, 3),
+        "stage_seconds": {name: times["wall_seconds"] for name, times in metrics_report["stages"].items()},
+        # The analysis worker is reused across jobs, so its peak covers earlier jobs too
+        "process_peak_rss_bytes": metrics_report["process_peak_rss_bytes"],
+        "peak_rss_growth_bytes": metrics_report["peak_rss_growth_bytes"],
+    }
+
+
+def _clone_target(target, clone_dir, held_clones, checkout=True, use_clone_cache=True):
+    """
+    Returns (repo_path, bare) for a target. Local paths are used in place and
+    URLs go through the clone cache, whose entry stays locked against refresh
+    and eviction until the job closes held_clones (an ExitStack); other clones
+    are made under clone_dir, which the job deletes once the repository has
+    been analysed.
+    """
+    if os.path.exists(target):
+        return os.path.abspath(target), _is_bare_repository(target)
+    # Each attempt starts from an empty directory, so retries can clone again
+    if os.path.exists(clone_dir):
+        shutil.rmtree(clone_dir)
+    if use_clone_cache:
+        return held_clones.enter_context(cloner.cached_clone(target, bare=not checkout)), not checkout
+    if not checkout:
+        return cloner.clone_bare_repository(target, clone_dir), True
+    return cloner.clone_repository(target, clone_dir), False
+
+
+def _with_retries(job, stage, func, retries, backoff_seconds):
+    for attempt in range(retries + 1):
+        job[f"{stage}_attempts"] = attempt + 1
+        try:
+            return func()
+        except Exception as e:
+            job["errors"].append(f"{stage} attempt {attempt + 1}: {type(e).__name__}: {e}")
+            if attempt == retries:
+                raise
+            time.sleep(backoff_seconds * 2 ** attempt)
+
+
+class BatchRun:
+    """
+    Analyses many repositories without prompting. Clones (I/O-bound) run on a
+    thread pool of clone_workers and analyses (CPU-bound) on a process pool of
+    analysis_workers. At most max_in_flight jobs are past the queue at once,
+    so clones can't pile up on disk ahead of the analysis pool. Failed stages
+    are retried with exponential backoff. Each repository gets its own output
+    file in output_dir, next to a run manifest that is rewritten as jobs finish.
+    """
+
+    def __init__(self, targets, output_dir=BATCH_OUTPUT_DIR, output_format='json', clone_workers=4,
+                 analysis_workers=None, max_in_flight=None, retries=2, backoff_seconds=5.0,
+                 cache_path=result_cache.DEFAULT_CACHE_PATH, use_clone_cache=True, checkout=True,
+                 lazy_code=False, discovery_options=None, precompute_layout=False, profile=False):
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.clone_workers = max(1, clone_workers)
+        self.analysis_workers = max(1, analysis_workers or os.cpu_count() or 1)
+        self.max_in_flight = max_in_flight or self.clone_workers + self.analysis_workers
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.cache_path = cache_path
+        self.use_clone_cache = use_clone_cache
+        self.checkout = checkout
+        self.lazy_code = lazy_code
+        self.discovery_options = discovery_options
+        self.precompute_layout = precompute_layout
+        self.profile = profile
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.jobs = [
+            {
+                "target": target,
+                "status": "pending",
+                "output_path": os.path.join(
+                    output_dir,
+                    f"{index:04d}_{_target_name(target)}{serialization.output_extension(output_format)}"
+                ),
+                "clone_attempts": 0,
+                "analysis_attempts": 0,
+                "errors": [],
+            }
+            for index, target in enumerate(targets)
+        ]
+        self.started_at = None
+        self._start_time = None
+        self._lock = threading.Lock()
+
+    def _settings(self):
+        return {
+            "output_format": self.output_format,
+            "clone_workers": self.clone_workers,
+            "analysis_workers": self.analysis_workers,
+            "max_in_flight": self.max_in_flight,
+            "retries": self.retries,
+            "cache_path": self.cache_path,
+            "use_clone_cache": self.use_clone_cache,
+            "checkout": self.checkout,
+            "lazy_code": self.lazy_code,
+            "precompute_layout": self.precompute_layout,
+            "profile": self.profile,
+        }
+
+    def write_manifest(self, finished=False):
+        with self._lock:
+            manifest = {
+                "started_at": self.started_at,
+                "finished_at": datetime.now().isoformat(timespec="seconds") if finished else None,
+                "wall_seconds": round(time.perf_counter() - self._start_time, 3),
+                "settings": self._settings(),
+                "succeeded": sum(job["status"] == "ok" for job in self.jobs),
+                "failed": sum(job["status"] == "failed" for job in self.jobs),
+                # Shallow copies, since running jobs keep updating their dicts
+                "jobs": [dict(job, errors=list(job["errors"])) for job in self.jobs],
+            }
+            temp_path = self.manifest_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_path, self.manifest_path)
+        return manifest
+
+    def _run_job(self, index, clone_pool, analysis_pool):
+        job = self.jobs[index]
+        job_start = time.perf_counter()
+        clone_dir = os.path.join(BATCH_CLONE_DIR, f"{index:04d}_{_target_name(job['target'])}")
+        # The analysis runs in another process, so the clone's lock is held here until it is done
+        held_clones = ExitStack()
+        try:
+            job["status"] = "cloning"
+            clone_start = time.perf_counter()
+            repo_path, bare = _with_retries(
+                job, "clone",
+                lambda: clone_pool.submit(
+                    _clone_target, job["target"], clone_dir, held_clones, self.checkout, self.use_clone_cache
+                ).result(),
+                self.retries, self.backoff_seconds
+            )
+            job["clone_seconds"] = round(time.perf_counter() - clone_start, 3)
+
+            job["status"] = "analyzing"
+            analysis_start = time.perf_counter()
+            stats = _with_retries(
+                job, "analysis",
+                lambda: analysis_pool.submit(
+                    analyze_repository, repo_path, job["output_path"], self.output_format, self.cache_path,
+                    bare, self.lazy_code, self.discovery_options, self.precompute_layout, self.profile
+                ).result(),
+                self.retries, self.backoff_seconds
+            )
+            job.update(stats)
+            # Time spent waiting for a free analysis worker
+            job["queue_seconds"] = round(time.perf_counter() - analysis_start - stats["analysis_seconds"], 3)
+            job["status"] = "ok"
+        except Exception:
+            job["status"] = "failed"
+        finally:
+            held_clones.close()
+            shutil.rmtree(clone_dir, ignore_errors=True)
+            job["total_seconds"] = round(time.perf_counter() - job_start, 3)
+            self.write_manifest()
+            self._report(job)
+
+    def _report(self, job):
+        with self._lock:
+            self._finished += 1
+            finished = self._finished
+        line = f"[{finished}/{len(self.jobs)}] {job['status']}: {job['target']} ({job['total_seconds']}s)"
+        if job["status"] == "failed" and job["errors"]:
+            line += f" - {job['errors'][-1]}"
+        print(line)
+
+    def run(self):
+        """Runs every job and returns the final manifest."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._start_time = time.perf_counter()
+        self._finished = 0
+
+        with ThreadPoolExecutor(max_workers=self.clone_workers) as clone_pool, \
+                ProcessPoolExecutor(
+                    max_workers=self.analysis_workers,
+                    # Forked workers would inherit the pipes of clone subprocesses being started
+                    # on other threads, and git's parent would wait for them to close
+                    mp_context=multiprocessing.get_context("spawn")
+                ) as analysis_pool, \
+                ThreadPoolExecutor(max_workers=self.max_in_flight) as job_pool:
+            futures = [job_pool.submit(self._run_job, index, clone_pool, analysis_pool)
+                       for index in range(len(self.jobs))]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return self.write_manifest(finished=True)
+
+
+def run_batch(targets, **options):
+    """Analyses every target (URL or local path); see BatchRun for the options."""
+    return BatchRun(targets, **options).run()
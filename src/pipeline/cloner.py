@@ -1,6 +1,20 @@
 import os
 import subprocess
 import shutil
+import hashlib
+import json
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no advisory locks, so concurrent runs sharing a clone cache aren't coordinated
+    fcntl = None
+
+CLONE_CACHE_DIR = "output/clone_cache"
+DEFAULT_CLONE_CACHE_MAX_BYTES = 5 * 1024 ** 3
 
 def validate_url(url):
     if "https://github.com/" in url:
@@ -23,17 +37,224 @@ def clone_repository(github_url, output_dir):
     
     return cloned_repo_path
 
+def clone_bare_repository(github_url, output_dir, blobless=False):
+    """
+    Bare shallow clone with no working tree, for analysis straight from the
+    object database (see git_objects). blobless=True also defers blob downloads
+    until the blobs are read. Each call clones into a new directory under
+    output_dir, so concurrent runs never touch each other's clones; see
+    cached_clone(bare=True) for a reusable one.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    repo_name_with_git_suffix = github_url.rstrip('/').split('/')[-1]
+    repo_name = repo_name_with_git_suffix[:-4] if repo_name_with_git_suffix.endswith('.git') else repo_name_with_git_suffix
+
+    bare_repo_path = tempfile.mkdtemp(prefix=repo_name + "-", suffix=".git", dir=output_dir)
+    args = ["git", "clone", "--bare", "--depth=1"]
+    if blobless:
+        args.append("--filter=blob:none")
+    subprocess.run(args + [github_url, bare_repo_path], check=True)
+
+    return bare_repo_path
+
+def _flock(lock_file, exclusive=True, blocking=True):
+    """
+    Takes (or converts an existing lock to) an exclusive or shared advisory
+    lock on lock_file. Returns False instead of waiting if blocking=False and
+    another process holds a conflicting lock. Always succeeds without fcntl.
+    """
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(lock_file, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        return False
+    return True
+
+@contextmanager
+def _file_lock(lock_path, blocking=True, exclusive=True):
+    """
+    Advisory lock on lock_path, exclusive or shared. Yields False instead of
+    waiting if blocking=False and another process holds a conflicting lock.
+    """
+    with open(lock_path, "a") as lock_file:
+        if not _flock(lock_file, exclusive, blocking):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _clone_cache_key(url):
+    normalized = url.strip().rstrip('/')
+    if normalized.endswith('.git'):
+        normalized = normalized[:-4]
+    repo_name = normalized.split('/')[-1] or "repo"
+    return f"{repo_name}-{hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]}"
+
+def _dir_size(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.lstat(os.path.join(root, file_name)).st_size
+            except OSError:
+                pass
+    return total
+
+def _read_cache_meta(entry_path):
+    try:
+        with open(entry_path + ".meta.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache_meta(entry_path, url):
+    meta = {"url": url, "last_used": time.time(), "size_bytes": _dir_size(entry_path)}
+    with open(entry_path + ".meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+def _git(args, cwd=None):
+    subprocess.run(["git"] + args, cwd=cwd, check=True)
+
+def _is_clone(entry_path, bare=False):
+    if bare:
+        return os.path.isfile(os.path.join(entry_path, "HEAD"))
+    return os.path.isdir(os.path.join(entry_path, ".git"))
+
+def _refresh_clone(entry_path, bare=False):
+    # Shallow fetch of the remote's default branch, then make the work tree (or a bare HEAD) match it
+    _git(["fetch", "--depth=1", "origin", "HEAD"], cwd=entry_path)
+    if bare:
+        _git(["update-ref", "HEAD", "FETCH_HEAD"], cwd=entry_path)
+        return
+    _git(["reset", "--hard", "FETCH_HEAD"], cwd=entry_path)
+    _git(["clean", "-ffdx"], cwd=entry_path)
+
+def _fresh_clone(url, entry_path, bare=False):
+    staging_path = entry_path + ".tmp"
+    if os.path.exists(staging_path):
+        shutil.rmtree(staging_path)
+    try:
+        _git(["clone", "--depth=1"] + (["--bare"] if bare else []) + [url, staging_path])
+    except subprocess.CalledProcessError:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    if os.path.exists(entry_path):
+        shutil.rmtree(entry_path)
+    os.replace(staging_path, entry_path)
+
+def _update_entry(url, entry_path, bare=False):
+    # Caller holds the entry's exclusive lock
+    if _is_clone(entry_path, bare):
+        try:
+            _refresh_clone(entry_path, bare)
+        except subprocess.CalledProcessError:
+            print(f"Refreshing cached clone of {url} failed, cloning again")
+            _fresh_clone(url, entry_path, bare)
+    else:
+        _fresh_clone(url, entry_path, bare)
+    _write_cache_meta(entry_path, url)
+
+@contextmanager
+def cached_clone(url, cache_dir=CLONE_CACHE_DIR, max_bytes=DEFAULT_CLONE_CACHE_MAX_BYTES, bare=False):
+    """
+    Yields a working copy of url from the clone cache, cloning it on first use
+    and refreshing it with a shallow fetch + reset afterwards. The entry's
+    lock is held exclusively while it is cloned or refreshed, then shared
+    until the with block ends: other runs can use the same clone meanwhile,
+    but none can refresh or evict it, so analyse it inside the block. A run
+    that finds the entry in use shares it as it is instead of waiting to
+    refresh it. The cache is trimmed to max_bytes once the clone is ready,
+    least recently used entries first. bare=True keeps a bare clone, in its
+    own entry, for analysis from the object database (see git_objects).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_path = os.path.join(cache_dir, _clone_cache_key(url) + (".git" if bare else ""))
+
+    with open(entry_path + ".lock", "a") as lock_file:
+        if _flock(lock_file, exclusive=True, blocking=False):
+            _update_entry(url, entry_path, bare)
+        else:
+            # Waits out a clone or refresh in progress, but not other runs' analyses
+            _flock(lock_file, exclusive=False)
+            if not _is_clone(entry_path, bare):
+                # The run that held the lock failed to clone it
+                _flock(lock_file, exclusive=True)
+                _update_entry(url, entry_path, bare)
+        # A run waiting to refresh this entry may get in before the shared
+        # lock, which is fine: nothing has read the clone yet
+        _flock(lock_file, exclusive=False)
+
+        evict_clone_cache(cache_dir, max_bytes, keep=entry_path)
+        yield entry_path
+
+def evict_clone_cache(cache_dir=CLONE_CACHE_DIR, max_bytes=DEFAULT_CLONE_CACHE_MAX_BYTES, keep=None):
+    """
+    Deletes least recently used cache entries until the cache fits in max_bytes.
+    An entry is only deleted under its exclusive lock, so entries that another
+    run is cloning, refreshing or analysing (see cached_clone) are skipped.
+    Returns the evicted paths.
+    """
+    evicted = []
+    if not os.path.isdir(cache_dir):
+        return evicted
+
+    with _file_lock(os.path.join(cache_dir, ".eviction.lock")):
+        entries = []
+        for name in os.listdir(cache_dir):
+            entry_path = os.path.join(cache_dir, name)
+            meta = _read_cache_meta(entry_path)
+            if meta is not None and os.path.isdir(entry_path):
+                entries.append((meta.get("last_used", 0), meta.get("size_bytes", 0), entry_path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= max_bytes:
+                break
+            if keep and os.path.abspath(entry_path) == os.path.abspath(keep):
+                continue
+            with _file_lock(entry_path + ".lock", blocking=False) as acquired:
+                if not acquired:
+                    continue
+                shutil.rmtree(entry_path, ignore_errors=True)
+                os.remove(entry_path + ".meta.json")
+            total_bytes -= size
+            evicted.append(entry_path)
+
+    return evicted
+
+def is_cached_clone(repo_path, cache_dir=CLONE_CACHE_DIR):
+    return os.path.dirname(os.path.abspath(repo_path)) == os.path.abspath(cache_dir)
+
 def cleanup_repo(repo_path, save=True):
     """
     Deletes the cloned repo if save=False, otherwise keeps it.
     Default behavior: repository is kept (save=True).
+    Clones from the clone cache are never deleted here; the cache evicts them.
     """
-    if not save and os.path.exists(repo_path):
+    if not save and os.path.exists(repo_path) and not is_cached_clone(repo_path):
         shutil.rmtree(repo_path)
 
-def process_repo_clone(url):
-    if validate_url(url):
-        target_clone_base_dir = "output/cloned_repos"
-        cloned_path = clone_repository(url, target_clone_base_dir)
-        return cloned_path
-    return None
+@contextmanager
+def process_repo_clone(url, use_cache=True, checkout=True):
+    """
+    Yields the path of a clone of url, or None if url isn't valid. A clone
+    from the clone cache stays locked against refresh and eviction until the
+    with block ends, so analyse it inside the block.
+    """
+    if not validate_url(url):
+        yield None
+        return
+    if use_cache:
+        with cached_clone(url, bare=not checkout) as entry_path:
+            yield entry_path
+        return
+    if not checkout:
+        yield clone_bare_repository(url, "output/bare_repos")
+        return
+    target_clone_base_dir = "output/cloned_repos"
+    yield clone_repository(url, target_clone_base_dir)
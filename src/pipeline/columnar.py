@@ -0,0 +1,317 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+COLUMNAR_FORMAT_VERSION = 1
+
+METADATA_KEYS = ("file_name", "file_type", "file_size")
+FUNCTION_KEYS = ("name", "qualified_name", "code", "start_line", "end_line", "decorators")
+# Record list fields stored as (file, target) edge tables, by table name
+EDGE_TABLES = (
+    ("dependency", "dependencies"),
+    ("hint", "used_functions_from_dependencies_hints"),
+    ("external_library", "external_libraries"),
+)
+RECORD_KEYS = ("file_path", "metadata", "language", "functions") + tuple(field for _, field in EDGE_TABLES)
+
+# function_fields bit flags: which optional function keys the record had
+HAS_QUALIFIED_NAME = 1
+HAS_LINES = 2
+HAS_DECORATORS = 4
+HAS_CODE = 8
+HAS_CODE_REF = 16
+
+CODE_REF_KEYS = ("path", "start_byte", "end_byte", "content_hash")
+
+NO_VALUE = -1
+
+
+class _StringTable:
+    """Deduplicated strings, stored as one UTF-8 blob plus offsets."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def id(self, value):
+        if value is None:
+            return NO_VALUE
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+        return string_id
+
+    def to_arrays(self):
+        encoded = [value.encode("utf-8", "surrogatepass") for value in self.ids]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class _CodeBlob:
+    """
+    Function bodies, each distinct body stored once. The blob is spilled to a
+    temporary file so large analyses don't hold every body in memory.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.size = 0
+        self.spans = {}
+
+    def add(self, code):
+        data = code.encode("utf-8", "surrogatepass")
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        span = self.spans.get(key)
+        if span is None:
+            span = self.spans[key] = (self.size, len(data))
+            self.file.write(data)
+            self.size += len(data)
+        return span
+
+    def to_array(self):
+        self.file.flush()
+        if self.size == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(self.file, dtype=np.uint8, mode="r", shape=(self.size,))
+
+    def close(self):
+        self.file.close()
+
+
+def _split_extra(mapping, known_keys):
+    extra = {key: value for key, value in mapping.items() if key not in known_keys}
+    return json.dumps(extra) if extra else None
+
+
+def write_columnar(file_records, output_path, summary=None):
+    """
+    Writes records as a NumPy .npz archive of columns:
+
+    - files: file_path, file_name, file_type, file_size, language
+    - functions: function_file (row in files), name, qualified_name,
+      start/end line and code as (offset, length) into code_blob, where
+      identical bodies are stored once, or the code_ref columns for lazy
+      records; decorators as a (function, decorator) table
+    - dependency, hint and external_library edge tables of (file, target)
+
+    Strings are ids into one deduplicated string table. Anything the columns
+    can't hold (extra record, metadata or function keys) is kept as JSON so
+    iter_columnar_analysis returns exactly the records that were written.
+    """
+    strings = _StringTable()
+    code_blob = _CodeBlob()
+    files = {name: [] for name in ("path", "name", "type", "size", "language", "extra")}
+    functions = {name: [] for name in (
+        "file", "name", "qualified_name", "code_offset", "code_length",
+        "start_line", "end_line", "fields", "extra",
+        "ref_path", "ref_start_byte", "ref_end_byte", "ref_content_hash"
+    )}
+    decorators = {"function": [], "decorator": []}
+    edges = {table: {"file": [], "target": []} for table, _ in EDGE_TABLES}
+
+    try:
+        for file_index, file_entry in enumerate(file_records):
+            if summary is not None:
+                summary.add(file_entry)
+            extra = {key: value for key, value in file_entry.items() if key not in RECORD_KEYS}
+            metadata = file_entry.get("metadata")
+            if isinstance(metadata, dict) and set(metadata) == set(METADATA_KEYS):
+                files["name"].append(strings.id(metadata["file_name"]))
+                files["type"].append(strings.id(metadata["file_type"]))
+                size = metadata["file_size"]
+                files["size"].append(NO_VALUE if size is None else size)
+            else:
+                files["name"].append(NO_VALUE)
+                files["type"].append(NO_VALUE)
+                files["size"].append(NO_VALUE)
+                if "metadata" in file_entry:
+                    extra["metadata"] = metadata
+            files["path"].append(strings.id(file_entry.get("file_path")))
+            files["language"].append(strings.id(file_entry.get("language")))
+            files["extra"].append(strings.id(json.dumps(extra) if extra else None))
+
+            for func in file_entry.get("functions", []):
+                function_index = len(functions["file"])
+                fields = 0
+                functions["file"].append(file_index)
+                functions["name"].append(strings.id(func.get("name")))
+                functions["qualified_name"].append(strings.id(func.get("qualified_name")))
+                if "qualified_name" in func:
+                    fields |= HAS_QUALIFIED_NAME
+                offset, length = code_blob.add(func["code"]) if "code" in func else (0, 0)
+                if "code" in func:
+                    fields |= HAS_CODE
+                functions["code_offset"].append(offset)
+                functions["code_length"].append(length)
+                known_keys = FUNCTION_KEYS
+                code_ref = func.get("code_ref")
+                if isinstance(code_ref, dict) and set(code_ref) == set(CODE_REF_KEYS):
+                    fields |= HAS_CODE_REF
+                    known_keys = FUNCTION_KEYS + ("code_ref",)
+                    functions["ref_path"].append(strings.id(code_ref["path"]))
+                    functions["ref_start_byte"].append(code_ref["start_byte"])
+                    functions["ref_end_byte"].append(code_ref["end_byte"])
+                    functions["ref_content_hash"].append(strings.id(code_ref["content_hash"]))
+                else:
+                    for name in ("ref_path", "ref_start_byte", "ref_end_byte", "ref_content_hash"):
+                        functions[name].append(NO_VALUE)
+                if "start_line" in func:
+                    fields |= HAS_LINES
+                functions["start_line"].append(func.get("start_line", NO_VALUE))
+                functions["end_line"].append(func.get("end_line", NO_VALUE))
+                if "decorators" in func:
+                    fields |= HAS_DECORATORS
+                    for decorator in func["decorators"]:
+                        decorators["function"].append(function_index)
+                        decorators["decorator"].append(strings.id(decorator))
+                functions["fields"].append(fields)
+                functions["extra"].append(strings.id(_split_extra(func, known_keys)))
+
+            for table, field in EDGE_TABLES:
+                for target in file_entry.get(field, []):
+                    edges[table]["file"].append(file_index)
+                    edges[table]["target"].append(strings.id(target))
+
+        strings_blob, strings_offsets = strings.to_arrays()
+        arrays = {
+            "format_version": np.array(COLUMNAR_FORMAT_VERSION, dtype=np.int64),
+            "strings_blob": strings_blob,
+            "strings_offsets": strings_offsets,
+            "code_blob": code_blob.to_array(),
+            "function_fields": np.array(functions.pop("fields"), dtype=np.uint8),
+        }
+        for name, values in files.items():
+            arrays[f"file_{name}"] = np.array(values, dtype=np.int64)
+        for name, values in functions.items():
+            arrays[f"function_{name}"] = np.array(values, dtype=np.int64)
+        arrays["decorator_function"] = np.array(decorators["function"], dtype=np.int64)
+        arrays["decorator_target"] = np.array(decorators["decorator"], dtype=np.int64)
+        for table, columns in edges.items():
+            arrays[f"{table}_file"] = np.array(columns["file"], dtype=np.int64)
+            arrays[f"{table}_target"] = np.array(columns["target"], dtype=np.int64)
+
+        # np.savez appends .npz to names without it; write through a file object instead
+        with open(output_path, "wb") as output_file:
+            np.savez(output_file, **arrays)
+    finally:
+        code_blob.close()
+
+
+def load_tables(path):
+    """
+    The archive's tables as {table: {column: ndarray}}, with string columns
+    decoded to object arrays and function code left as offsets into
+    tables["code_blob"], without building per-file records.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        arrays = {name: archive[name] for name in archive.files}
+    version = int(arrays.pop("format_version"))
+    if version != COLUMNAR_FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar analysis version {version} in {path}")
+
+    blob = arrays.pop("strings_blob").tobytes()
+    offsets = arrays.pop("strings_offsets").tolist()
+    string_values = np.array(
+        [blob[offsets[i]:offsets[i + 1]].decode("utf-8", "surrogatepass") for i in range(len(offsets) - 1)] + [None],
+        dtype=object
+    )
+
+    def decode(ids):
+        # NO_VALUE (-1) picks the trailing None
+        return string_values[ids]
+
+    string_columns = {
+        "file_path", "file_name", "file_type", "file_language", "file_extra",
+        "function_name", "function_qualified_name", "function_extra", "decorator_target",
+        "function_ref_path", "function_ref_content_hash",
+    } | {f"{table}_target" for table, _ in EDGE_TABLES}
+    tables = {"files": {}, "functions": {}, "decorators": {}, "code_blob": arrays.pop("code_blob")}
+    for table, _ in EDGE_TABLES:
+        tables[table] = {}
+
+    for name, column in arrays.items():
+        value = decode(column) if name in string_columns else column
+        if name.startswith("file_"):
+            tables["files"][name[len("file_"):]] = value
+        elif name.startswith("function_"):
+            tables["functions"][name[len("function_"):]] = value
+        elif name.startswith("decorator_"):
+            tables["decorators"][name[len("decorator_"):]] = value
+        else:
+            table, column_name = name.rsplit("_", 1)
+            tables[table][column_name] = value
+    return tables
+
+
+def _rows_by_file(file_column, file_count):
+    """[start, end) row range of each file in a table sorted by file."""
+    return np.searchsorted(file_column, np.arange(file_count + 1), side="left").tolist()
+
+
+def iter_columnar_analysis(path):
+    """Yields the analysis records of a .npz archive in the JSON schema."""
+    tables = load_tables(path)
+    files, functions, decorators = tables["files"], tables["functions"], tables["decorators"]
+    code_blob = tables["code_blob"].tobytes()
+    file_count = len(files["path"])
+
+    function_rows = _rows_by_file(functions["file"], file_count)
+    decorator_rows = np.searchsorted(
+        decorators["function"], np.arange(len(functions["file"]) + 1), side="left"
+    ).tolist()
+    edge_rows = {table: _rows_by_file(tables[table]["file"], file_count) for table, _ in EDGE_TABLES}
+
+    function_columns = {name: column.tolist() for name, column in functions.items()}
+    decorator_names = decorators["target"].tolist()
+
+    for i in range(file_count):
+        extra = json.loads(files["extra"][i]) if files["extra"][i] is not None else {}
+        file_entry = {"file_path": files["path"][i]}
+        if "metadata" in extra:
+            file_entry["metadata"] = extra.pop("metadata")
+        else:
+            size = int(files["size"][i])
+            file_entry["metadata"] = {
+                "file_name": files["name"][i],
+                "file_type": files["type"][i],
+                "file_size": None if size == NO_VALUE else size,
+            }
+        file_entry["language"] = files["language"][i]
+
+        file_functions = []
+        for row in range(function_rows[i], function_rows[i + 1]):
+            fields = function_columns["fields"][row]
+            func = {"name": function_columns["name"][row]}
+            if fields & HAS_QUALIFIED_NAME:
+                func["qualified_name"] = function_columns["qualified_name"][row]
+            if fields & HAS_CODE:
+                offset = function_columns["code_offset"][row]
+                func["code"] = code_blob[offset:offset + function_columns["code_length"][row]].decode(
+                    "utf-8", "surrogatepass"
+                )
+            if fields & HAS_CODE_REF:
+                func["code_ref"] = {
+                    key: function_columns[f"ref_{key}"][row] for key in CODE_REF_KEYS
+                }
+            if fields & HAS_LINES:
+                func["start_line"] = function_columns["start_line"][row]
+                func["end_line"] = function_columns["end_line"][row]
+            if fields & HAS_DECORATORS:
+                func["decorators"] = decorator_names[decorator_rows[row]:decorator_rows[row + 1]]
+            if function_columns["extra"][row] is not None:
+                func.update(json.loads(function_columns["extra"][row]))
+            file_functions.append(func)
+        file_entry["functions"] = file_functions
+
+        for table, field in EDGE_TABLES:
+            rows = edge_rows[table]
+            file_entry[field] = tables[table]["target"][rows[i]:rows[i + 1]].tolist()
+        file_entry.update(extra)
+        yield file_entry
+
+
+def is_columnar_file(path):
+    return os.path.splitext(path)[1] == ".npz"
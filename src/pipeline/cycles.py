@@ -0,0 +1,101 @@
+import time
+from collections import deque
+
+import networkx as nx
+
+MAX_CYCLES_PER_COMPONENT = 5
+CYCLE_TIME_BUDGET_SECONDS = 5.0
+
+
+def _shortest_cycle_through(G, start, members, deadline):
+    """
+    Shortest cycle through start inside its strongly connected component
+    (a BFS back to start), as [start, ..., start]; None if the deadline passes.
+    """
+    if G.has_edge(start, start):
+        return [start, start]
+    parents = {start: None}
+    queue = deque([start])
+    visited = 0
+    while queue:
+        node = queue.popleft()
+        visited += 1
+        if visited % 1024 == 0 and time.perf_counter() > deadline:
+            return None
+        for successor in G.successors(node):
+            if successor == start:
+                path = [node]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1] + [start]
+            if successor in members and successor not in parents:
+                parents[successor] = node
+                queue.append(successor)
+    return None
+
+
+def _canonical(cycle):
+    # The same cycle found from different start nodes, rotated to start at its smallest node
+    nodes = cycle[:-1]
+    first = nodes.index(min(nodes))
+    return tuple(nodes[first:] + nodes[:first])
+
+
+def analyze_cycles(G, max_cycles_per_component=MAX_CYCLES_PER_COMPONENT, time_budget=CYCLE_TIME_BUDGET_SECONDS):
+    """
+    Circular dependencies of a dependency DiGraph, without enumerating every
+    simple cycle (exponential on tangled graphs). Files are grouped into
+    strongly connected components (Tarjan), and every component with more
+    than one file or a self-import is a cycle group. For each group, up to
+    max_cycles_per_component distinct shortest cycles are sampled, through
+    its most connected files first. Once the search has taken time_budget
+    seconds, no further cycles are looked for and the report is marked
+    timed_out; the components themselves are always complete.
+    """
+    components = [
+        component for component in nx.strongly_connected_components(G)
+        if len(component) > 1 or G.has_edge(next(iter(component)), next(iter(component)))
+    ]
+    components.sort(key=len, reverse=True)
+    # Finding the components is linear; only the cycle search is bounded
+    deadline = time.perf_counter() + time_budget
+
+    timed_out = False
+    component_reports = []
+    for component in components:
+        cycles = []
+        seen = set()
+        if not timed_out:
+            starts = sorted(component, key=lambda node: (-(G.in_degree(node) + G.out_degree(node)), node))
+            for start in starts[:max_cycles_per_component * 3]:
+                if time.perf_counter() > deadline:
+                    timed_out = True
+                    break
+                cycle = _shortest_cycle_through(G, start, component, deadline)
+                if cycle is None:
+                    timed_out = True
+                    break
+                key = _canonical(cycle)
+                if key not in seen:
+                    seen.add(key)
+                    cycles.append(cycle)
+                    if len(cycles) == max_cycles_per_component:
+                        break
+        component_reports.append({
+            "size": len(component),
+            "files": sorted(component),
+            "cycles": sorted(cycles, key=len),
+        })
+
+    return {
+        "cyclic_component_count": len(components),
+        "files_in_cycles": sum(len(component) for component in components),
+        "component_sizes": [len(component) for component in components],
+        "components": component_reports,
+        "timed_out": timed_out,
+    }
+
+
+def analyze_dependency_cycles(dependency_edges, **options):
+    """analyze_cycles for (file_path, dependency) edges, as collected by serialization.AnalysisSummary."""
+    return analyze_cycles(nx.DiGraph(dependency_edges), **options)
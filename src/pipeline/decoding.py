@@ -0,0 +1,22 @@
+# Tried in order when decoding a file; cp1252 only fails on five unassigned bytes
+FALLBACK_ENCODINGS = ('utf-8', 'cp1252')
+
+
+def decode_source(data):
+    """
+    Decodes source bytes as (text, encoding): strict UTF-8, then each later
+    FALLBACK_ENCODINGS entry, and as a last resort UTF-8 with undecodable
+    bytes replaced ("utf-8-replace"). Newlines are normalised to \n, as
+    reading in text mode would.
+    """
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        text, encoding = data.decode('utf-8', 'replace'), 'utf-8-replace'
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text, encoding
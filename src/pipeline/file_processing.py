@@ -1,27 +1,162 @@
 import os
-import json
 import re
-
-def discover_and_filter_files(repo_root_path):
+import json
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from src.pipeline.repo_index import RepoIndex, ensure_repo_index
+from src.pipeline.ignore_rules import IgnoreRules
+from src.pipeline.decoding import FALLBACK_ENCODINGS, decode_source
+from src.pipeline.scanner import scan_source
+from src.pipeline.result_cache import compute_blob_shas, git_blob_sha
+from src.pipeline.function_bodies import function_byte_spans, lazy_functions
+from src.pipeline.metrics import PipelineMetrics
+
+# Bump whenever per-file extraction output changes, so cached results are not reused
+ANALYZER_VERSION = "10"
+
+VALID_EXTENSIONS = ['.py', '.js', '.tsx', '.ts']
+
+# Directories that are never worth walking: VCS metadata, vendored dependencies,
+# virtualenvs, build output and tool caches
+DEFAULT_DENY_DIRS = frozenset([
+    '.git', '.hg', '.svn', 'node_modules', 'bower_components', 'venv', '.venv',
+    'site-packages', 'dist', 'build', '__pycache__', '.tox', '.nox',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache', '.next', '.nuxt', 'coverage'
+])
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+SNIFF_BYTES = 8192
+MINIFIED_AVG_LINE_LENGTH = 300
+# Identifier-like tokens; dependency function names only match whole tokens
+IDENTIFIER_TOKEN = re.compile(r'[\w$]+')
+
+def _looks_binary(sample):
+    return b'\0' in sample
+
+def _has_minified_name(file_name):
+    return '.min.' in file_name
+
+def _looks_minified(sample):
+    if len(sample) < 1024:
+        return False
+    return len(sample) / (sample.count(b'\n') + 1) > MINIFIED_AVG_LINE_LENGTH
+
+def _is_in_denied_dir(rel_path, deny_dirs=DEFAULT_DENY_DIRS):
+    return any(part in deny_dirs for part in rel_path.replace(os.sep, '/').split('/')[:-1])
+
+def discover_and_filter_files(repo_root_path, deny_dirs=DEFAULT_DENY_DIRS, use_gitignore=True,
+                              max_file_size=DEFAULT_MAX_FILE_SIZE, stats=None):
+    """
+    Walks the repository and returns absolute paths of the files to analyze.
+
+    Denied and .gitignore'd directories are pruned from the walk itself, so
+    nothing below them is visited. Files over max_file_size bytes (None for no
+    limit) and *.min.* bundles are skipped. Only names and sizes are looked
+    at: binary files and other minified bundles are skipped by read_source
+    when the file is read, so each file is opened once. If a stats dict is
+    passed, it is filled with counts of what was pruned or skipped.
+    """
     filtered_files = []
-    valid_extensions = ['.py', '.js', '.tsx', '.ts']
+    counts = {
+        "pruned_dirs": 0,
+        "ignored_files": 0,
+        "oversized_files": 0,
+        "minified_files": 0,
+    }
+    ignore_rules = IgnoreRules(repo_root_path) if use_gitignore else None
     
     for root, dirs, files in os.walk(repo_root_path):
+        if ignore_rules is not None:
+            ignore_rules.load_directory(root)
+
+        # Prune in place so os.walk never descends into these
+        kept_dirs = []
+        for dir_name in dirs:
+            if dir_name in deny_dirs or (
+                ignore_rules is not None and ignore_rules.is_ignored(os.path.join(root, dir_name), is_dir=True)
+            ):
+                counts["pruned_dirs"] += 1
+            else:
+                kept_dirs.append(dir_name)
+        dirs[:] = kept_dirs
+
         for file_name in files:
             file_extension = os.path.splitext(file_name)[1]
-            if file_extension in valid_extensions:
-                full_file_path = os.path.join(root, file_name)
-                filtered_files.append(os.path.abspath(full_file_path))
-    
+            if file_extension not in VALID_EXTENSIONS:
+                continue
+            full_file_path = os.path.join(root, file_name)
+            if ignore_rules is not None and ignore_rules.is_ignored(full_file_path):
+                counts["ignored_files"] += 1
+                continue
+            if _has_minified_name(file_name):
+                counts["minified_files"] += 1
+                continue
+            try:
+                if max_file_size is not None and os.path.getsize(full_file_path) > max_file_size:
+                    counts["oversized_files"] += 1
+                    continue
+            except OSError:
+                continue
+            filtered_files.append(os.path.abspath(full_file_path))
+
+    if stats is not None:
+        stats.update(counts)
     return filtered_files
 
-def read_file_content(file_path):
+def source_from_bytes(file_name, data, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    (text, encoding) for a source file's bytes, or (None, reason) if it should
+    be skipped: "oversized" (over max_file_size; None for no limit),
+    "binary" or "minified", sniffed the same way as discover_and_filter_files.
+    """
+    if max_file_size is not None and len(data) > max_file_size:
+        return None, "oversized"
+    sample = data[:SNIFF_BYTES]
+    if _looks_binary(sample):
+        return None, "binary"
+    if _has_minified_name(file_name) or _looks_minified(sample):
+        return None, "minified"
+    return decode_source(data)
+
+def read_file_bytes(file_path, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    (bytes, None) for file_path, read with a single read() of its size, or
+    (None, reason) where reason is "missing", "unreadable" or "oversized"
+    (over max_file_size, in which case it is not read at all).
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        with open(file_path, 'rb', buffering=0) as file:
+            size = os.fstat(file.fileno()).st_size
+            if max_file_size is not None and size > max_file_size:
+                return None, "oversized"
+            # One byte extra to notice a file that grew since the fstat
+            data = file.read(size + 1)
+            if len(data) > size:
+                data += file.read()
     except FileNotFoundError:
-        print(f"Error: File not found at {file_path}")
-        return None
+        return None, "missing"
+    except OSError:
+        return None, "unreadable"
+    return data, None
+
+def read_source(file_path, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    Reads a source file for analysis: (text, encoding), or (None, reason) if
+    it's skipped, for one of read_file_bytes's or source_from_bytes's reasons.
+    """
+    data, reason = read_file_bytes(file_path, max_file_size)
+    if data is None:
+        return None, reason
+    return source_from_bytes(os.path.basename(file_path), data, max_file_size)
+
+def read_file_content(file_path, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """The decoded content of file_path, or None (with the reason printed) if it's skipped."""
+    content, status = read_source(file_path, max_file_size)
+    if content is None:
+        print(f"Skipping {file_path}: {status}")
+    return content
 
 def extract_file_metadata(file_path):
     return {
@@ -40,225 +175,74 @@ def detect_programming_language(file_content, file_extension):
     }.get(file_extension, "Unknown")
 
 def _resolve_python_import_path(base_path, module_name, all_repo_files):
-    all_repo_files_set = set(all_repo_files)
-
-    if module_name.startswith('.'):
-        dots = len(module_name) - len(module_name.lstrip('.'))
-        clean_module = module_name[dots:]
-        path_parts = base_path.split(os.sep)
-        for _ in range(dots - 1):
-            if path_parts:
-                path_parts.pop()
-        base = os.sep.join(path_parts) if path_parts else base_path
-        module_path = clean_module.replace('.', os.sep)
-    else:
-        base = base_path
-        module_path = module_name.replace('.', os.sep)
+    repo_index = ensure_repo_index(all_repo_files)
+
+    if not module_name.startswith('.'):
+        return repo_index.resolve_python_module(base_path, module_name)
+
+    dots = len(module_name) - len(module_name.lstrip('.'))
+    clean_module = module_name[dots:]
+    path_parts = base_path.split(os.sep)
+    for _ in range(dots - 1):
+        if path_parts:
+            path_parts.pop()
+    base = os.sep.join(path_parts) if path_parts else base_path
+    module_path = clean_module.replace('.', os.sep)
 
-    candidates = []
     if module_path:
-        candidates += [
+        for path in [
             os.path.join(base, module_path + '.py'),
             os.path.join(base, module_path, '__init__.py'),
-        ]
-
-    if not module_name.startswith('.'):
-        current_base = base
-        while current_base and current_base != os.path.dirname(current_base):
-            candidates += [
-                os.path.join(current_base, module_path + '.py'),
-                os.path.join(current_base, module_path, '__init__.py'),
-            ]
-            current_base = os.path.dirname(current_base)
-
-    for path in candidates:
-        if os.path.normpath(path) in all_repo_files_set:
-            return os.path.normpath(path)
+        ]:
+            if os.path.normpath(path) in repo_index.paths:
+                return os.path.normpath(path)
 
     return None
 
 def _resolve_js_ts_jsx_tsx_path(base_path, module_path, all_repo_files):
-    all_repo_files_set = set(all_repo_files)
-    possible_extensions = ['.js', '.ts', '.tsx', '.jsx']
-    index_files = ['/index.js', '/index.ts', '/index.jsx', '/index.tsx']
+    repo_index = ensure_repo_index(all_repo_files)
     path_without_quotes = module_path.strip("'\"")
 
     if path_without_quotes.startswith(('./', '../', '/')):
-        base_candidate = os.path.join(base_path, path_without_quotes)
-        for ext in [''] + possible_extensions + index_files:
-            candidate = os.path.normpath(base_candidate + ext)
-            if candidate in all_repo_files_set:
-                return candidate
+        return repo_index.resolve_js_module(os.path.join(base_path, path_without_quotes))
 
     return None
 
-def find_dependencies(file_content, file_path, all_repo_files):
-    dependencies = []
-    all_repo_files_set = set(all_repo_files)
+def _language_for_path(file_path):
+    return detect_programming_language(None, os.path.splitext(file_path)[1].lower())
+
+def _language_category(file_path):
     file_extension = os.path.splitext(file_path)[1].lower()
-    language_category = 'python' if file_extension == '.py' else (
+    return 'python' if file_extension == '.py' else (
         'js_ts_jsx_tsx' if file_extension in ['.js', '.ts', '.jsx', '.tsx'] else 'other'
     )
+
+def _resolve_dependency_specs(dependency_specs, file_path, all_repo_files):
+    dependencies = []
+    repo_index = ensure_repo_index(all_repo_files)
+    language_category = _language_category(file_path)
     current_dir = os.path.dirname(file_path)
 
-    if language_category == "python":
-        for line in file_content.splitlines():
-            stripped_line = line.strip()
-            module_name = None
-            if not stripped_line or stripped_line.startswith('#'):
-                continue
-            if stripped_line.startswith("import "):
-                import_part = stripped_line[7:].strip().split(" as ")[0].split(',')[0].split('#')[0].strip()
-                module_name = import_part
-            elif stripped_line.startswith("from "):
-                from_part = stripped_line[5:].strip()
-                if " import " in from_part:
-                    module_name = from_part.split(" import ")[0].split('#')[0].strip()
-            if module_name:
-                resolved_path = _resolve_python_import_path(current_dir, module_name, all_repo_files)
-                if resolved_path and resolved_path != file_path:
-                    dependencies.append(resolved_path)
-
-    elif language_category == "js_ts_jsx_tsx":
-        for line in file_content.splitlines():
-            stripped_line = line.strip()
-            module_path_str = None
-            if not stripped_line or stripped_line.startswith('//') or stripped_line.startswith('/*'):
-                continue
-            if "import" in stripped_line and " from " in stripped_line:
-                import_path_part = stripped_line.split(" from ")[-1].strip()
-                if import_path_part[0] in ['"', "'"]:
-                    module_path_str = import_path_part[1:].split(import_path_part[0])[0]
-            elif stripped_line.startswith("import "):
-                import_part = stripped_line[7:].strip()
-                if import_part[0] in ['"', "'"]:
-                    module_path_str = import_part[1:].split(import_part[0])[0]
-            elif "require(" in stripped_line:
-                after_require = stripped_line.split("require(", 1)[1]
-                for q in ['"', "'"]:
-                    if q in after_require:
-                        module_path_str = after_require.split(q)[1]
-                        break
-            if module_path_str and module_path_str.startswith(('./', '../', '/')):
-                resolved = _resolve_js_ts_jsx_tsx_path(current_dir, module_path_str, all_repo_files)
-                if resolved and resolved != file_path:
-                    dependencies.append(resolved)
-
-    return list(set(dependencies))
+    for spec in dependency_specs:
+        if language_category == "python":
+            resolved = _resolve_python_import_path(current_dir, spec, repo_index)
+        else:
+            resolved = _resolve_js_ts_jsx_tsx_path(current_dir, spec, repo_index)
+        if resolved and resolved != file_path:
+            dependencies.append(resolved)
+
+    return sorted(set(dependencies))
+
+def find_dependencies(file_content, file_path, all_repo_files):
+    scan = scan_source(file_content, _language_for_path(file_path), want_functions=False)
+    return _resolve_dependency_specs(scan["dependency_specs"], file_path, all_repo_files)
 
 def extract_function_definitions_with_code(file_content, language):
     """
     Extract function names along with their complete code structure.
     Returns a list of dictionaries with 'name' and 'code' keys.
     """
-    functions = []
-    lines = file_content.splitlines()
-
-    if language == "python":
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            stripped = line.strip()
-            
-            if stripped.startswith("def ") and "(" in stripped and ":" in stripped:
-                # Extract function name
-                name_start = stripped.find("def ") + len("def ")
-                name_end = stripped.find("(", name_start)
-                func_name = stripped[name_start:name_end].strip()
-                
-                if func_name and " " not in func_name:
-                    # Get indentation level
-                    indent_level = len(line) - len(line.lstrip())
-                    
-                    # Collect function code
-                    func_lines = [line]
-                    i += 1
-                    
-                    # Continue collecting lines that are part of the function
-                    while i < len(lines):
-                        current_line = lines[i]
-                        current_stripped = current_line.strip()
-                        
-                        # Stop if we hit a line with same or less indentation (unless it's empty or comment)
-                        if current_stripped and not current_stripped.startswith('#'):
-                            current_indent = len(current_line) - len(current_line.lstrip())
-                            if current_indent <= indent_level:
-                                break
-                        
-                        func_lines.append(current_line)
-                        i += 1
-                    
-                    functions.append({
-                        "name": func_name,
-                        "code": "\n".join(func_lines)
-                    })
-                    continue
-            i += 1
-
-    elif language in ["javascript", "typescript", "javascript xml", "typescript xml"]:
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            stripped = line.strip()
-            
-            # Patterns for different function declarations
-            patterns = [
-                (r'function\s+([a-zA-Z0-9_]+)\s*\(', 'function'),
-                (r'const\s+([a-zA-Z0-9_]+)\s*=\s*function\s*\(', 'const_function'),
-                (r'const\s+([a-zA-Z0-9_]+)\s*=\s*\(?.*?\)?\s*=>', 'arrow'),
-                (r'let\s+([a-zA-Z0-9_]+)\s*=\s*function\s*\(', 'let_function'),
-                (r'let\s+([a-zA-Z0-9_]+)\s*=\s*\(?.*?\)?\s*=>', 'let_arrow'),
-                (r'export\s+function\s+([a-zA-Z0-9_]+)\s*\(', 'export_function'),
-                (r'export\s+const\s+([a-zA-Z0-9_]+)\s*=\s*\(?.*?\)?\s*=>', 'export_arrow')
-            ]
-            
-            for pattern, func_type in patterns:
-                match = re.search(pattern, stripped)
-                if match:
-                    func_name = match.group(1)
-                    func_lines = [line]
-                    i += 1
-                    
-                    # Track braces to find function end
-                    brace_count = stripped.count('{') - stripped.count('}')
-                    
-                    # For arrow functions, check if it's single line
-                    if 'arrow' in func_type and '=>' in stripped:
-                        if '{' not in stripped:
-                            # Single line arrow function
-                            functions.append({
-                                "name": func_name,
-                                "code": line
-                            })
-                            break
-                    
-                    # Multi-line function - collect until braces match
-                    while i < len(lines) and brace_count > 0:
-                        current_line = lines[i]
-                        func_lines.append(current_line)
-                        brace_count += current_line.count('{') - current_line.count('}')
-                        i += 1
-                    
-                    if func_lines:
-                        functions.append({
-                            "name": func_name,
-                            "code": "\n".join(func_lines)
-                        })
-                    break
-            else:
-                i += 1
-                continue
-            break
-
-    # Remove duplicates based on function name
-    seen = set()
-    unique_functions = []
-    for func in functions:
-        if func["name"] not in seen:
-            seen.add(func["name"])
-            unique_functions.append(func)
-    
-    return unique_functions
+    return scan_source(file_content, language, want_imports=False)["functions"]
 
 def extract_function_definitions(file_content, language):
     """
@@ -267,137 +251,387 @@ def extract_function_definitions(file_content, language):
     functions_with_code = extract_function_definitions_with_code(file_content, language)
     return [func["name"] for func in functions_with_code]
 
-def find_external_imports(file_content, file_path, all_repo_files):
+def _resolve_external_import_specs(external_specs, file_path, all_repo_files):
     external_deps = set()
-    all_repo_files_set = set(all_repo_files)
+    repo_index = ensure_repo_index(all_repo_files)
     curr_dir = os.path.dirname(file_path)
-    file_extension = os.path.splitext(file_path)[1].lower()
+    is_python = _language_category(file_path) == "python"
 
-    if file_extension == ".py":
-        for line in file_content.splitlines():
-            stripped = line.strip()
-            if not stripped or stripped.startswith("#"):
-                continue
+    for module_name in external_specs:
+        if is_python and _resolve_python_import_path(curr_dir, module_name, repo_index):
+            continue
+        external_deps.add(module_name)
 
-            # Handle: import x, y
-            if stripped.startswith("import "):
-                import_part = stripped[7:].strip()
-                module_names = [m.strip() for m in import_part.split(",")]
-                for module_name in module_names:
-                    if "#" in module_name:
-                        module_name = module_name.split("#")[0].strip()
-                    if not module_name.startswith("."):
-                        possible_path = os.path.join(curr_dir, *module_name.split(".")) + ".py"
-                        normalized = os.path.normpath(possible_path)
-                        if normalized not in all_repo_files_set:
-                            external_deps.add(module_name)
-
-            # Handle: from x import y
-            elif stripped.startswith("from "):
-                from_part = stripped[5:].strip()
-                if "import" in from_part:
-                    module_name = from_part.split(" import ")[0].strip()
-                    if "#" in module_name:
-                        module_name = module_name.split("#")[0].strip()
-                    if not module_name.startswith("."):
-                        possible_path = os.path.join(curr_dir, *module_name.split(".")) + ".py"
-                        normalized = os.path.normpath(possible_path)
-                        if normalized not in all_repo_files_set:
-                            external_deps.add(module_name)
-
-    elif file_extension in [".js", ".ts", ".jsx", ".tsx"]:
-        for line in file_content.splitlines():
-            stripped = line.strip()
-            module_path = None
-            if not stripped or stripped.startswith("//") or stripped.startswith("/*"):
-                continue
+    return list(external_deps)
 
-            # Handle: import something from "lib"
-            if "import" in stripped and "from" in stripped:
-                from_idx = stripped.find("from")
-                if from_idx != -1:
-                    import_path_part = stripped[from_idx + 4:].strip()
-                    if import_path_part.startswith(("'", '"')):
-                        quote_char = import_path_part[0]
-                        end_quote_idx = import_path_part.find(quote_char, 1)
-                        if end_quote_idx != -1:
-                            module_path = import_path_part[1:end_quote_idx]
-
-            # Handle: import "lib"
-            elif stripped.startswith("import "):
-                import_path = stripped[7:].strip()
-                if import_path.startswith(("'", '"')):
-                    quote_char = import_path[0]
-                    end_quote_idx = import_path.find(quote_char, 1)
-                    if end_quote_idx != -1:
-                        module_path = import_path[1:end_quote_idx]
-
-            # Handle: const x = require("lib")
-            elif "require(" in stripped:
-                start_idx = stripped.find("require(") + len("require(")
-                after = stripped[start_idx:].strip()
-                if after.startswith(("'", '"')):
-                    quote_char = after[0]
-                    end_quote_idx = after.find(quote_char, 1)
-                    if end_quote_idx != -1:
-                        module_path = after[1:end_quote_idx]
-
-            # Final check: skip relative paths
-            if module_path and not module_path.startswith((".", "/", "../")):
-                external_deps.add(module_path)
+def find_external_imports(file_content, file_path, all_repo_files):
+    scan = scan_source(file_content, _language_for_path(file_path), want_functions=False)
+    return _resolve_external_import_specs(scan["external_specs"], file_path, all_repo_files)
 
-    return list(external_deps)
+class WorkingTreeSource:
+    """
+    File source for iter_repository_records that walks a checked-out tree.
+    See git_objects.GitTreeSource for the object-database equivalent.
+    """
 
-def process_repository_for_json(repo_root_path):
-    all_repo_files = [os.path.abspath(p) for p in discover_and_filter_files(repo_root_path)]
-    processed_files_data = []
-    all_repo_files_set = set(all_repo_files)
-    file_content_cache = {}
-    file_defined_functions_cache = {}
+    # Workers can open the files themselves, so only paths cross process boundaries
+    reads_in_workers = True
+
+    def __init__(self, repo_root_path, **discovery_options):
+        self.root_path = os.path.abspath(repo_root_path)
+        # Passed through to discover_and_filter_files (deny_dirs, use_gitignore, max_file_size)
+        self.discovery_options = discovery_options
+        self.discovery_stats = {}
+        self.max_file_size = discovery_options.get("max_file_size", DEFAULT_MAX_FILE_SIZE)
+
+    def list_files(self):
+        files = discover_and_filter_files(self.root_path, stats=self.discovery_stats, **self.discovery_options)
+        return sorted(os.path.abspath(p) for p in files)
+
+    def read_bytes(self, abs_path):
+        return read_file_bytes(abs_path, self.max_file_size)
+
+    def read_file(self, abs_path):
+        return read_file_content(abs_path, self.max_file_size)
+
+    def file_metadata(self, abs_path):
+        return extract_file_metadata(abs_path)
+
+    def blob_shas(self, abs_paths):
+        return compute_blob_shas(self.root_path, abs_paths)
+
+    def close(self):
+        pass
+
+def _extract_content_result(file_path, data):
+    """
+    Per-file stage: everything that only depends on the file content, which is
+    what gets cached by blob SHA. Returns (file_result, encoding), or
+    (None, reason) if the file is skipped (see source_from_bytes).
+    """
+    content, status = source_from_bytes(os.path.basename(file_path), data, None)
+    if content is None:
+        return None, status
+
+    language = detect_programming_language(content, os.path.splitext(file_path)[1])
+    # One pass for functions with their code and both kinds of import
+    scan = scan_source(content, language)
+    return {
+        "language": language,
+        "functions": scan["functions"],
+        "dependency_specs": scan["dependency_specs"],
+        "external_specs": scan["external_specs"],
+        # Where each function's code sits in the file, for lazy_code records
+        "code_spans": function_byte_spans(content, scan["functions"]),
+        # Of the file's bytes, so FunctionBodyReader can check the file itself
+        "content_hash": git_blob_sha(data),
+    }, status
+
+def _timed_extract(file_path, read):
+    """
+    The per-file stage in a worker process, with its timings: (file_result,
+    encoding or skip reason, (read wall, read CPU, extract wall, extract CPU) seconds).
+    read returns (bytes, None) or (None, skip reason), like read_file_bytes.
+    """
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    data, status = read(file_path)
+    read_wall, read_cpu = time.perf_counter(), time.process_time()
+    file_result = None
+    if data is not None:
+        file_result, status = _extract_content_result(file_path, data)
+    return file_result, status, (read_wall - start_wall, read_cpu - start_cpu,
+                                 time.perf_counter() - read_wall, time.process_time() - read_cpu)
+
+def _extract_batch(file_paths, max_file_size):
+    return [_timed_extract(file_path, lambda path: read_file_bytes(path, max_file_size)) for file_path in file_paths]
+
+def _extract_content_batch(files_with_data):
+    return [_timed_extract(file_path, lambda _: read) for file_path, read in files_with_data]
+
+def _chunk(items, chunk_size):
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+def _read_chunks(chunks, source, metrics):
+    for chunk in chunks:
+        with metrics.stage('read'):
+            files_with_data = [(file_path, source.read_bytes(file_path)) for file_path in chunk]
+        yield files_with_data
+
+def _map_bounded(executor, func, items, window):
+    """
+    Like executor.map, but only window items are submitted and not yet
+    consumed at any time, so items (and what they hold) are only produced as
+    results are used. Results are yielded in order.
+    """
+    items = iter(items)
+    pending = deque(executor.submit(func, item) for item in islice(items, window))
+    while pending:
+        result = pending.popleft().result()
+        # Refill before handing the result over, so the workers stay busy
+        pending.extend(executor.submit(func, item) for item in islice(items, 1))
+        yield result
+
+def _extract_files(file_paths, source, workers=1, metrics=None):
+    """
+    Runs the per-file stage, either inline or fanned out over a process pool in
+    chunked batches. Yields (file_result, encoding or skip reason, seconds to
+    read and extract) in the order of file_paths. Sources that can't be read
+    from other processes are read here and the bytes are shipped to the workers.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics()
+    if workers <= 1 or len(file_paths) < 2:
+        for file_path in file_paths:
+            start = time.perf_counter()
+            with metrics.stage('read'):
+                data, status = source.read_bytes(file_path)
+            file_result = None
+            if data is not None:
+                file_result, status = _extract_content_result(file_path, data)
+            yield file_result, status, time.perf_counter() - start
+        return
+
+    chunk_size = max(1, min(256, len(file_paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if source.reads_in_workers:
+            chunks = _chunk(file_paths, chunk_size)
+            batches = executor.map(_extract_batch, chunks, [source.max_file_size] * len(chunks))
+        else:
+            # The files are read here, a few chunks ahead of the workers rather than all at once
+            batches = _map_bounded(executor, _extract_content_batch,
+                                   _read_chunks(_chunk(file_paths, chunk_size), source, metrics), 2 * workers)
+        # executor.map preserves submission order, so merging stays deterministic
+        for batch_results in batches:
+            for file_result, status, (read_wall, read_cpu, extract_wall, extract_cpu) in batch_results:
+                metrics.add_worker_time('read', read_wall, read_cpu)
+                metrics.add_worker_time('extract', extract_wall, extract_cpu)
+                yield file_result, status, read_wall + extract_wall
+
+def _iter_file_results(all_repo_files, source, workers=1, result_cache=None, blob_shas=None, metrics=None):
+    """
+    Yields (abs_path, file_result, status, seconds) in the order of
+    all_repo_files, taking results from the cache where the blob SHA is known
+    (status and seconds are then None) and extracting the rest. status is the
+    encoding the file was decoded with, or why it was skipped.
+    """
+    blob_shas = blob_shas or {}
+    if metrics is None:
+        metrics = PipelineMetrics()
+
+    def cache_key(file_path):
+        return blob_shas.get(file_path), ANALYZER_VERSION, os.path.splitext(file_path)[1]
+
+    if result_cache is None:
+        to_extract = all_repo_files
+    else:
+        with metrics.stage('cache'):
+            to_extract = [
+                file_path for file_path in all_repo_files
+                if file_path not in blob_shas or not result_cache.has_file_result(*cache_key(file_path))
+            ]
+    extracted = _extract_files(to_extract, source, workers, metrics)
+    to_extract = set(to_extract)
 
     for file_path in all_repo_files:
-        content = read_file_content(file_path)
-        if content is None:
-            continue
+        status = seconds = None
+        if file_path in to_extract:
+            file_result, status, seconds = next(extracted)
+            if result_cache is not None and file_result is not None and file_path in blob_shas:
+                with metrics.stage('cache'):
+                    result_cache.put_file_result(*cache_key(file_path), file_result)
+        else:
+            with metrics.stage('cache'):
+                file_result = result_cache.get_file_result(*cache_key(file_path))
+        yield file_path, file_result, status, seconds
+
+def _build_file_entry(abs_path, repo_root_path, file_result, repo_index, source, lazy_code=False):
+    """
+    Turns a content-only file result into an output record by resolving its
+    imports against the current repo index. With lazy_code, function code is
+    replaced by code_refs (see function_bodies.lazy_functions).
+    Returns (file_entry, abs_dependencies).
+    """
+    # Ensure dependencies is always a list
+    abs_dependencies = _resolve_dependency_specs(file_result["dependency_specs"], abs_path, repo_index) or []
+    file_path = os.path.relpath(abs_path, repo_root_path)
+    functions = file_result["functions"]
+    if lazy_code:
+        functions = lazy_functions(functions, file_result["code_spans"], file_path, file_result["content_hash"])
+
+    file_entry = {
+        "file_path": file_path,
+        "metadata": source.file_metadata(abs_path),
+        "language": file_result["language"],
+        "functions": functions,  # Now includes both name and code
+        "dependencies": [os.path.relpath(dep, repo_root_path) for dep in abs_dependencies],
+        "used_functions_from_dependencies_hints": [],
+        "external_libraries": _resolve_external_import_specs(file_result["external_specs"], abs_path, repo_index)
+    }
+    return file_entry, abs_dependencies
+
+def _used_dependency_functions(content, dependency_functions):
+    """
+    Hints ("dep.py:func") for the dependency functions whose names appear in
+    content as whole identifiers, so `get` doesn't match inside `get_user`.
+    dependency_functions is [(dep_path, [function names])]. The content is
+    tokenised once and every name is a set lookup, so a hub file importing
+    dozens of large modules still costs a single pass.
+    """
+    identifiers = set(IDENTIFIER_TOKEN.findall(content))
+    return [
+        f"{os.path.basename(dep_path)}:{func_name}"
+        for dep_path, func_names in dependency_functions
+        for func_name in func_names
+        # JS private methods (#name) are used as this.#name
+        if func_name.lstrip('#') in identifiers
+    ]
+
+def iter_repository_records(repo_root_path, workers=1, result_cache=None, source=None, lazy_code=False,
+                            blob_store=None, metrics=None):
+    """
+    Yields one analysis record per file, in sorted path order.
+
+    The per-file stage results are spilled to a temporary JSON Lines file so
+    that only function names and dependency lists stay in memory while the
+    cross-file hints are computed; file contents are re-read for that pass.
+
+    With a result_cache (see result_cache.ResultCache), only files whose blob
+    SHA is new are re-extracted, and hints are only recomputed for changed
+    files and the files that import them. Dependencies are re-resolved from
+    the cached import specs for every file, which is a few index lookups.
+
+    source defaults to the working tree at repo_root_path; pass a
+    git_objects.GitTreeSource to analyse a commit without a checkout.
+
+    lazy_code stores a code_ref (path, byte span, content hash) in place of
+    each function's code. With a blob_store (function_bodies.BlobStore), the
+    contents of those files are also saved there, so
+    function_bodies.FunctionBodyReader can fetch bodies after the clone is gone.
+
+    metrics (a metrics.PipelineMetrics) collects stage timings, the slowest
+    files and counts of files, bytes, imports, functions and hints.
 
-        abs_path = os.path.abspath(file_path)
-        file_content_cache[abs_path] = content
-
-        metadata = extract_file_metadata(abs_path)
-        language = detect_programming_language(content, metadata["file_type"])
-        
-        # Extract functions with their code
-        functions_with_code = extract_function_definitions_with_code(content, language)
-        defined_functions = [func["name"] for func in functions_with_code]
-        file_defined_functions_cache[abs_path] = defined_functions or []
-
-        processed_files_data.append({
-            "file_path": os.path.relpath(abs_path, repo_root_path),
-            "metadata": metadata,
-            "language": language,
-            "functions": functions_with_code,  # Now includes both name and code
-            "dependencies": [],
-            "used_functions_from_dependencies_hints": [],
-            "external_libraries": find_external_imports(content, file_path, all_repo_files)
-        })
-
-    for file_entry in processed_files_data:
-        abs_file_path = os.path.abspath(os.path.join(repo_root_path, file_entry["file_path"]))
-        content = file_content_cache.get(abs_file_path, "")
-
-        # Ensure dependencies is always a list
-        abs_dependencies = find_dependencies(content, abs_file_path, all_repo_files_set) or []
-
-        file_entry["dependencies"] = [
-            os.path.relpath(dep, repo_root_path) for dep in abs_dependencies
-        ]
-
-        used_hints = []
-        for dep_path in abs_dependencies:
-            for func_name in file_defined_functions_cache.get(dep_path, []):
-                if func_name in content:
-                    used_hints.append(f"{os.path.basename(dep_path)}:{func_name}")
-
-        file_entry["used_functions_from_dependencies_hints"] = used_hints
-
-    return json.dumps(processed_files_data, indent=2)
\ No newline at end of file
+    Files skipped when read (see read_source) get no record, and
+    dependencies on them are dropped, so every dependency is a recorded file.
+    """
+    if source is None:
+        source = WorkingTreeSource(repo_root_path)
+    if metrics is None:
+        metrics = PipelineMetrics()
+    with metrics.stage('discover'):
+        all_repo_files = source.list_files()
+    metrics.count("files_discovered", len(all_repo_files))
+    for reason, count in getattr(source, "discovery_stats", {}).items():
+        metrics.count(reason, count)
+    with metrics.stage('resolve'):
+        repo_index = RepoIndex(all_repo_files, repo_root_path)
+    file_dependencies_cache = {}
+    file_defined_functions_cache = {}
+
+    blob_shas = {}
+    previous_state = {}
+    repo_key = os.path.abspath(repo_root_path)
+    if result_cache is not None:
+        with metrics.stage('cache'):
+            blob_shas = source.blob_shas(all_repo_files)
+            previous_state = result_cache.get_repo_state(repo_key, ANALYZER_VERSION)
+    changed_files = set()
+    skipped_files = set()
+
+    with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as spill_file:
+        # Nothing is yielded until the second pass, so the whole first pass can be one stage
+        with metrics.stage('extract'):
+            file_results = _iter_file_results(all_repo_files, source, workers, result_cache, blob_shas, metrics)
+            for abs_path, file_result, status, seconds in file_results:
+                if file_result is None:
+                    rel_path = os.path.relpath(abs_path, repo_root_path)
+                    print(f"Skipping {rel_path}: {status}")
+                    metrics.skip_file(rel_path, status)
+                    skipped_files.add(abs_path)
+                    continue
+                if seconds is None:
+                    metrics.count("files_from_cache")
+                else:
+                    metrics.count("files_extracted")
+                    metrics.record_file(os.path.relpath(abs_path, repo_root_path), seconds)
+                    if status != FALLBACK_ENCODINGS[0]:
+                        metrics.count("files_decoded_" + status.replace("-", "_"))
+                with metrics.stage('resolve'):
+                    file_entry, abs_dependencies = _build_file_entry(
+                        abs_path, repo_root_path, file_result, repo_index, source, lazy_code
+                    )
+                if lazy_code and blob_store is not None and file_result["functions"] \
+                        and not blob_store.has(file_result["content_hash"]):
+                    # Keyed by the file's blob SHA but holding the decoded text, which code_ref spans index
+                    blob_store.put((source.read_file(abs_path) or "").encode("utf-8"), file_result["content_hash"])
+
+                metrics.count("bytes", file_entry["metadata"]["file_size"] or 0)
+                metrics.count("functions", len(file_entry["functions"]))
+                metrics.count("imports", len(file_result["dependency_specs"]) + len(file_result["external_specs"]))
+
+                previous = previous_state.get(file_entry["file_path"])
+                if previous is None or previous[0] != blob_shas.get(abs_path):
+                    changed_files.add(abs_path)
+
+                file_dependencies_cache[abs_path] = abs_dependencies
+                # Methods of different classes can share a name; hint each name once
+                file_defined_functions_cache[abs_path] = list(dict.fromkeys(func["name"] for func in file_entry["functions"]))
+                spill_file.write(json.dumps(file_entry))
+                spill_file.write("\n")
+
+        if result_cache is not None:
+            with metrics.stage('cache'):
+                result_cache.commit()
+
+        repo_state = {}
+        spill_file.seek(0)
+        for line in spill_file:
+            with metrics.stage('hints'):
+                file_entry = json.loads(line)
+                abs_file_path = os.path.abspath(os.path.join(repo_root_path, file_entry["file_path"]))
+                abs_dependencies = file_dependencies_cache.get(abs_file_path, [])
+                if skipped_files and any(dep_path in skipped_files for dep_path in abs_dependencies):
+                    # Skipped files are still in the repo index but have no record to point to
+                    abs_dependencies = [dep_path for dep_path in abs_dependencies if dep_path not in skipped_files]
+                    file_entry["dependencies"] = [os.path.relpath(dep, repo_root_path) for dep in abs_dependencies]
+                metrics.count("dependencies", len(abs_dependencies))
+
+                previous = previous_state.get(file_entry["file_path"])
+                hints_unchanged = (
+                    abs_file_path not in changed_files
+                    and sorted(previous[1]) == sorted(file_entry["dependencies"])
+                    and not any(dep_path in changed_files for dep_path in abs_dependencies)
+                )
+
+                if hints_unchanged:
+                    used_hints = previous[2]
+                    metrics.count("hints_reused")
+                else:
+                    used_hints = []
+                    dependency_functions = [
+                        (dep_path, file_defined_functions_cache[dep_path])
+                        for dep_path in abs_dependencies if file_defined_functions_cache.get(dep_path)
+                    ]
+                    if dependency_functions:
+                        content = source.read_file(abs_file_path) or ""
+                        used_hints = _used_dependency_functions(content, dependency_functions)
+
+                metrics.count("hints", len(used_hints))
+                file_entry["used_functions_from_dependencies_hints"] = used_hints
+                if abs_file_path in blob_shas:
+                    repo_state[file_entry["file_path"]] = (
+                        blob_shas[abs_file_path], file_entry["dependencies"], used_hints
+                    )
+            yield file_entry
+
+    if result_cache is not None:
+        with metrics.stage('cache'):
+            result_cache.replace_repo_state(repo_key, ANALYZER_VERSION, repo_state)
+            result_cache.commit()
+
+def process_repository_for_json(repo_root_path, workers=1, result_cache=None):
+    """
+    Returns the whole analysis as one JSON string. Prefer iter_repository_records
+    with serialization.write_analysis for large repositories.
+    """
+    return json.dumps(list(iter_repository_records(repo_root_path, workers, result_cache)), indent=2)
@@ -0,0 +1,163 @@
+import os
+import re
+import tempfile
+from collections import OrderedDict
+
+from src.pipeline.decoding import decode_source
+from src.pipeline.result_cache import git_blob_sha
+
+DEFAULT_BLOB_STORE_DIR = "output/blob_store"
+
+
+def _byte_offsets(content, char_offsets):
+    # Maps character offsets to UTF-8 byte offsets in one pass over content
+    byte_offsets = {}
+    previous_char = previous_byte = 0
+    for offset in sorted(set(char_offsets)):
+        previous_byte += len(content[previous_char:offset].encode("utf-8", "surrogatepass"))
+        previous_char = offset
+        byte_offsets[offset] = previous_byte
+    return byte_offsets
+
+
+def function_byte_spans(content, functions):
+    """
+    [start_byte, end_byte] of each function's code within the UTF-8 encoded
+    content, or None where the code isn't a verbatim slice of the file.
+    """
+    line_starts = [0]
+    line_starts.extend(match.end() for match in re.finditer("\n", content))
+    char_spans = []
+    for func in functions:
+        code = func.get("code")
+        if code is None:
+            char_spans.append(None)
+            continue
+        start_line = func.get("start_line") or 1
+        search_from = line_starts[start_line - 1] if start_line <= len(line_starts) else 0
+        start = content.find(code, search_from)
+        if start == -1:
+            start = content.find(code)
+        char_spans.append(None if start == -1 else (start, start + len(code)))
+
+    if content.isascii():
+        return [list(span) if span else None for span in char_spans]
+    byte_offsets = _byte_offsets(content, [offset for span in char_spans if span for offset in span])
+    return [[byte_offsets[span[0]], byte_offsets[span[1]]] if span else None for span in char_spans]
+
+
+def lazy_functions(functions, code_spans, file_path, content_hash):
+    """
+    Copies of functions with "code" replaced by a "code_ref" of
+    {path, start_byte, end_byte, content_hash}, where content_hash is the git
+    blob SHA of the file. Functions without a span keep their code inline.
+    """
+    lazy = []
+    for func, span in zip(functions, code_spans):
+        if span is None or "code" not in func:
+            lazy.append(func)
+            continue
+        code_ref = {"path": file_path, "start_byte": span[0], "end_byte": span[1], "content_hash": content_hash}
+        lazy.append({("code_ref" if key == "code" else key): (code_ref if key == "code" else value)
+                     for key, value in func.items()})
+    return lazy
+
+
+class BlobStore:
+    """
+    Content-addressed store of file contents, keyed by git blob SHA and laid
+    out like git's loose objects (ab/cdef...), uncompressed so bodies can be
+    sliced without reading the whole file. The pipeline stores each file's
+    decoded text (UTF-8, \n newlines), which code_ref spans index, under the
+    blob SHA of the file's own bytes.
+    """
+
+    def __init__(self, root=DEFAULT_BLOB_STORE_DIR):
+        self.root = root
+
+    def _path(self, blob_sha):
+        return os.path.join(self.root, blob_sha[:2], blob_sha[2:])
+
+    def has(self, blob_sha):
+        return os.path.exists(self._path(blob_sha))
+
+    def put(self, data, blob_sha=None):
+        """Stores data under blob_sha (by default its own git blob SHA) and returns the SHA."""
+        if blob_sha is None:
+            blob_sha = git_blob_sha(data)
+        path = self._path(blob_sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so concurrent runs never see a partial blob
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return blob_sha
+
+    def read_range(self, blob_sha, start, end):
+        try:
+            with open(self._path(blob_sha), "rb") as f:
+                f.seek(start)
+                return f.read(end - start)
+        except FileNotFoundError:
+            return None
+
+
+class FunctionBodyReader:
+    """
+    Fetches function bodies from code_refs on demand: from the file in the
+    repository if its content still hashes to content_hash, otherwise from the
+    blob store. Recently verified files are kept in a small LRU cache.
+    """
+
+    def __init__(self, repo_root_path=None, blob_store=None, cache_size=16):
+        self.repo_root_path = repo_root_path
+        self.blob_store = blob_store
+        self.cache_size = cache_size
+        self._files = OrderedDict()
+
+    def _repo_file(self, path, content_hash):
+        key = (path, content_hash)
+        if key in self._files:
+            self._files.move_to_end(key)
+            return self._files[key]
+        data = None
+        try:
+            with open(os.path.join(self.repo_root_path, path), "rb") as f:
+                data = f.read()
+        except OSError:
+            pass
+        if data is not None and git_blob_sha(data) != content_hash:
+            # Analyses from before content_hash covered the file's bytes hashed its text with \n newlines
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            if git_blob_sha(data) != content_hash:
+                data = None
+        if data is not None:
+            # Spans index the decoded text, as the pipeline read it
+            data = decode_source(data)[0].encode("utf-8")
+        self._files[key] = data
+        if len(self._files) > self.cache_size:
+            self._files.popitem(last=False)
+        return data
+
+    def read(self, code_ref):
+        """The function body for code_ref, or None if neither copy is available."""
+        start, end = code_ref["start_byte"], code_ref["end_byte"]
+        data = None
+        if self.repo_root_path is not None:
+            file_data = self._repo_file(code_ref["path"], code_ref["content_hash"])
+            if file_data is not None:
+                data = file_data[start:end]
+        if data is None and self.blob_store is not None:
+            data = self.blob_store.read_range(code_ref["content_hash"], start, end)
+        return data.decode("utf-8", "replace") if data is not None else None
+
+
+def function_code(func, reader=None):
+    """A function's code, inline or fetched through reader for lazy records."""
+    if "code" in func:
+        return func["code"]
+    if "code_ref" in func and reader is not None:
+        return reader.read(func["code_ref"])
+    return None
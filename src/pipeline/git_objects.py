@@ -0,0 +1,188 @@
+import os
+import subprocess
+
+from src.pipeline.file_processing import (
+    DEFAULT_DENY_DIRS, DEFAULT_MAX_FILE_SIZE, VALID_EXTENSIONS, _has_minified_name, _is_in_denied_dir,
+    iter_repository_records, source_from_bytes
+)
+from src.pipeline.metrics import PipelineMetrics
+
+
+class GitBlobReader:
+    """
+    One long-lived `git cat-file --batch` process that blob contents are
+    streamed through, instead of one subprocess (or one checkout) per file.
+    In a --filter=blob:none clone, git fetches missing blobs on demand.
+    """
+
+    def __init__(self, git_dir):
+        self.process = subprocess.Popen(
+            ["git", "--git-dir", git_dir, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def read_blob(self, blob_sha):
+        self.process.stdin.write(blob_sha.encode("ascii") + b"\n")
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            # "<sha> missing" or "<sha> ambiguous"
+            return None
+        size = int(header[2])
+        data = self.process.stdout.read(size)
+        self.process.stdout.read(1)  # trailing newline
+        return data
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+            self.process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def resolve_git_dir(repo_path):
+    completed = subprocess.run(
+        ["git", "-C", repo_path, "rev-parse", "--absolute-git-dir"],
+        capture_output=True, text=True, check=True
+    )
+    return completed.stdout.strip()
+
+
+def is_partial_clone(git_dir):
+    completed = subprocess.run(
+        ["git", "--git-dir", git_dir, "config", "--get-regexp",
+         r"^(extensions\.partialclone|remote\..*\.promisor)$"],
+        capture_output=True, text=True
+    )
+    return any(
+        line.split()[-1].lower() not in ("false", "0")
+        for line in completed.stdout.splitlines() if line.strip()
+    )
+
+
+def list_tree_blobs(git_dir, commit="HEAD", with_sizes=True, deny_dirs=DEFAULT_DENY_DIRS,
+                    max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    Returns [(relative_path, blob_sha, size)] for every analysable file in the
+    commit's tree, in path order, applying the same deny-list, size cap and
+    *.min.* rule as discover_and_filter_files. Without with_sizes only tree objects are read,
+    so no blob has to be present locally, and size is None.
+    """
+    args = ["git", "--git-dir", git_dir, "ls-tree", "-r", "-z", "--full-tree"]
+    if with_sizes:
+        args.append("-l")
+    completed = subprocess.run(args + [commit], capture_output=True, check=True)
+
+    blobs = []
+    for entry in completed.stdout.decode("utf-8", "surrogateescape").split("\0"):
+        if not entry:
+            continue
+        info, rel_path = entry.split("\t", 1)
+        fields = info.split()
+        mode, object_type, blob_sha = fields[:3]
+        # Skip symlinks (120000) and submodules (commits)
+        if object_type != "blob" or mode == "120000":
+            continue
+        if os.path.splitext(rel_path)[1] not in VALID_EXTENSIONS or _is_in_denied_dir(rel_path, deny_dirs):
+            continue
+        if _has_minified_name(os.path.basename(rel_path)):
+            continue
+        size = int(fields[3]) if with_sizes else None
+        if size is not None and max_file_size is not None and size > max_file_size:
+            continue
+        blobs.append((rel_path, blob_sha, size))
+
+    return sorted(blobs)
+
+
+class GitTreeSource:
+    """
+    File source for iter_repository_records that reads a commit straight from
+    the object database of a bare or blobless clone, without a working tree.
+
+    Files are addressed by virtual absolute paths under root_path (the git
+    directory) so the rest of the pipeline, including the JSON schema, is the
+    same as for a checkout. Blob sizes aren't known up front in a blobless
+    clone, so max_file_size is also applied when a blob is read.
+    """
+
+    reads_in_workers = False
+
+    def __init__(self, repo_path, commit="HEAD", max_file_size=DEFAULT_MAX_FILE_SIZE):
+        self.git_dir = resolve_git_dir(repo_path)
+        self.root_path = os.path.abspath(repo_path)
+        self.commit = commit
+        self.max_file_size = max_file_size
+        self.blob_reader = None
+        self._blobs = {}
+        # Asking for sizes would fetch every blob of a blobless clone up front
+        with_sizes = not is_partial_clone(self.git_dir)
+        for rel_path, blob_sha, size in list_tree_blobs(self.git_dir, commit, with_sizes,
+                                                        max_file_size=max_file_size):
+            self._blobs[os.path.normpath(os.path.join(self.root_path, rel_path))] = (blob_sha, size)
+
+    def list_files(self):
+        return sorted(self._blobs)
+
+    def read_bytes(self, abs_path):
+        """Like file_processing.read_file_bytes: (bytes, None) or (None, skip reason)."""
+        if self.blob_reader is None:
+            self.blob_reader = GitBlobReader(self.git_dir)
+        blob_sha, size = self._blobs[abs_path]
+        data = self.blob_reader.read_blob(blob_sha)
+        if data is None:
+            return None, "missing"
+        if size is None:
+            self._blobs[abs_path] = (blob_sha, len(data))
+        if self.max_file_size is not None and len(data) > self.max_file_size:
+            return None, "oversized"
+        return data, None
+
+    def read_file(self, abs_path):
+        data, status = self.read_bytes(abs_path)
+        content = None
+        if data is not None:
+            content, status = source_from_bytes(os.path.basename(abs_path), data, None)
+        if content is None:
+            print(f"Skipping {abs_path}: {status}")
+        return content
+
+    def file_metadata(self, abs_path):
+        if self._blobs[abs_path][1] is None:
+            self.read_bytes(abs_path)
+        return {
+            "file_name": os.path.basename(abs_path),
+            "file_type": os.path.splitext(abs_path)[1],
+            "file_size": self._blobs[abs_path][1]
+        }
+
+    def blob_shas(self, abs_paths):
+        return {p: self._blobs[p][0] for p in abs_paths if p in self._blobs}
+
+    def close(self):
+        if self.blob_reader is not None:
+            self.blob_reader.close()
+            self.blob_reader = None
+
+
+def iter_git_tree_records(repo_path, commit="HEAD", workers=1, result_cache=None, lazy_code=False, blob_store=None,
+                          metrics=None, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    iter_repository_records for a commit of a bare or blobless clone. Records
+    have the same schema as for a checkout, with paths relative to the tree root.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics()
+    with metrics.stage('discover'):
+        source = GitTreeSource(repo_path, commit, max_file_size)
+    try:
+        yield from iter_repository_records(source.root_path, workers, result_cache, source, lazy_code, blob_store,
+                                           metrics)
+    finally:
+        source.close()
@@ -0,0 +1,119 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# File names are drawn on the nodes of graphs up to this size; larger ones rely on hover
+LABEL_MAX_NODES = 300
+GRAY_SHADES = ['#1a1a1a', '#404040', '#666666', '#8c8c8c', '#b3b3b3', '#d9d9d9']
+
+
+def graph_arrays(G, positions):
+    """
+    G as arrays: its nodes in order, their float32 (n, 2) positions, and the
+    source and target node indices of every edge.
+    """
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    xy = np.array([positions[node] for node in nodes], dtype=np.float32).reshape(-1, 2)
+    edges = np.fromiter((index[node] for edge in G.edges() for node in edge), dtype=np.int64,
+                        count=2 * G.number_of_edges()).reshape(-1, 2)
+    return nodes, xy, edges[:, 0], edges[:, 1]
+
+
+def edge_segments(xy, sources, targets):
+    """
+    x and y arrays drawing every edge in one line trace: source, target, NaN
+    per edge, where the NaN breaks the line.
+    """
+    segments = np.full((len(sources), 3, 2), np.nan, dtype=np.float32)
+    segments[:, 0] = xy[sources]
+    segments[:, 1] = xy[targets]
+    segments = segments.reshape(-1, 2)
+    return np.ascontiguousarray(segments[:, 0]), np.ascontiguousarray(segments[:, 1])
+
+
+def dependency_figure(G, node_info, positions):
+    """
+    The file dependency graph as WebGL (Scattergl) traces built from NumPy
+    arrays: one trace for all edges and one node trace per file type. Hover
+    text is formatted in the browser from per-node customdata, so no
+    per-node strings are built here besides the paths. Returns the figure
+    and the {file type: colour} legend.
+    """
+    nodes, xy, sources, targets = graph_arrays(G, positions)
+    node_count = len(nodes)
+    edge_x, edge_y = edge_segments(xy, sources, targets)
+
+    file_types = np.array([node_info[node]['file_type'] for node in nodes], dtype=object)
+    lines_of_code = np.array([node_info[node]['lines_of_code'] for node in nodes], dtype=np.int32)
+    dependencies = np.array([node_info[node]['dependencies'] for node in nodes], dtype=np.int32)
+    customdata = np.column_stack([
+        lines_of_code,
+        dependencies,
+        np.bincount(targets, minlength=node_count),
+        np.bincount(sources, minlength=node_count),
+    ]).astype(np.int32)
+    sizes = np.clip(lines_of_code / 10, 10, 50).astype(np.float32)
+    names = np.array([node.split('/')[-1] for node in nodes], dtype=object) if node_count <= LABEL_MAX_NODES else None
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=edge_x, y=edge_y,
+        line=dict(width=1, color='#999999'),
+        hoverinfo='skip',
+        mode='lines',
+        name='Dependencies'
+    ))
+
+    type_to_color = {}
+    for position, file_type in enumerate(sorted(set(file_types))):
+        type_to_color[file_type] = GRAY_SHADES[position % len(GRAY_SHADES)]
+        members = np.flatnonzero(file_types == file_type)
+        fig.add_trace(go.Scattergl(
+            x=xy[members, 0], y=xy[members, 1],
+            mode='markers+text' if names is not None else 'markers',
+            marker=dict(
+                size=sizes[members],
+                color=type_to_color[file_type],
+                line=dict(width=1, color='#000000'),
+                opacity=0.9
+            ),
+            text=names[members] if names is not None else None,
+            textposition="middle center",
+            textfont=dict(size=8, color="white", family="Inter, sans-serif"),
+            hovertext=[nodes[i] for i in members],
+            customdata=customdata[members],
+            hovertemplate=(
+                "<b>%{hovertext}</b><br>"
+                f"File Type: {file_type}<br>"
+                "Lines of Code: %{customdata[0]}<br>"
+                "Dependencies: %{customdata[1]}<br>"
+                "In-degree: %{customdata[2]}<br>"
+                "Out-degree: %{customdata[3]}<extra></extra>"
+            ),
+            name=file_type
+        ))
+
+    fig.update_layout(
+        title=dict(
+            text=f"Dependency Graph - {node_count} files, {len(sources)} dependencies",
+            x=0.5,
+            font=dict(size=16, family="Inter, sans-serif", color='#000000')
+        ),
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=20,l=5,r=5,t=40),
+        annotations=[dict(
+            text="Node size represents lines of code | Color represents file type",
+            showarrow=False,
+            xref="paper", yref="paper",
+            x=0.005, y=-0.002,
+            xanchor='left', yanchor='bottom',
+            font=dict(color="#666666", size=11, family="Inter, sans-serif")
+        )],
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        paper_bgcolor='#ffffff',
+        plot_bgcolor='#ffffff',
+        height=600
+    )
+    return fig, type_to_color
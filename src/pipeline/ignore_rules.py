@@ -0,0 +1,123 @@
+import os
+import re
+
+
+def _glob_to_regex(pattern):
+    """
+    Translates one gitignore glob (without leading/trailing slashes) into a
+    regex body matched against '/'-separated relative paths.
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex += "[" + body.replace("\\", "\\\\") + "]"
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+def parse_gitignore_line(line):
+    """
+    Returns (compiled_regex, negate, dir_only) for one .gitignore line, or None
+    for blank lines and comments.
+    """
+    line = line.rstrip("\n").rstrip("\r")
+    # Trailing spaces are ignored unless escaped
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+    if not line or line.startswith("#"):
+        return None
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+    anchored = "/" in line
+    line = line.lstrip("/")
+    prefix = "^" if anchored else "^(?:.*/)?"
+    return re.compile(prefix + _glob_to_regex(line) + "$"), negate, dir_only
+
+
+class IgnoreRules:
+    """
+    .gitignore rules collected while walking a tree. Rules from a directory's
+    .gitignore apply to everything below it, later rules override earlier ones
+    and nested files override their parents, as in git.
+    """
+
+    def __init__(self, repo_root_path):
+        self.repo_root_path = os.path.abspath(repo_root_path)
+        self._rules_by_dir = {}
+
+    def load_directory(self, dir_path):
+        """Reads dir_path/.gitignore, if any. Call before checking its entries."""
+        gitignore_path = os.path.join(dir_path, ".gitignore")
+        if not os.path.isfile(gitignore_path):
+            return
+        rules = []
+        try:
+            with open(gitignore_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    rule = parse_gitignore_line(line)
+                    if rule is not None:
+                        rules.append(rule)
+        except OSError:
+            return
+        if rules:
+            rel_dir = os.path.relpath(os.path.abspath(dir_path), self.repo_root_path)
+            self._rules_by_dir["" if rel_dir == "." else rel_dir.replace(os.sep, "/")] = rules
+
+    def is_ignored(self, path, is_dir=False):
+        rel_path = os.path.relpath(os.path.abspath(path), self.repo_root_path).replace(os.sep, "/")
+        ignored = False
+        # Walk the .gitignore files from the root down so deeper ones win
+        parts = rel_path.split("/")
+        for depth in range(len(parts)):
+            base = "/".join(parts[:depth])
+            rules = self._rules_by_dir.get(base)
+            if not rules:
+                continue
+            rel_to_base = "/".join(parts[depth:])
+            for regex, negate, dir_only in rules:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(rel_to_base):
+                    ignored = not negate
+        return ignored
@@ -0,0 +1,334 @@
+import bisect
+import re
+
+IDENTIFIER = r'[A-Za-z_$][\w$]*'
+# A parameter list, allowing one level of nested parentheses (default values, types)
+PARAMS = r'\((?:[^()]|\([^()]*\))*\)'
+
+# Tokens the lexer has to look at; everything else is skipped by the regex engine
+_LEXER_TOKENS = re.compile(r"""//[^\n]*|/\*.*?(?:\*/|\Z)|'(?:[^'\\\n]|\\.)*'?|"(?:[^"\\\n]|\\.)*"?|[`{}/]""", re.S)
+_TEMPLATE_STOPS = re.compile(r'\\.|`|\$\{', re.S)
+_REGEX_LITERAL = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*')
+# After these characters or keywords a '/' starts a regex literal rather than a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                   'void', 'throw', 'instanceof', 'yield', 'await'}
+_TRAILING_WORD = re.compile(r'[\w$]+$')
+# A string right after one of these is a module specifier: `from "x"`, `import "x"`
+_IMPORT_KEYWORDS = {'from', 'import'}
+# ... and inside one of these calls: `require("x")`, `import("x")`
+_IMPORT_CALLS = {'require', 'import'}
+_NOT_NEWLINE = re.compile(r'[^\n]')
+
+# One alternation for every declaration form, run over the masked source
+_DECLARATIONS = re.compile(
+    # Cheap first-character check so most offsets are rejected before the alternation
+    r'(?=[aceflv])\b(?:'
+    r'(?P<function>(?:\bexport\s+(?:default\s+)?)?(?:\basync\s+)?\bfunction\b\s*\*?\s*'
+    r'(?P<function_name>' + IDENTIFIER + r')\s*(?:<[^>(]*>)?\s*\()'
+    r'|(?P<variable>(?:\bexport\s+)?\b(?:const|let|var)\s+(?P<variable_name>' + IDENTIFIER + r')'
+    r'\s*(?::[^=;]+)?=\s*(?:async\s+)?'
+    r'(?:(?P<variable_function>function\b\s*\*?\s*(?:' + IDENTIFIER + r')?\s*\()'
+    r'|(?:' + PARAMS + '|' + IDENTIFIER + r')\s*(?::\s*[^=;{]+?)?\s*=>))'
+    r'|(?P<class>(?:\bexport\s+(?:default\s+)?)?(?:\babstract\s+)?\bclass\s+(?P<class_name>' + IDENTIFIER + r')[^{;]*\{))'
+)
+
+# Class members, only accepted directly inside a class body
+_CLASS_MEMBERS = re.compile(
+    r'(?<=[{};\n])[ \t]*'
+    r'(?:(?:public|private|protected|static|async|readonly|override|abstract|get|set)\s+)*(?:\*\s*)?'
+    r'(?:(?P<method>#?' + IDENTIFIER + r')\s*(?:<[^>(]*>)?\s*\('
+    r'|(?P<field>#?' + IDENTIFIER + r')\s*(?::[^=;]+)?=\s*(?:async\s+)?'
+    r'(?:' + PARAMS + '|' + IDENTIFIER + r')\s*(?::\s*[^=;{]+?)?\s*=>)'
+)
+# Keywords the member pattern would otherwise take for method names
+_NOT_METHODS = {'if', 'for', 'while', 'switch', 'catch', 'function', 'return'}
+
+
+def _regex_allowed(content, pos):
+    # JSX self-closing (<Item />) and closing (</ul>) tags, never a regex literal
+    if content.startswith('/>', pos):
+        return False
+    i = pos - 1
+    while i >= 0 and content[i] in ' \t\r\n':
+        i -= 1
+    if i >= 0 and content[i] == '<':
+        return False
+    if i < 0 or content[i] in _REGEX_PRECEDERS:
+        return True
+    word = _TRAILING_WORD.search(content, max(0, i - 16), i + 1)
+    return bool(word) and word.group() in _REGEX_KEYWORDS
+
+
+def _skip_template(content, pos):
+    """pos is just after an opening backtick; returns the offset after the closing one."""
+    while True:
+        stop = _TEMPLATE_STOPS.search(content, pos)
+        if stop is None:
+            return len(content)
+        if stop.group() == '`':
+            return stop.end()
+        if stop.group() == '${':
+            pos = _skip_braced_expression(content, stop.end())
+        else:
+            pos = stop.end()
+
+
+def _skip_braced_expression(content, pos):
+    depth = 1
+    while True:
+        token = _LEXER_TOKENS.search(content, pos)
+        if token is None:
+            return len(content)
+        text = token.group()
+        pos = token.end()
+        if text == '{':
+            depth += 1
+        elif text == '}':
+            depth -= 1
+            if depth == 0:
+                return pos
+        elif text == '`':
+            pos = _skip_template(content, pos)
+        elif text == '/' and _regex_allowed(content, token.start()):
+            literal = _REGEX_LITERAL.match(content, token.start())
+            if literal is not None:
+                pos = literal.end()
+
+
+def lex(content, strings=None):
+    """
+    Finds strings, comments, template and regex literals, and braces.
+    Returns (masked, brace_opens, brace_closes, brace_parents):
+
+    - masked: content with every string/comment/literal blanked to spaces
+      (newlines kept), so declaration regexes can't match inside them;
+      offsets are unchanged
+    - brace_opens[i] / brace_closes[i]: offsets of the i-th '{' and its '}'
+    - brace_parents[i]: index of the enclosing '{', or -1
+
+    If strings is a list, the (start, end) offsets of every quoted string
+    literal are appended to it.
+    """
+    pieces = []
+    last = 0
+    opens, closes, parents = [], [], []
+    stack = []
+    pos = 0
+    length = len(content)
+
+    while pos < length:
+        token = _LEXER_TOKENS.search(content, pos)
+        if token is None:
+            break
+        start, text = token.start(), token.group()
+        end = token.end()
+
+        if text == '{':
+            opens.append(start)
+            closes.append(length - 1)
+            parents.append(stack[-1] if stack else -1)
+            stack.append(len(opens) - 1)
+        elif text == '}':
+            if stack:
+                closes[stack.pop()] = start
+        else:
+            if text == '`':
+                end = _skip_template(content, end)
+            elif text == '/':
+                literal = _REGEX_LITERAL.match(content, start) if _regex_allowed(content, start) else None
+                if literal is None:
+                    pos = end
+                    continue
+                end = literal.end()
+            elif strings is not None and text[0] in '"\'':
+                strings.append((start, end))
+            pieces.append(content[last:start])
+            pieces.append(_NOT_NEWLINE.sub(' ', content[start:end]))
+            last = end
+        pos = end
+
+    pieces.append(content[last:])
+    return ''.join(pieces), opens, closes, parents
+
+
+class _Braces:
+    def __init__(self, opens, closes, parents):
+        self.opens = opens
+        self.closes = closes
+        self.parents = parents
+
+    def close_of(self, open_offset):
+        i = bisect.bisect_left(self.opens, open_offset)
+        if i < len(self.opens) and self.opens[i] == open_offset:
+            return self.closes[i]
+        return None
+
+    def enclosing(self, offset):
+        """Index of the innermost '{' whose block contains offset, or -1."""
+        i = bisect.bisect_left(self.opens, offset) - 1
+        while i >= 0 and self.closes[i] < offset:
+            i = self.parents[i]
+        return i
+
+
+def _matching_paren(masked, open_offset):
+    depth = 0
+    for i in range(open_offset, len(masked)):
+        char = masked[i]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(masked) - 1
+
+
+def _block_after(masked, braces, pos):
+    """End offset (inclusive) of the '{...}' block that starts at or after pos."""
+    open_offset = masked.find('{', pos)
+    if open_offset == -1:
+        return None
+    # Only whitespace or a return type annotation may sit between ')' and '{'
+    between = masked[pos:open_offset].strip()
+    if between and (not between.startswith(':') or ';' in between or '}' in between):
+        return None
+    return braces.close_of(open_offset)
+
+
+def _expression_end(masked, pos):
+    """End offset (exclusive) of an arrow function's expression body."""
+    depth = 0
+    length = len(masked)
+    while pos < length and masked[pos] in ' \t\r\n':
+        pos += 1
+    for i in range(pos, length):
+        char = masked[i]
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            if depth == 0:
+                return i
+            depth -= 1
+        elif depth == 0 and char in ';,\n':
+            return i
+    return length
+
+
+def _function_end(masked, braces, match_end, is_arrow):
+    if is_arrow:
+        rest = masked[match_end:match_end + 200].lstrip()
+        if rest.startswith('{'):
+            return braces.close_of(masked.index('{', match_end)) + 1
+        return _expression_end(masked, match_end)
+    close_paren = _matching_paren(masked, match_end - 1)
+    close_brace = _block_after(masked, braces, close_paren + 1)
+    if close_brace is None:
+        # A declaration without a body (overload signature, abstract method)
+        return None
+    return close_brace + 1
+
+
+def _word_before(masked, pos):
+    """The identifier that ends at pos (ignoring whitespace), unless it is a property (`a.from`)."""
+    while pos > 0 and masked[pos - 1] in ' \t\r\n':
+        pos -= 1
+    word = _TRAILING_WORD.search(masked, max(0, pos - 16), pos)
+    if word is None or (word.start() > 0 and masked[word.start() - 1] == '.'):
+        return None
+    return word.group()
+
+
+def _import_specs(content, masked, strings):
+    specs = []
+    for start, end in strings:
+        if end - start < 2 or content[end - 1] != content[start]:
+            continue
+        pos = start
+        while pos > 0 and masked[pos - 1] in ' \t\r\n':
+            pos -= 1
+        if pos > 0 and masked[pos - 1] == '(':
+            is_import = _word_before(masked, pos - 1) in _IMPORT_CALLS
+        else:
+            is_import = _word_before(masked, pos) in _IMPORT_KEYWORDS
+        if is_import:
+            specs.append(content[start + 1:end - 1])
+    return specs
+
+
+def scan_js(content):
+    """
+    (functions, import_specs) of a JS/TS file from a single lex: functions as
+    by extract_js_functions, and the module specifiers of `import ... from "x"`,
+    `export ... from "x"`, `import "x"`, `import("x")` and `require("x")`, in
+    source order. Specifiers inside comments, strings and templates are ignored.
+    """
+    strings = []
+    masked, opens, closes, parents = lex(content, strings)
+    return _functions(content, masked, opens, closes, parents), _import_specs(content, masked, strings)
+
+
+def extract_js_functions(content):
+    """
+    Every named function, arrow function bound to a variable and class member
+    function in a JS/TS file, with qualified_name (Class.method), code,
+    start_line and end_line. Braces inside strings, comments, template and
+    regex literals don't affect where a function ends.
+    """
+    return _functions(content, *lex(content))
+
+
+def _functions(content, masked, opens, closes, parents):
+    braces = _Braces(opens, closes, parents)
+    line_starts = [0] + [m.end() for m in re.finditer(r'\n', content)]
+    functions = []
+
+    def add(name, qualified_name, start, end):
+        while content[start] in ' \t\r\n':
+            start += 1
+        # Start at the beginning of the line when only indentation precedes the declaration
+        line_start = line_starts[bisect.bisect_right(line_starts, start) - 1]
+        if not content[line_start:start].strip():
+            start = line_start
+        if end < len(content) and content[end] == ';':
+            end += 1
+        functions.append({
+            "name": name,
+            "qualified_name": qualified_name,
+            "code": content[start:end],
+            "start_line": bisect.bisect_right(line_starts, start),
+            "end_line": bisect.bisect_right(line_starts, max(start, end - 1)),
+            "decorators": [],
+        })
+
+    for match in _DECLARATIONS.finditer(masked):
+        if match.group('class'):
+            class_open = match.end() - 1
+            class_index = bisect.bisect_left(opens, class_open)
+            class_close = braces.close_of(class_open)
+            if class_close is None:
+                continue
+            class_name = match.group('class_name')
+            for member in _CLASS_MEMBERS.finditer(masked, class_open + 1, class_close):
+                name = member.group('method') or member.group('field')
+                name_start = member.start('method') if member.group('method') else member.start('field')
+                if braces.enclosing(name_start) != class_index or name in _NOT_METHODS:
+                    continue
+                end = _function_end(masked, braces, member.end(), is_arrow=bool(member.group('field')))
+                if end is not None:
+                    add(name, f"{class_name}.{name}", member.start(), end)
+            continue
+
+        if match.group('function'):
+            name = match.group('function_name')
+            is_arrow = False
+        else:
+            name = match.group('variable_name')
+            is_arrow = not match.group('variable_function')
+        end = _function_end(masked, braces, match.end(), is_arrow)
+        if end is not None:
+            add(name, name, match.start(), end)
+
+    functions.sort(key=lambda func: func["start_line"])
+    return functions
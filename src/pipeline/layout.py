@@ -0,0 +1,297 @@
+import json
+import os
+import tempfile
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.signal import fftconvolve
+from scipy.spatial import cKDTree
+
+from src.pipeline import serialization
+
+LAYOUT_CACHE_DIR = "output/layout_cache"
+LAYOUT_VERSION = "1"
+LAYOUT_SEED = 42
+# networkx's exact layouts are fine below these sizes; larger graphs use multilevel_layout
+KAMADA_KAWAI_MAX_NODES = 50
+SPRING_MAX_NODES = 500
+# Coarsening stops at this size, or once a level shrinks the graph by less than 10%
+COARSEST_MAX_NODES = 50
+# Above this, repulsion between distant nodes is approximated on a mesh
+EXACT_REPULSION_MAX_NODES = 300
+
+
+def dependency_edges(records):
+    """(file_path, dependency) edges of the analysis records, in record order."""
+    edges = []
+    for record in records:
+        file_path = record.get("file_path", "")
+        for dep in record.get("dependencies", []):
+            edges.append((file_path, dep))
+    return edges
+
+
+def edge_nodes(edges):
+    """Nodes in first-seen order, which is the node order of an nx.DiGraph built from edges."""
+    return list(dict.fromkeys(node for edge in edges for node in edge))
+
+
+def choose_algorithm(node_count):
+    if node_count < KAMADA_KAWAI_MAX_NODES:
+        return "kamada_kawai"
+    if node_count <= SPRING_MAX_NODES:
+        return "spring"
+    return "multilevel"
+
+
+def _undirected_edges(node_count, u, v, weights):
+    """Each undirected edge once (u < v) with merged weights; self-loops are dropped."""
+    keep = u != v
+    low, high = np.minimum(u[keep], v[keep]), np.maximum(u[keep], v[keep])
+    adjacency = sparse.coo_matrix((weights[keep], (low, high)), shape=(node_count, node_count)).tocsr()
+    adjacency = adjacency.tocoo()
+    return adjacency.row.astype(np.int64), adjacency.col.astype(np.int64), adjacency.data
+
+
+def _coarsen(node_count, u, v, weights, node_weights, rng):
+    """
+    Groups nodes for the next coarser level: a random maximal matching that
+    pairs each node with its lightest free neighbour (as in Walshaw's
+    multilevel force-directed placement), after which nodes left without a
+    free neighbour join their lightest neighbouring group, so stars shrink
+    too. Returns (parent group of each node, group count).
+    """
+    adjacency = sparse.coo_matrix((weights, (u, v)), shape=(node_count, node_count))
+    adjacency = (adjacency + adjacency.T).tocsr()
+    indptr, indices = adjacency.indptr, adjacency.indices
+    parent = np.full(node_count, -1, dtype=np.int64)
+    group_weights = np.zeros(node_count)
+    groups = 0
+    unmatched = []
+    for node in rng.permutation(node_count):
+        if parent[node] != -1:
+            continue
+        neighbours = indices[indptr[node]:indptr[node + 1]]
+        free = neighbours[parent[neighbours] == -1]
+        if len(free) == 0:
+            unmatched.append(node)
+            continue
+        partner = free[np.argmin(node_weights[free])]
+        parent[node] = parent[partner] = groups
+        group_weights[groups] = node_weights[node] + node_weights[partner]
+        groups += 1
+
+    for node in unmatched:
+        if parent[node] != -1:
+            continue
+        neighbours = indices[indptr[node]:indptr[node + 1]]
+        if len(neighbours):
+            # Every neighbour was grouped, or this node wouldn't have been left unmatched
+            neighbour_groups = parent[neighbours]
+            group = neighbour_groups[np.argmin(group_weights[neighbour_groups])]
+        else:
+            group = groups
+            groups += 1
+        parent[node] = group
+        group_weights[group] += node_weights[node]
+    return parent, groups
+
+
+def _scatter_add(index, values, node_count):
+    return np.column_stack([
+        np.bincount(index, weights=values[:, 0], minlength=node_count),
+        np.bincount(index, weights=values[:, 1], minlength=node_count),
+    ])
+
+
+def _mesh_repulsion(positions, node_weights, k, min_dist2):
+    """
+    All-pairs k^2/d repulsion in roughly O(n log n), particle-mesh style: node
+    weights are binned on a square mesh, and cells more than one cell apart
+    interact through an FFT convolution of the binned weights with the force
+    kernel. Pairs in the same or adjacent cells are computed exactly.
+    """
+    node_count = len(positions)
+    mesh = int(np.clip(np.sqrt(node_count), 8, 512))
+    low = positions.min(axis=0)
+    cell = max(np.ptp(positions, axis=0).max(), 1e-9) / mesh * (1 + 1e-9)
+    cells = np.minimum(((positions - low) / cell).astype(np.int64), mesh - 1)
+    density = np.bincount(cells[:, 0] * mesh + cells[:, 1], weights=node_weights,
+                          minlength=mesh * mesh).reshape(mesh, mesh)
+
+    offsets = np.arange(-(mesh - 1), mesh)
+    dx = offsets[:, None] * cell + np.zeros(len(offsets))[None, :]
+    dy = offsets[None, :] * cell + np.zeros(len(offsets))[:, None]
+    near = (np.abs(offsets)[:, None] <= 1) & (np.abs(offsets)[None, :] <= 1)
+    scale = np.where(near, 0.0, k * k / np.where(near, 1.0, dx ** 2 + dy ** 2))
+    # mode='same' centres the (2m - 1)-wide kernel, so each cell sees every offset from it
+    force_x = fftconvolve(density, dx * scale, mode='same')
+    force_y = fftconvolve(density, dy * scale, mode='same')
+    displacement = np.column_stack([force_x[cells[:, 0], cells[:, 1]], force_y[cells[:, 0], cells[:, 1]]])
+
+    # Points in adjacent cells are at most 2 * sqrt(2) cells apart
+    pairs = cKDTree(positions).query_pairs(2 * np.sqrt(2) * cell, output_type='ndarray')
+    first, second = pairs[:, 0], pairs[:, 1]
+    first_cells, second_cells = cells[first], cells[second]
+    adjacent = (np.abs(first_cells - second_cells) <= 1).all(axis=1)
+    first, second = first[adjacent], second[adjacent]
+    delta = positions[first] - positions[second]
+    force = delta * (k * k / np.maximum((delta ** 2).sum(axis=1), min_dist2))[:, None]
+    displacement += (_scatter_add(first, force * node_weights[second][:, None], node_count)
+                     - _scatter_add(second, force * node_weights[first][:, None], node_count))
+    return displacement
+
+
+def _force_directed(positions, u, v, weights, node_weights, k, iterations, temperature):
+    """
+    Fruchterman-Reingold iterations: every pair repels with k^2/d, scaled by
+    the other node's weight (the number of original nodes it stands for),
+    and edges attract with d^2/k. Above EXACT_REPULSION_MAX_NODES repulsion
+    is approximated by _mesh_repulsion. Displacements are capped by a
+    temperature that cools linearly.
+    """
+    node_count = len(positions)
+    positions = positions.copy()
+    min_dist2 = (0.01 * k) ** 2
+    for iteration in range(iterations):
+        if node_count <= EXACT_REPULSION_MAX_NODES:
+            delta = positions[:, None, :] - positions[None, :, :]
+            dist2 = np.maximum((delta ** 2).sum(axis=-1), min_dist2)
+            displacement = (delta * (k * k * node_weights[None, :] / dist2)[..., None]).sum(axis=1)
+        else:
+            displacement = _mesh_repulsion(positions, node_weights, k, min_dist2)
+
+        delta = positions[u] - positions[v]
+        force = delta * (np.sqrt((delta ** 2).sum(axis=1)) * weights / k)[:, None]
+        displacement += _scatter_add(v, force, node_count) - _scatter_add(u, force, node_count)
+
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-12)
+        step = temperature * (1 - iteration / iterations)
+        positions += displacement * (np.minimum(length, step) / length)[:, None]
+    return positions
+
+
+def _rescale(positions):
+    """Centres positions on the origin and scales them into [-1, 1], like networkx layouts."""
+    if len(positions) == 0:
+        return positions
+    positions = positions - positions.mean(axis=0)
+    extent = np.abs(positions).max()
+    return positions / extent if extent > 0 else positions
+
+
+def multilevel_layout(node_count, u, v, seed=LAYOUT_SEED):
+    """
+    Multilevel force-directed layout of an undirected graph given as edge
+    index arrays: the graph is coarsened by repeated matching, the coarsest
+    graph is laid out from scratch, and each finer level starts from its
+    parent groups' positions and only needs a few refinement iterations.
+    Each level's natural spring length k follows from the area of the layout
+    it inherits.
+    Returns an (node_count, 2) array of positions in [-1, 1].
+    """
+    rng = np.random.default_rng(seed)
+    u, v, weights = _undirected_edges(node_count, np.asarray(u, dtype=np.int64),
+                                      np.asarray(v, dtype=np.int64), np.ones(len(u)))
+    levels = [(node_count, u, v, weights, np.ones(node_count))]
+    parents = []
+    while levels[-1][0] > COARSEST_MAX_NODES:
+        level_count, u, v, weights, node_weights = levels[-1]
+        parent, groups = _coarsen(level_count, u, v, weights, node_weights, rng)
+        if groups > 0.9 * level_count:
+            break
+        parents.append(parent)
+        levels.append((groups, *_undirected_edges(groups, parent[u], parent[v], weights),
+                       np.bincount(parent, weights=node_weights, minlength=groups)))
+
+    k = 1.0
+    level_count, u, v, weights, node_weights = levels[-1]
+    positions = rng.random((level_count, 2)) * np.sqrt(level_count) * k
+    positions = _force_directed(positions, u, v, weights, node_weights, k, iterations=100,
+                                temperature=0.1 * np.sqrt(level_count) * k)
+    for level in range(len(parents) - 1, -1, -1):
+        level_count, u, v, weights, node_weights = levels[level]
+        # Keep the node density of the coarser layout: about one node per k^2
+        k = max(np.ptp(positions, axis=0).max() / np.sqrt(level_count), 1e-6)
+        positions = positions[parents[level]] + rng.normal(scale=0.1 * k, size=(level_count, 2))
+        positions = _force_directed(positions, u, v, weights, node_weights, k, iterations=30, temperature=2 * k)
+    return _rescale(positions)
+
+
+def compute_layout(nodes, edges, algorithm=None, seed=LAYOUT_SEED):
+    """
+    {node: array([x, y])} in [-1, 1] for a graph given as nodes and edges
+    (directions are ignored). algorithm is "kamada_kawai", "spring" or
+    "multilevel"; by default it is chosen by choose_algorithm.
+    """
+    algorithm = algorithm or choose_algorithm(len(nodes))
+    if algorithm == "multilevel":
+        index = {node: position for position, node in enumerate(nodes)}
+        u = np.fromiter((index[a] for a, _ in edges), dtype=np.int64, count=len(edges))
+        v = np.fromiter((index[b] for _, b in edges), dtype=np.int64, count=len(edges))
+        return dict(zip(nodes, multilevel_layout(len(nodes), u, v, seed)))
+
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    if algorithm == "kamada_kawai":
+        return nx.kamada_kawai_layout(G)
+    return nx.spring_layout(G, seed=seed)
+
+
+class LayoutCache:
+    """Computed layouts on disk, one JSON file per analysis content hash."""
+
+    def __init__(self, root=LAYOUT_CACHE_DIR):
+        self.root = root
+
+    def _path(self, analysis_hash):
+        return os.path.join(self.root, f"{analysis_hash}.json")
+
+    def get(self, analysis_hash, nodes):
+        """The stored layout, or None if there is none for exactly these nodes."""
+        try:
+            with open(self._path(analysis_hash), 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("version") != LAYOUT_VERSION or set(stored["nodes"]) != set(nodes):
+            return None
+        return {node: np.array(xy) for node, xy in zip(stored["nodes"], stored["positions"])}
+
+    def put(self, analysis_hash, positions, algorithm):
+        os.makedirs(self.root, exist_ok=True)
+        stored = {
+            "version": LAYOUT_VERSION,
+            "algorithm": algorithm,
+            "nodes": list(positions),
+            "positions": [[round(float(x), 5), round(float(y), 5)] for x, y in positions.values()],
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(stored, f)
+        os.replace(temp_path, self._path(analysis_hash))
+
+
+def cached_layout(analysis_hash, nodes, edges, cache=None):
+    """The layout stored for the analysis in cache, computing and storing it if missing."""
+    if cache is not None:
+        positions = cache.get(analysis_hash, nodes)
+        if positions is not None:
+            return positions
+    algorithm = choose_algorithm(len(nodes))
+    positions = compute_layout(nodes, edges, algorithm)
+    if cache is not None:
+        cache.put(analysis_hash, positions, algorithm)
+    return positions
+
+
+def precompute_layout(analysis_path, cache=None):
+    """
+    Lays out the dependency graph of a saved analysis into the layout cache,
+    so the dashboard only has to read it.
+    """
+    edges = dependency_edges(serialization.iter_analysis(analysis_path))
+    return cached_layout(serialization.analysis_content_hash(analysis_path), edge_nodes(edges), edges,
+                         cache or LayoutCache())
@@ -0,0 +1,169 @@
+import cProfile
+import heapq
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+from src.pipeline import serialization
+
+METRICS_VERSION = 2
+SLOWEST_FILES = 20
+# Stages that --profile runs under cProfile. Cloning is left out: its time is spent in git subprocesses.
+PROFILED_STAGES = ('discover', 'cache', 'read', 'extract', 'resolve', 'hints', 'serialize',
+                   'cycles', 'hierarchy', 'search_index', 'layout')
+
+
+def peak_rss_bytes(who=None):
+    """
+    Peak resident set size of this process (or, with resource.RUSAGE_CHILDREN,
+    its largest child) since it started. It never goes down, so in a reused
+    worker process it covers every job the process has run.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class PipelineMetrics:
+    """
+    Timers and counters for one pipeline run, saved next to the analysis as
+    <analysis name>.metrics.json.
+
+    Stages nest, and the time spent in an inner stage is charged to it
+    alone, so stage times are exclusive and sum to the instrumented time.
+    A generator must not yield inside a stage, or the consumer's time is
+    charged to it. Work done in worker processes is timed there and kept
+    separately, summed over workers, in worker_stages. With profile=True,
+    every stage in PROFILED_STAGES runs under its own cProfile profiler
+    (main process only).
+
+    Memory comes from ru_maxrss, a high-water mark over the whole process
+    lifetime: process_peak_rss_bytes is that mark when the metrics are
+    taken, and peak_rss_growth_bytes is how far the run raised it. A run in
+    a process that already peaked higher (a reused batch worker) shows a
+    growth of 0 even if it used a lot of memory.
+    """
+
+    def __init__(self, slowest_files=SLOWEST_FILES, profile=False):
+        self.stages = {}
+        self.worker_stages = {}
+        self.counters = Counter()
+        self.slowest_files = slowest_files
+        self._slowest = []
+        self.skipped_files = []
+        self.profile = profile
+        self.profilers = {}
+        self._stack = []
+        self._mark = None
+        self._start = (time.perf_counter(), time.process_time())
+        self._start_peak_rss = peak_rss_bytes()
+
+    def _pause(self):
+        # Charges the innermost running stage up to now
+        if not self._stack:
+            return
+        name = self._stack[-1]
+        profiler = self.profilers.get(name)
+        if profiler is not None:
+            profiler.disable()
+        totals = self.stages[name]
+        totals[0] += time.perf_counter() - self._mark[0]
+        totals[1] += time.process_time() - self._mark[1]
+
+    def _resume(self):
+        if not self._stack:
+            return
+        self._mark = (time.perf_counter(), time.process_time())
+        name = self._stack[-1]
+        if self.profile and name in PROFILED_STAGES:
+            self.profilers.setdefault(name, cProfile.Profile()).enable()
+
+    @contextmanager
+    def stage(self, name):
+        self.stages.setdefault(name, [0.0, 0.0, 0])[2] += 1
+        self._pause()
+        self._stack.append(name)
+        self._resume()
+        try:
+            yield
+        finally:
+            self._pause()
+            self._stack.pop()
+            self._resume()
+
+    def add_worker_time(self, name, wall_seconds, cpu_seconds):
+        totals = self.worker_stages.setdefault(name, [0.0, 0.0, 0])
+        totals[0] += wall_seconds
+        totals[1] += cpu_seconds
+        totals[2] += 1
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def record_file(self, file_path, seconds):
+        """Keeps the slowest_files files that took longest to read and extract."""
+        if len(self._slowest) < self.slowest_files:
+            heapq.heappush(self._slowest, (seconds, file_path))
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, file_path))
+
+    def skip_file(self, file_path, reason):
+        """Records a discovered file that was not analysed, and why (see file_processing.read_source)."""
+        self.skipped_files.append({"file_path": file_path, "reason": reason})
+        self.counters["files_skipped"] += 1
+        self.counters["files_skipped_" + reason] += 1
+
+    def to_dict(self):
+        def stage_table(stages):
+            return {
+                name: {"wall_seconds": round(wall, 4), "cpu_seconds": round(cpu, 4), "calls": calls}
+                for name, (wall, cpu, calls) in stages.items()
+            }
+
+        process_peak = peak_rss_bytes()
+        return {
+            "version": METRICS_VERSION,
+            "wall_seconds": round(time.perf_counter() - self._start[0], 4),
+            "cpu_seconds": round(time.process_time() - self._start[1], 4),
+            "stages": stage_table(self.stages),
+            "worker_stages": stage_table(self.worker_stages),
+            "counters": dict(sorted(self.counters.items())),
+            "slowest_files": [
+                {"file_path": file_path, "seconds": round(seconds, 4)}
+                for seconds, file_path in sorted(self._slowest, reverse=True)
+            ],
+            "skipped_files": self.skipped_files,
+            "process_peak_rss_bytes": process_peak,
+            "peak_rss_growth_bytes": process_peak - self._start_peak_rss if process_peak is not None else None,
+            "peak_child_rss_bytes": peak_rss_bytes(resource.RUSAGE_CHILDREN) if resource is not None else None,
+        }
+
+    def write(self, analysis_path):
+        """Saves the metrics as <analysis name>.metrics.json and returns them."""
+        report = self.to_dict()
+        serialization.write_sidecar(analysis_path, 'metrics', report)
+        return report
+
+    def dump_profiles(self, analysis_path):
+        """Writes each profiled stage's pstats as <analysis name>.profile.<stage>.prof; returns the paths."""
+        paths = []
+        for name, profiler in self.profilers.items():
+            path = serialization.sidecar_path(analysis_path, f"profile.{name}", extension='.prof')
+            profiler.dump_stats(path)
+            paths.append(path)
+        return paths
+
+
+def format_stage_times(report, limit=6):
+    """One line of the slowest stages of a metrics report, e.g. "extract 4.2s, serialize 1.1s"."""
+    stages = sorted(report["stages"].items(), key=lambda item: -item[1]["wall_seconds"])[:limit]
+    return ", ".join(f"{name} {times['wall_seconds']:.2f}s" for name, times in stages)
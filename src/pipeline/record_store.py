@@ -0,0 +1,85 @@
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+RECORD_STORE_VERSION = 1
+RECORD_STORE_MAGIC = b"GRPRECS\0"
+# magic, version, flags (unused), record count, offset table position
+HEADER = struct.Struct("<8sIIQQ")
+
+
+def write_record_store(file_records, output_path, summary=None):
+    """
+    Writes records as a read-only record store: a fixed header, every
+    record as compact UTF-8 JSON, then an int64 table of (record count + 1)
+    byte offsets, so record i is the bytes between offsets i and i + 1.
+    Records are streamed; only the offsets are kept in memory.
+    """
+    offsets = [HEADER.size]
+    with open(output_path, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        for file_entry in file_records:
+            if summary is not None:
+                summary.add(file_entry)
+            f.write(json.dumps(file_entry, separators=(',', ':')).encode('utf-8'))
+            offsets.append(f.tell())
+        # Aligned, so the table can be viewed in place as int64
+        f.write(bytes(-f.tell() % 8))
+        table_offset = f.tell()
+        f.write(np.array(offsets, dtype='<i8').tobytes())
+        f.seek(0)
+        f.write(HEADER.pack(RECORD_STORE_MAGIC, RECORD_STORE_VERSION, 0, len(offsets) - 1, table_offset))
+
+
+class RecordStore:
+    """
+    A record store opened with a read-only memory map. Only the offset table
+    is read up front; a record is decoded when it is indexed, and the mapped
+    pages are shared through the page cache by every process that opens the
+    file. Supports len(), indexing, slicing and iteration like the list
+    load_analysis returns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{path} is not a record store")
+        magic, version, _flags, record_count, table_offset = HEADER.unpack_from(self._map)
+        if magic != RECORD_STORE_MAGIC:
+            raise ValueError(f"{path} is not a record store")
+        if version != RECORD_STORE_VERSION:
+            raise ValueError(f"{path} is record store version {version}, expected {RECORD_STORE_VERSION}")
+        self._offsets = np.frombuffer(self._map, dtype='<i8', count=record_count + 1, offset=table_offset)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _decode(self, index):
+        return json.loads(self._map[self._offsets[index]:self._offsets[index + 1]])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return self._decode(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._decode(index)
+
+    def close(self):
+        # The offset table is a view of the map, so it has to go first
+        self._offsets = None
+        self._map.close()
+
+
+def is_record_store(path):
+    return os.path.splitext(path)[1] == ".records"
@@ -0,0 +1,97 @@
+import os
+
+PYTHON_EXTENSION = '.py'
+JS_TS_EXTENSIONS = ['.js', '.ts', '.tsx', '.jsx']
+JS_TS_INDEX_FILES = ['index.js', 'index.ts', 'index.jsx', 'index.tsx']
+
+
+class RepoIndex:
+    """
+    Lookup tables over the files of a repository, built once per analysis so
+    that import resolution does not have to rebuild a path set per import.
+
+    - paths: normalized absolute paths of every discovered file
+    - python_modules: dotted module name -> {package root dir: file path}
+    - js_modules: extensionless path -> file path, following Node's
+      extension and index-file resolution order
+    """
+
+    def __init__(self, all_repo_files, repo_root_path=None):
+        self.paths = set(os.path.normpath(p) for p in all_repo_files)
+        self.repo_root_path = os.path.abspath(repo_root_path) if repo_root_path else None
+        self.python_modules = {}
+        self.js_modules = {}
+        self._build()
+
+    def _build(self):
+        js_ranks = {}
+        for path in sorted(self.paths):
+            stem, extension = os.path.splitext(path)
+            if extension == PYTHON_EXTENSION:
+                self._add_python_module(path, stem)
+            elif extension in JS_TS_EXTENSIONS:
+                self._add_js_module(path, stem, extension, js_ranks)
+
+    def _add_python_module(self, path, stem):
+        is_package_init = os.path.basename(stem) == '__init__'
+        module_dir = os.path.dirname(stem) if is_package_init else stem
+        parts = []
+        current = module_dir
+        while True:
+            parent, name = os.path.split(current)
+            if not name:
+                break
+            parts.insert(0, name)
+            roots = self.python_modules.setdefault('.'.join(parts), {})
+            # A sibling module.py wins over package/__init__.py, as in the resolver
+            if parent not in roots or not is_package_init:
+                roots[parent] = path
+            if parent == self.repo_root_path or parent == current:
+                break
+            current = parent
+
+    def _add_js_module(self, path, stem, extension, js_ranks):
+        rank = JS_TS_EXTENSIONS.index(extension)
+        if rank < js_ranks.get(stem, len(JS_TS_EXTENSIONS) * 2):
+            self.js_modules[stem] = path
+            js_ranks[stem] = rank
+
+        directory, file_name = os.path.split(path)
+        if file_name in JS_TS_INDEX_FILES:
+            rank = len(JS_TS_EXTENSIONS) + JS_TS_INDEX_FILES.index(file_name)
+            if rank < js_ranks.get(directory, len(JS_TS_EXTENSIONS) * 2):
+                self.js_modules[directory] = path
+                js_ranks[directory] = rank
+
+    def __contains__(self, path):
+        return path in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def resolve_python_module(self, base_path, module_name):
+        """
+        Resolve an absolute dotted module name by walking up from base_path
+        to the nearest directory that contains it.
+        """
+        roots = self.python_modules.get(module_name)
+        if not roots:
+            return None
+        current_base = os.path.normpath(base_path)
+        while current_base and current_base != os.path.dirname(current_base):
+            if current_base in roots:
+                return roots[current_base]
+            current_base = os.path.dirname(current_base)
+        return None
+
+    def resolve_js_module(self, candidate_path):
+        candidate = os.path.normpath(candidate_path)
+        if candidate in self.paths:
+            return candidate
+        return self.js_modules.get(candidate)
+
+
+def ensure_repo_index(all_repo_files):
+    if isinstance(all_repo_files, RepoIndex):
+        return all_repo_files
+    return RepoIndex(all_repo_files)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+
+DEFAULT_CACHE_PATH = "output/analysis_cache.sqlite3"
+# Commit file results in batches so concurrent analyses never wait long for the write lock
+COMMIT_EVERY = 256
+
+
+def git_blob_sha(data):
+    """The id git gives a blob with this content (what `git hash-object` prints)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _git_lines(repo_root_path, args):
+    try:
+        completed = subprocess.run(
+            ["git", "-C", repo_root_path] + args,
+            capture_output=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.decode("utf-8", "surrogateescape").split("\0")
+
+
+def compute_blob_shas(repo_root_path, abs_file_paths):
+    """
+    Maps each absolute path to its git blob SHA. Clean tracked files take the
+    SHA from the git index; modified, untracked or non-git files are hashed.
+    """
+    repo_root_path = os.path.abspath(repo_root_path)
+    blob_shas = {}
+
+    staged = _git_lines(repo_root_path, ["ls-files", "-s", "-z"])
+    dirty = _git_lines(repo_root_path, ["ls-files", "-m", "-z"])
+    if staged is not None and dirty is not None:
+        dirty_paths = set(os.path.normpath(os.path.join(repo_root_path, p)) for p in dirty if p)
+        for entry in staged:
+            if not entry:
+                continue
+            info, rel_path = entry.split("\t", 1)
+            abs_path = os.path.normpath(os.path.join(repo_root_path, rel_path))
+            if abs_path not in dirty_paths:
+                blob_shas[abs_path] = info.split()[1]
+
+    for abs_path in abs_file_paths:
+        if abs_path not in blob_shas:
+            try:
+                with open(abs_path, "rb") as f:
+                    blob_shas[abs_path] = git_blob_sha(f.read())
+            except OSError:
+                continue
+
+    return {p: blob_shas[p] for p in abs_file_paths if p in blob_shas}
+
+
+class ResultCache:
+    """
+    Persistent per-file analysis results in SQLite.
+
+    - file_results: content-only results keyed by (blob SHA, analyser
+      version, extension), shared by every repository
+    - repo_files: the cross-file fields of the last run of each repository,
+      used to decide which files need their hints recomputed
+
+    Several processes can share one cache (see batch): the database is in
+    WAL mode and writers wait up to timeout seconds for each other.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, timeout=60):
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.cache_path = cache_path
+        self.connection = sqlite3.connect(cache_path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self._uncommitted = 0
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS file_results (
+                blob_sha TEXT NOT NULL,
+                analyzer_version TEXT NOT NULL,
+                extension TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (blob_sha, analyzer_version, extension)
+            );
+            CREATE TABLE IF NOT EXISTS repo_files (
+                repo_key TEXT NOT NULL,
+                analyzer_version TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                blob_sha TEXT NOT NULL,
+                dependencies TEXT NOT NULL,
+                hints TEXT NOT NULL,
+                PRIMARY KEY (repo_key, file_path)
+            );
+        """)
+
+    def has_file_result(self, blob_sha, analyzer_version, extension):
+        row = self.connection.execute(
+            "SELECT 1 FROM file_results WHERE blob_sha = ? AND analyzer_version = ? AND extension = ?",
+            (blob_sha, analyzer_version, extension)
+        ).fetchone()
+        return row is not None
+
+    def get_file_result(self, blob_sha, analyzer_version, extension):
+        row = self.connection.execute(
+            "SELECT result FROM file_results WHERE blob_sha = ? AND analyzer_version = ? AND extension = ?",
+            (blob_sha, analyzer_version, extension)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_file_result(self, blob_sha, analyzer_version, extension, file_result):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO file_results VALUES (?, ?, ?, ?)",
+            (blob_sha, analyzer_version, extension, json.dumps(file_result))
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def get_repo_state(self, repo_key, analyzer_version):
+        """
+        Returns {file_path: (blob_sha, dependencies, hints)} from the previous run.
+        """
+        rows = self.connection.execute(
+            "SELECT file_path, blob_sha, dependencies, hints FROM repo_files "
+            "WHERE repo_key = ? AND analyzer_version = ?",
+            (repo_key, analyzer_version)
+        )
+        return {
+            file_path: (blob_sha, json.loads(dependencies), json.loads(hints))
+            for file_path, blob_sha, dependencies, hints in rows
+        }
+
+    def replace_repo_state(self, repo_key, analyzer_version, repo_state):
+        self.connection.execute("DELETE FROM repo_files WHERE repo_key = ?", (repo_key,))
+        self.connection.executemany(
+            "INSERT INTO repo_files VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (repo_key, analyzer_version, file_path, blob_sha, json.dumps(dependencies), json.dumps(hints))
+                for file_path, (blob_sha, dependencies, hints) in repo_state.items()
+            ]
+        )
+
+    def commit(self):
+        self.connection.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,143 @@
+from src.pipeline.js_extractor import scan_js
+from src.pipeline.python_extractor import parse_python_source
+
+PYTHON_LANGUAGES = ["python"]
+JS_TS_LANGUAGES = ["javascript", "typescript", "javascript xml", "typescript xml"]
+
+def _indent(line):
+    return len(line) - len(line.lstrip())
+
+
+def parse_python_import_line(stripped):
+    """
+    Module names imported by one stripped Python line:
+    `import a, b as c` -> ['a', 'b'], `from .x import y` -> ['.x'].
+    """
+    if stripped.startswith("import "):
+        import_part = stripped[7:].split('#')[0]
+        names = [part.split(" as ")[0].strip() for part in import_part.split(',')]
+        return [name for name in names if name]
+    if stripped.startswith("from "):
+        from_part = stripped[5:].split('#')[0]
+        if " import " in from_part:
+            name = from_part.split(" import ")[0].strip()
+            return [name] if name else []
+    return []
+
+
+def _scan_python(lines, want_imports, want_functions, result):
+    functions = result["functions"]
+    open_function = None  # (name, indent, lines, start_line)
+
+    for line_number, line in enumerate(lines, 1):
+        stripped = line.strip()
+
+        if want_functions:
+            if open_function is not None:
+                # Stop at a line with same or less indentation (unless it's empty or a comment)
+                if stripped and not stripped.startswith('#') and _indent(line) <= open_function[1]:
+                    functions.append(_heuristic_python_function(*open_function))
+                    open_function = None
+                else:
+                    open_function[2].append(line)
+
+            if open_function is None and stripped.startswith("def ") and "(" in stripped and ":" in stripped:
+                func_name = stripped[4:stripped.find("(", 4)].strip()
+                if func_name and " " not in func_name:
+                    open_function = (func_name, _indent(line), [line], line_number)
+
+        if want_imports and stripped and not stripped.startswith('#'):
+            for module_name in parse_python_import_line(stripped):
+                result["dependency_specs"].append(module_name)
+                if not module_name.startswith('.'):
+                    result["external_specs"].append(module_name)
+
+    if open_function is not None:
+        functions.append(_heuristic_python_function(*open_function))
+
+
+def _heuristic_python_function(name, indent, func_lines, start_line):
+    # Same fields as python_extractor produces, as far as a line scan can tell
+    return {
+        "name": name,
+        "qualified_name": name,
+        "code": "\n".join(func_lines),
+        "start_line": start_line,
+        "end_line": start_line + len(func_lines) - 1,
+        "decorators": [],
+    }
+
+
+def _scan_python_ast(file_content, want_imports, want_functions, result):
+    """
+    Returns False if the source doesn't parse, so the caller can fall back to
+    the line scanner.
+    """
+    try:
+        functions, imports = parse_python_source(file_content, want_functions)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return False
+
+    if want_functions:
+        result["functions"].extend(functions)
+    if want_imports:
+        for module_name in imports:
+            result["dependency_specs"].append(module_name)
+            if not module_name.startswith('.'):
+                result["external_specs"].append(module_name)
+    return True
+
+
+def _scan_js(file_content, want_imports, want_functions, result):
+    functions, import_specs = scan_js(file_content)
+    if want_functions:
+        result["functions"].extend(functions)
+    if want_imports:
+        for module_path in import_specs:
+            if module_path.startswith(('./', '../', '/')):
+                result["dependency_specs"].append(module_path)
+            elif not module_path.startswith('.'):
+                result["external_specs"].append(module_path)
+
+
+def _dedupe_functions(functions):
+    # Remove duplicates of the same definition. Keyed on the line too, since redefinitions
+    # share a qualified name: a @property getter and its @x.setter, or a function defined twice
+    seen = set()
+    unique_functions = []
+    for func in functions:
+        key = (func.get("qualified_name", func["name"]), func.get("start_line"))
+        if key not in seen:
+            seen.add(key)
+            unique_functions.append(func)
+    return unique_functions
+
+
+def scan_source(file_content, language, want_imports=True, want_functions=True):
+    """
+    Single pass over a file that collects everything the per-file stage needs:
+
+    - dependency_specs: imports that may resolve to repository files
+    - external_specs: non-relative imports, external unless they resolve
+    - functions: [{'name', 'code', ...}] function definitions with their code
+
+    Python is parsed with the ast module (see python_extractor), which also
+    gives qualified names, line spans and decorators; the line scanner is only
+    used for files that don't parse. With want_functions=False, Python
+    imports come from python_extractor.parse_python_imports without a parse. JS/TS functions come from js_extractor,
+    which captures every function, class method and arrow function, and
+    collects import specifiers from the same lex.
+
+    find_dependencies, find_external_imports and
+    extract_function_definitions_with_code are views over this result.
+    """
+    result = {"dependency_specs": [], "external_specs": [], "functions": []}
+
+    if language in PYTHON_LANGUAGES:
+        if not _scan_python_ast(file_content, want_imports, want_functions, result):
+            _scan_python(file_content.splitlines(), want_imports, want_functions, result)
+    elif language in JS_TS_LANGUAGES:
+        _scan_js(file_content, want_imports, want_functions, result)
+
+    result["functions"] = _dedupe_functions(result["functions"])
+    return result
@@ -0,0 +1,174 @@
+import bisect
+import itertools
+import os
+import re
+
+import numpy as np
+
+from src.pipeline import serialization
+
+SEARCH_INDEX_VERSION = 1
+DEFAULT_SEARCH_LIMIT = 100
+# Names, tokens and paths never contain NUL, so each list is stored as one
+# UTF-8 byte array with a NUL before every item and split back in one call
+_SEPARATOR = "\0"
+_WORD = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+
+def name_tokens(name):
+    """
+    Lowercased search tokens of a function name: the whole name, each dotted
+    part, and the words of camelCase and snake_case identifiers, e.g.
+    "Parser.parseHTTPResponse" -> parser.parsehttpresponse, parser,
+    parsehttpresponse, parse, http, response.
+    """
+    lowered = name.lower()
+    tokens = set(lowered.split('.'))
+    tokens.add(lowered)
+    tokens.update(map(str.lower, _WORD.findall(name)))
+    tokens.discard('')
+    return tokens
+
+
+def _query_tokens(query):
+    return [word.lower() for word in _WORD.findall(query)]
+
+
+def _join(values):
+    joined = "".join(_SEPARATOR + value for value in values)
+    return np.frombuffer(joined.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+
+
+def build_search_index(file_paths, function_names):
+    """
+    Arrays of a search index over file_paths (one per record, in record
+    order) and function_names (a list of qualified names per record): an
+    inverted index from token to function ids, with the tokens sorted so a
+    prefix is one contiguous range of postings.
+    """
+    function_file = []
+    function_position = []
+    names = []
+    postings_by_token = {}
+    for record_index, record_names in enumerate(function_names):
+        for position, name in enumerate(record_names):
+            function_id = len(names)
+            function_file.append(record_index)
+            function_position.append(position)
+            names.append(name)
+            for token in name_tokens(name):
+                postings_by_token.setdefault(token, []).append(function_id)
+
+    tokens = sorted(postings_by_token)
+    posting_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum([len(postings_by_token[token]) for token in tokens], out=posting_offsets[1:])
+    postings = np.fromiter(itertools.chain.from_iterable(postings_by_token[token] for token in tokens),
+                           dtype=np.int32, count=int(posting_offsets[-1]))
+    return {
+        "version": np.array(SEARCH_INDEX_VERSION),
+        "paths": _join(file_paths),
+        "names": _join(names),
+        "function_file": np.array(function_file, dtype=np.int32),
+        "function_position": np.array(function_position, dtype=np.int32),
+        "tokens": _join(tokens),
+        "posting_offsets": posting_offsets,
+        "postings": postings,
+    }
+
+
+def _split(joined):
+    return joined.tobytes().decode('utf-8', 'surrogatepass').split(_SEPARATOR)[1:]
+
+
+class SearchIndex:
+    """
+    O(1) lookup of a file's record index by path, and token-prefix search of
+    function names across a whole analysis.
+    """
+
+    def __init__(self, arrays):
+        self.paths = _split(arrays["paths"])
+        self.record_indexes = {path: index for index, path in enumerate(self.paths)}
+        self.names = _split(arrays["names"])
+        self.function_file = arrays["function_file"]
+        self.function_position = arrays["function_position"]
+        self.tokens = _split(arrays["tokens"])
+        self.posting_offsets = arrays["posting_offsets"]
+        self.postings = arrays["postings"]
+        self.name_lengths = np.fromiter((len(name) for name in self.names), dtype=np.int32, count=len(self.names))
+
+    @classmethod
+    def from_records(cls, records):
+        """An index built in memory, for analyses saved without one."""
+        file_paths = []
+        function_names = []
+        for record in records:
+            file_paths.append(record.get('file_path', ''))
+            function_names.append([func.get('qualified_name') or func.get('name') or ''
+                                   for func in record.get('functions', [])])
+        return cls(build_search_index(file_paths, function_names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def record_index(self, file_path):
+        """Position of file_path's record in the analysis, or None."""
+        return self.record_indexes.get(file_path)
+
+    def _prefix_postings(self, prefix):
+        start = bisect.bisect_left(self.tokens, prefix)
+        # Every token with the prefix sorts before prefix + the highest code point
+        end = bisect.bisect_left(self.tokens, prefix + "\U0010ffff", lo=start)
+        return self.postings[self.posting_offsets[start]:self.posting_offsets[end]]
+
+    def _exact_postings(self, token):
+        position = bisect.bisect_left(self.tokens, token)
+        if position == len(self.tokens) or self.tokens[position] != token:
+            return self.postings[:0]
+        return self.postings[self.posting_offsets[position]:self.posting_offsets[position + 1]]
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Functions whose name has a token starting with each word of query
+        (so "get user" and "getUs" both find getUserName), as (record index,
+        function position, qualified name) tuples. Exact name matches come
+        first, then shorter names.
+        """
+        words = _query_tokens(query)
+        if not words:
+            return []
+        matches = None
+        # Narrowest posting ranges first, so intersections stay small
+        for postings in sorted((self._prefix_postings(word) for word in words), key=len):
+            candidates = np.unique(postings)
+            matches = candidates if matches is None else np.intersect1d(matches, candidates, assume_unique=True)
+            if len(matches) == 0:
+                return []
+
+        exact = np.isin(matches, self._exact_postings(query.strip().lower()))
+        order = np.lexsort((matches, self.name_lengths[matches], ~exact))[:limit]
+        return [
+            (int(self.function_file[function_id]), int(self.function_position[function_id]), self.names[function_id])
+            for function_id in matches[order]
+        ]
+
+
+def write_search_index(analysis_path, file_paths, function_names):
+    """Saves the search index next to the analysis as <analysis name>.search.npz."""
+    path = serialization.sidecar_path(analysis_path, 'search', extension='.npz')
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **build_search_index(file_paths, function_names))
+    os.replace(temp_path, path)
+    return path
+
+
+def load_search_index(analysis_path):
+    """The search index saved next to analysis_path, or None if there isn't a current one."""
+    try:
+        with np.load(serialization.sidecar_path(analysis_path, 'search', extension='.npz')) as arrays:
+            if int(arrays["version"]) != SEARCH_INDEX_VERSION:
+                return None
+            return SearchIndex({key: arrays[key] for key in arrays.files})
+    except (OSError, ValueError, KeyError):
+        return None
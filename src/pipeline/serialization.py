@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+
+from src.pipeline import columnar
+from src.pipeline import record_store
+
+OUTPUT_FORMATS = ['json', 'jsonl', 'npz', 'records']
+OUTPUT_EXTENSIONS = {'json': '.json', 'jsonl': '.jsonl', 'npz': '.npz', 'records': '.records'}
+# Artefacts derived from a whole analysis, kept next to it as <analysis name>.<kind>.json
+# (the search index is <analysis name>.search.npz)
+SIDECAR_KINDS = ['cycles', 'hierarchy', 'search', 'metrics']
+
+
+class AnalysisSummary:
+    """
+    Summary statistics accumulated record by record while the analysis is
+    written out, so nothing has to be re-read or re-parsed afterwards.
+    """
+
+    def __init__(self):
+        self.total_files = 0
+        self.total_functions = 0
+        self.total_dependencies = 0
+        self.language_counts = {}
+        self.external_libraries = set()
+        self.file_paths = []
+        self.dependency_edges = []
+        self.function_names = []
+
+    def add(self, file_entry):
+        self.total_files += 1
+        self.total_functions += len(file_entry.get('functions', []))
+        self.total_dependencies += len(file_entry.get('dependencies', []))
+        lang = file_entry.get('language', 'Unknown')
+        self.language_counts[lang] = self.language_counts.get(lang, 0) + 1
+        self.external_libraries.update(file_entry.get('external_libraries', []))
+        file_path = file_entry.get('file_path', '')
+        self.file_paths.append(file_path)
+        self.dependency_edges.extend((file_path, dep) for dep in file_entry.get('dependencies', []))
+        self.function_names.append([func.get('qualified_name') or func.get('name') or ''
+                                    for func in file_entry.get('functions', [])])
+
+
+def output_extension(output_format):
+    return OUTPUT_EXTENSIONS.get(output_format, '.json')
+
+
+def write_json_array(file_records, output_file, summary=None):
+    """
+    Writes records as a JSON array, one record at a time. The output is
+    byte-for-byte what json.dump(list(file_records), indent=2) would produce.
+    """
+    output_file.write('[')
+    first = True
+    for file_entry in file_records:
+        if summary is not None:
+            summary.add(file_entry)
+        output_file.write('\n  ' if first else ',\n  ')
+        # JSON strings never contain raw newlines, so re-indenting is safe
+        output_file.write(json.dumps(file_entry, indent=2).replace('\n', '\n  '))
+        first = False
+    output_file.write(']' if first else '\n]')
+
+
+def write_json_lines(file_records, output_file, summary=None):
+    for file_entry in file_records:
+        if summary is not None:
+            summary.add(file_entry)
+        output_file.write(json.dumps(file_entry))
+        output_file.write('\n')
+
+
+def write_analysis(file_records, output_path, output_format='json'):
+    """
+    Streams records to output_path and returns the AnalysisSummary.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    summary = AnalysisSummary()
+    if output_format == 'npz':
+        columnar.write_columnar(file_records, output_path, summary)
+        return summary
+    if output_format == 'records':
+        record_store.write_record_store(file_records, output_path, summary)
+        return summary
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        if output_format == 'jsonl':
+            write_json_lines(file_records, output_file, summary)
+        else:
+            write_json_array(file_records, output_file, summary)
+    return summary
+
+
+def iter_analysis(path):
+    """
+    Yields records from a .json, .jsonl, columnar .npz or .records analysis
+    file. JSON Lines files and record stores are read one record at a time.
+    """
+    if columnar.is_columnar_file(path):
+        yield from columnar.iter_columnar_analysis(path)
+    elif record_store.is_record_store(path):
+        store = record_store.RecordStore(path)
+        try:
+            yield from store
+        finally:
+            store.close()
+    elif path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def load_analysis(path):
+    return list(iter_analysis(path))
+
+
+def open_analysis(path):
+    """
+    The records of an analysis file as a sequence: a record store is
+    memory-mapped and decodes records as they are read, other formats are
+    loaded into a list.
+    """
+    if record_store.is_record_store(path):
+        return record_store.RecordStore(path)
+    return load_analysis(path)
+
+
+def is_analysis_file(file_name):
+    stem, extension = os.path.splitext(file_name)
+    return extension in OUTPUT_EXTENSIONS.values() and os.path.splitext(stem)[1][1:] not in SIDECAR_KINDS
+
+
+def sidecar_path(analysis_path, kind, extension='.json'):
+    return os.path.splitext(analysis_path)[0] + f".{kind}{extension}"
+
+
+def write_sidecar(analysis_path, kind, report):
+    path = sidecar_path(analysis_path, kind)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_sidecar(analysis_path, kind):
+    """The kind report saved next to analysis_path, or None if there isn't one."""
+    try:
+        with open(sidecar_path(analysis_path, kind), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def analysis_content_hash(path):
+    """Digest of an analysis file, which keys everything derived from it (layouts, dashboard caches)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+from streamlit.testing.v1 import AppTest
+
+import run_pipeline
+from src.pipeline import file_processing, function_bodies, serialization
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_lazy_function_body_is_read_from_the_blob_store_when_opened(tmp_path, monkeypatch):
+    # The dashboard's blob store and analysis_results are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "greet.py").write_text('def hello():\n    return "hi"\n')
+    runs = []
+
+    def fake_run_pipeline(output_format="json", lazy_code=False, **options):
+        runs.append(lazy_code)
+        blob_store = function_bodies.BlobStore() if lazy_code else None
+        records = file_processing.iter_repository_records(str(repo), lazy_code=lazy_code, blob_store=blob_store)
+        os.makedirs("analysis_results", exist_ok=True)
+        analysis_path = os.path.join("analysis_results", "repo.records")
+        serialization.write_analysis(records, analysis_path, output_format)
+        # Only the blob store is left to read the body from
+        shutil.rmtree(repo)
+        return analysis_path
+
+    monkeypatch.setattr(run_pipeline, "run_pipeline", fake_run_pipeline)
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run()
+    next(box for box in app.sidebar.checkbox if box.label == "Load function code on demand").check()
+    app.text_input[0].input("https://github.com/example/repo")
+    next(button for button in app.button if button.label == "Run Analysis").click().run()
+
+    assert runs == [True]
+    assert not app.exception
+    record = app.session_state["analysis_data"][0]
+    assert "code" not in record["functions"][0] and "code_ref" in record["functions"][0]
+    assert [expander.label for expander in app.expander] == ["Function: hello"]
+    assert not app.code
+
+    load_code = [box for box in app.checkbox if box.key == "load_greet.py_0"]
+    if load_code:
+        # Streamlit versions without expander state show a checkbox instead
+        load_code[0].check()
+    else:
+        app.session_state["func_greet.py_0"] = True
+    app.run()
+
+    assert not app.exception
+    assert [block.value for block in app.code] == ['def hello():\n    return "hi"']
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import subprocess
+import time
+
+import pytest
+
+from src.pipeline import async_cloner
+
+HANGING_URL = "ssh://example.invalid/team/hangs.git"
+
+
+def _git(*args, cwd):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+def _bare_repository(root, text):
+    """A bare repository at root/utils.git with one commit, and its file:// URL."""
+    work = root / "work"
+    work.mkdir(parents=True)
+    (work / "app.py").write_text(f"VERSION = {text!r}\n")
+    _git("init", "-q", cwd=work)
+    _git("add", ".", cwd=work)
+    _git("commit", "-qm", text, cwd=work)
+    _git("clone", "-q", "--bare", str(work), str(root / "utils.git"), cwd=root)
+    return f"file://{root / 'utils.git'}"
+
+
+def _running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A killed process nobody has reaped yet is a zombie
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+def _wait_until_stopped(pids, seconds=10):
+    deadline = time.monotonic() + seconds
+    while any(_running(pid) for pid in pids) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return [pid for pid in pids if _running(pid)]
+
+
+@pytest.fixture
+def hanging_transport(tmp_path, monkeypatch):
+    """Makes ssh:// clones hang in a helper process; returns the file its PIDs are written to."""
+    pid_file = tmp_path / "ssh_pids"
+    script = tmp_path / "fake_ssh"
+    script.write_text(f'#!/bin/sh\necho $$ >> "{pid_file}"\nexec sleep 60\n')
+    script.chmod(0o755)
+    monkeypatch.setenv("GIT_SSH_COMMAND", str(script))
+    return pid_file
+
+
+def _pids(pid_file):
+    return [int(line) for line in pid_file.read_text().split()] if pid_file.exists() else []
+
+
+async def _until(condition, seconds=10):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.05)
+
+
+def test_clone_many_returns_results_in_input_order(tmp_path):
+    first = _bare_repository(tmp_path / "a", "a")
+    second = _bare_repository(tmp_path / "b", "b")
+    missing = f"file://{tmp_path / 'missing.git'}"
+    output_dir = tmp_path / "clones"
+
+    results = asyncio.run(async_cloner.clone_many([first, second, first, missing], str(output_dir)))
+
+    assert results[0] == results[2] != results[1]
+    # Both repositories are called utils, but each URL gets its own directory
+    assert [open(os.path.join(path, "app.py"), encoding="utf-8").read() for path in results[:2]] == [
+        "VERSION = 'a'\n", "VERSION = 'b'\n"
+    ]
+    assert isinstance(results[3], subprocess.CalledProcessError)
+    assert sorted(os.listdir(output_dir)) == sorted(os.path.basename(path) for path in results[:2])
+
+
+def test_clone_that_times_out_is_killed_and_removed(tmp_path, hanging_transport):
+    output_dir = tmp_path / "clones"
+    repo_path = output_dir / async_cloner._clone_cache_key(HANGING_URL)
+
+    async def clone():
+        task = asyncio.ensure_future(async_cloner.clone_repository(HANGING_URL, str(output_dir), timeout=2))
+        await _until(lambda: _pids(hanging_transport))
+        assert repo_path.exists()
+        with pytest.raises(asyncio.TimeoutError):
+            await task
+
+    asyncio.run(clone())
+
+    assert not repo_path.exists()
+    # The transport helper runs in git's process group, and is killed with it
+    assert _wait_until_stopped(_pids(hanging_transport)) == []
+
+
+def test_cancelling_clone_many_stops_every_clone(tmp_path, hanging_transport):
+    urls = [HANGING_URL, "ssh://example.invalid/other/hangs.git"]
+    output_dir = tmp_path / "clones"
+
+    async def clone_and_cancel():
+        task = asyncio.ensure_future(async_cloner.clone_many(urls, str(output_dir)))
+        await _until(lambda: len(_pids(hanging_transport)) == len(urls))
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(clone_and_cancel())
+
+    assert os.listdir(output_dir) == []
+    assert _wait_until_stopped(_pids(hanging_transport)) == []
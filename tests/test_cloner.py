@@ -0,0 +1,148 @@
+import os
+import subprocess
+import threading
+
+import pytest
+
+from src.pipeline import cloner
+
+
+def _git(*args, cwd):
+    return subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                          cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+class Origin:
+    """A bare repository served over file://, and a work tree that pushes to it."""
+
+    def __init__(self, root, name):
+        self.work = root / f"{name}-work"
+        self.bare = root / f"{name}.git"
+        self.url = f"file://{self.bare}"
+        self.work.mkdir()
+        _git("init", "-q", "-b", "main", cwd=self.work)
+        _git("init", "-q", "--bare", "-b", "main", str(self.bare), cwd=root)
+        _git("remote", "add", "origin", str(self.bare), cwd=self.work)
+        self.commit("version 1")
+
+    def commit(self, text):
+        (self.work / "app.py").write_text(f"VERSION = {text!r}\n")
+        _git("add", ".", cwd=self.work)
+        _git("commit", "-qm", text, cwd=self.work)
+        _git("push", "-q", "origin", "main", cwd=self.work)
+        return _git("rev-parse", "HEAD", cwd=self.work)
+
+
+def _version(clone_path):
+    with open(os.path.join(clone_path, "app.py"), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def origin(tmp_path):
+    return Origin(tmp_path, "origin")
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "clone_cache")
+
+
+def test_first_use_clones_and_later_uses_refresh(origin, cache_dir):
+    with cloner.cached_clone(origin.url, cache_dir) as path:
+        assert _version(path) == "VERSION = 'version 1'\n"
+    assert cloner.is_cached_clone(path, cache_dir)
+
+    origin.commit("version 2")
+    untracked = os.path.join(path, "untracked.txt")
+    open(untracked, "w").close()
+    with cloner.cached_clone(origin.url, cache_dir) as refreshed:
+        assert refreshed == path
+        assert _version(refreshed) == "VERSION = 'version 2'\n"
+        # The refresh resets and cleans the work tree
+        assert not os.path.exists(untracked)
+
+
+def test_bare_clones_are_cached_and_refreshed(origin, cache_dir):
+    with cloner.cached_clone(origin.url, cache_dir, bare=True) as path:
+        assert path.endswith(".git")
+        assert os.path.isfile(os.path.join(path, "HEAD"))
+        assert not os.path.exists(os.path.join(path, "app.py"))
+
+    head = origin.commit("version 2")
+    with cloner.cached_clone(origin.url, cache_dir, bare=True) as refreshed:
+        assert refreshed == path
+        assert _git("rev-parse", "HEAD", cwd=refreshed) == head
+
+
+def test_eviction_removes_least_recently_used_entries_not_in_use(tmp_path, origin, cache_dir):
+    other = Origin(tmp_path, "other")
+    with cloner.cached_clone(origin.url, cache_dir) as first:
+        pass
+    # Cloning the second entry trims the cache, but keeps the entry it just made
+    with cloner.cached_clone(other.url, cache_dir, max_bytes=0) as second:
+        assert not os.path.exists(first)
+        assert not os.path.exists(first + ".meta.json")
+        assert os.path.isdir(second)
+    assert cloner.evict_clone_cache(cache_dir, max_bytes=0) == [second]
+    assert not os.path.exists(second)
+
+
+@pytest.mark.skipif(cloner.fcntl is None, reason="the clone cache is only locked where fcntl is available")
+def test_concurrent_runs_share_a_clone_that_is_in_use(origin, cache_dir):
+    in_use = threading.Event()
+    done = threading.Event()
+    held = {}
+
+    def analyse():
+        with cloner.cached_clone(origin.url, cache_dir) as path:
+            held["path"] = path
+            in_use.set()
+            done.wait(timeout=30)
+            held["version_at_end"] = _version(path)
+
+    worker = threading.Thread(target=analyse)
+    worker.start()
+    try:
+        assert in_use.wait(timeout=60)
+        origin.commit("version 2")
+        with cloner.cached_clone(origin.url, cache_dir) as path:
+            # The entry is in use, so this run shares it as it is instead of refreshing it
+            assert path == held["path"]
+            assert _version(path) == "VERSION = 'version 1'\n"
+        # Nor can it be evicted while in use
+        assert cloner.evict_clone_cache(cache_dir, max_bytes=0) == []
+    finally:
+        done.set()
+        worker.join(timeout=60)
+    assert held["version_at_end"] == "VERSION = 'version 1'\n"
+
+    # Once nobody holds it, the next run refreshes it
+    with cloner.cached_clone(origin.url, cache_dir) as path:
+        assert _version(path) == "VERSION = 'version 2'\n"
+
+
+@pytest.mark.skipif(cloner.fcntl is None, reason="the clone cache is only locked where fcntl is available")
+def test_concurrent_first_uses_share_one_clone(origin, cache_dir):
+    barrier = threading.Barrier(2)
+    paths, errors = [], []
+
+    def run():
+        try:
+            barrier.wait(timeout=30)
+            with cloner.cached_clone(origin.url, cache_dir) as path:
+                paths.append((path, _version(path)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert errors == []
+    assert len(paths) == 2 and paths[0] == paths[1]
+    assert paths[0][1] == "VERSION = 'version 1'\n"
+    # No staging directory of a second clone is left behind
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".tmp")]
@@ -0,0 +1,62 @@
+import subprocess
+
+import pytest
+
+from src.pipeline import file_processing, git_objects
+
+
+def _git(*args, cwd):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo_with_skipped_files(tmp_path):
+    """A repository whose app.js imports a minified bundle, a .min.js file and a binary .js file."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.js").write_text(
+        "import { run } from './bundle';\n"
+        "import { helper } from './lib.min';\n"
+        "import { blob } from './data';\n"
+        "import { util } from './util';\n"
+        "export function main() { return run(helper(blob(util()))); }\n"
+    )
+    (repo / "bundle.js").write_text("export function run(x){return x}" + ";var a=1" * 2000)
+    (repo / "lib.min.js").write_text("export function helper(x){return x}\n")
+    (repo / "data.js").write_bytes(b"export function blob(x){return x}\n\0\0\0")
+    (repo / "util.js").write_text("export function util() { return 1; }\n")
+    _git("init", "-q", cwd=repo)
+    _git("add", ".", cwd=repo)
+    _git("commit", "-qm", "initial", cwd=repo)
+    bare = tmp_path / "bare.git"
+    _git("clone", "-q", "--bare", str(repo), str(bare), cwd=tmp_path)
+    return repo, bare
+
+
+def _dependencies(records):
+    return {record["file_path"]: record["dependencies"] for record in records}
+
+
+def test_git_tree_records_have_no_dependencies_on_skipped_files(repo_with_skipped_files):
+    _, bare = repo_with_skipped_files
+    dependencies = _dependencies(git_objects.iter_git_tree_records(str(bare)))
+
+    assert dependencies == {"app.js": ["util.js"], "util.js": []}
+
+
+def test_git_tree_and_working_tree_records_agree(repo_with_skipped_files):
+    repo, bare = repo_with_skipped_files
+    working_tree = list(file_processing.iter_repository_records(str(repo)))
+    git_tree = list(git_objects.iter_git_tree_records(str(bare)))
+
+    assert _dependencies(git_tree) == _dependencies(working_tree)
+    recorded = {record["file_path"] for record in git_tree}
+    assert all(dep in recorded for deps in _dependencies(git_tree).values() for dep in deps)
+
+
+def test_git_tree_records_with_workers(repo_with_skipped_files):
+    _, bare = repo_with_skipped_files
+    dependencies = _dependencies(git_objects.iter_git_tree_records(str(bare), workers=2))
+
+    assert dependencies == {"app.js": ["util.js"], "util.js": []}
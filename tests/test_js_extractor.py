@@ -0,0 +1,31 @@
+from src.pipeline.js_extractor import extract_js_functions
+
+
+def test_jsx_tags_do_not_start_regex_literals():
+    source = (
+        "function List({ items }) {\n"
+        "  return <ul>{items.map(i => <Item key={i} />)}</ul>;\n"
+        "}\n"
+        "\n"
+        "function helper(a, b) {\n"
+        "  return a / b;\n"
+        "}\n"
+        "\n"
+        "const Page = () => {\n"
+        "  const pattern = /ab+c/g;\n"
+        "  return <div className=\"page\">{helper(1, 2)}<br/></div>;\n"
+        "};\n"
+        "\n"
+        "export function Footer() {\n"
+        "  return <footer>{pattern.test('abc') ? 'yes' : 'no'}</footer>;\n"
+        "}\n"
+    )
+    functions = extract_js_functions(source)
+
+    assert [(func["name"], func["start_line"], func["end_line"]) for func in functions] == [
+        ("List", 1, 3),
+        ("helper", 5, 7),
+        ("Page", 9, 12),
+        ("Footer", 14, 16),
+    ]
+    assert functions[0]["code"].endswith("</ul>;\n}")
@@ -0,0 +1,51 @@
+from src.pipeline.scanner import scan_source
+
+
+def test_property_getter_and_setter_both_survive():
+    source = (
+        "class Point:\n"
+        "    @property\n"
+        "    def x(self):\n"
+        "        return self._x\n"
+        "\n"
+        "    @x.setter\n"
+        "    def x(self, value):\n"
+        "        self._x = value\n"
+    )
+    functions = scan_source(source, "python")["functions"]
+
+    assert [(func["qualified_name"], func["decorators"]) for func in functions] == [
+        ("Point.x", ["property"]),
+        ("Point.x", ["x.setter"]),
+    ]
+
+
+def test_imports_only_scan_matches_the_ast():
+    source = (
+        '"""Module docstring.\n'
+        "import not_an_import\n"
+        '"""\n'
+        "import os, os.path as osp\n"
+        "from . import sibling\n"
+        "from .import other\n"
+        "from ..pkg.mod \\\n"
+        "    import (a,\n"
+        "            b)\n"
+        "import json, \\\n"
+        "    csv\n"
+        "try: import simplejson\n"
+        "except ImportError: simplejson = None\n"
+        "x = 1; import re  # import commented_out\n"
+        "text = 'import in_a_string'\n"
+        "def load():\n"
+        "    from .lazy import thing\n"
+        "    return thing\n"
+    )
+    imports_only = scan_source(source, "python", want_functions=False)
+    full = scan_source(source, "python")
+
+    assert imports_only["dependency_specs"] == full["dependency_specs"] == [
+        "os", "os.path", ".", ".", "..pkg.mod", "json", "csv", "simplejson", "re", ".lazy"
+    ]
+    assert imports_only["external_specs"] == full["external_specs"]
+    assert imports_only["functions"] == []
@@ -0,0 +1,15 @@
+from src.pipeline import search_index
+
+
+def test_search_index_round_trips_paths_that_are_not_utf8(tmp_path):
+    # os.walk and git ls-tree give undecodable bytes in file names as surrogate escapes
+    file_paths = ["caf\udce9.py", "src/app.js"]
+    function_names = [["caf\udce9.getUser"], ["App.render"]]
+    analysis_path = str(tmp_path / "repo_analysis.json")
+
+    search_index.write_search_index(analysis_path, file_paths, function_names)
+    index = search_index.load_search_index(analysis_path)
+
+    assert index.paths == file_paths
+    assert index.record_index("caf\udce9.py") == 0
+    assert list(index.search("get user")) == [(0, 0, "caf\udce9.getUser")]